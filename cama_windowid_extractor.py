@@ -3,18 +3,20 @@ CAMA WindowId Extractor
 Automatically retrieves a fresh windowId from the Stark County CAMA system
 """
 
-import requests
 from bs4 import BeautifulSoup
 import re
 from urllib.parse import urlparse, parse_qs
 
-def extract_window_id_simple(parcel_id="204522"):
+from mls_cama_http import create_session
+
+def extract_window_id_simple(parcel_id="204522", session=None):
     """
     Try to extract windowId without login by searching for a property.
     This often works because property search is usually public.
     
     Args:
         parcel_id: A valid parcel ID to search for (default is a test parcel)
+        session: Pooled session to reuse (a new one is created if omitted)
     
     Returns:
         str: The windowId if found, None otherwise
@@ -22,7 +24,7 @@ def extract_window_id_simple(parcel_id="204522"):
     try:
         print("🔍 Attempting to extract windowId without login...")
         
-        session = requests.Session()
+        session = session or create_session()
         base_url = "https://iasworld.starkcountyohio.gov/iasworld/"
         
         # First, get the main page to establish session
@@ -50,7 +52,7 @@ def extract_window_id_simple(parcel_id="204522"):
         return None
 
 
-def extract_window_id_with_login(username, password, parcel_id="204522"):
+def extract_window_id_with_login(username, password, parcel_id="204522", session=None):
     """
     Extract windowId by logging into the CAMA system.
     
@@ -58,6 +60,7 @@ def extract_window_id_with_login(username, password, parcel_id="204522"):
         username: Your CAMA username
         password: Your CAMA password  
         parcel_id: A valid parcel ID to search for
+        session: Pooled session to reuse (a new one is created if omitted)
     
     Returns:
         str: The windowId if found, None otherwise
@@ -65,7 +68,7 @@ def extract_window_id_with_login(username, password, parcel_id="204522"):
     try:
         print("🔐 Logging into CAMA system...")
         
-        session = requests.Session()
+        session = session or create_session()
         base_url = "https://iasworld.starkcountyohio.gov/iasworld/"
         
         # Get the login page - CORRECT URL WITH /Main/
@@ -200,12 +203,15 @@ def get_window_id(username=None, password=None, fallback_id=None):
     print("CAMA WindowId Extraction")
     print("=" * 80)
     
+    # One pooled session for every attempt, so the connection is reused
+    session = create_session()
+    
     # Method 1: Try without login first (public access)
-    window_id = extract_window_id_simple()
+    window_id = extract_window_id_simple(session=session)
     
     # Method 2: If that fails and credentials provided, try with login
     if not window_id and username and password:
-        window_id = extract_window_id_with_login(username, password)
+        window_id = extract_window_id_with_login(username, password, session=session)
     
     # Method 3: Use fallback if provided
     if not window_id and fallback_id:
@@ -1,19 +1,73 @@
+import hashlib
+from io import BytesIO
+
 import streamlit as st
 import pandas as pd
-import numpy as np
-from io import BytesIO
-import re
 
 # Install required package if not available
 try:
     import openpyxl
-    from openpyxl import load_workbook
 except ImportError:
     import subprocess
     import sys
     subprocess.check_call([sys.executable, "-m", "pip", "install", "--break-system-packages", "openpyxl"])
     import openpyxl
-    from openpyxl import load_workbook
+
+from mls_cama_cache import EXCEL_ENGINE
+from mls_cama_core import (
+    COLUMNS_TO_COMPARE,
+    COLUMNS_TO_COMPARE_CATEGORICAL,
+    COLUMNS_TO_COMPARE_SUM,
+    DEFAULT_WINDOW_ID,
+    build_parcel_url_template,
+    compare_data_enhanced,
+    create_excel_with_hyperlinks,
+    create_report_workbook,
+)
+
+XLSX_MIME = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+# Streamlit reruns this whole script on every widget change, so parsing and
+# comparing are cached on the uploaded file contents (arguments starting with
+# "_" are not hashed by st.cache_data; the content hash stands in for them).
+@st.cache_data(show_spinner=False, max_entries=8)
+def load_upload(content_hash, _data):
+    """Parse an uploaded workbook once per distinct file content."""
+    return pd.read_excel(BytesIO(_data), engine=EXCEL_ENGINE)
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def run_comparison(mls_hash, cama_hash, unique_id_col, cols_to_compare_mapping, cols_to_compare_sum,
+                   cols_to_compare_categorical, tolerance, skip_zeros, vectorized, _df_mls, _df_cama):
+    """compare_data_enhanced, cached on the file hashes and every comparison setting."""
+    df_missing_cama, df_missing_mls, df_value_mismatches, _, df_perfect_matches = compare_data_enhanced(
+        _df_mls, _df_cama, unique_id_col,
+        cols_to_compare_mapping,
+        cols_to_compare_sum=cols_to_compare_sum,
+        cols_to_compare_categorical=cols_to_compare_categorical,
+        tolerance=tolerance,
+        skip_zeros=skip_zeros,
+        include_nopar=False,
+        include_zillow_url=False,
+        vectorized=vectorized
+    )
+    return df_missing_cama, df_missing_mls, df_value_mismatches, df_perfect_matches
+
+
+def lazy_download(label, file_name, result_key, build_excel):
+    """
+    Build a report workbook only when the user asks for it.
+    The bytes are kept in session state so later reruns do not rebuild them.
+    """
+    state_key = f"xlsx:{result_key}:{file_name}"
+    if state_key not in st.session_state:
+        if st.button(f"📄 Prepare {label} (Excel)", key=f"prepare:{state_key}"):
+            with st.spinner(f'Building {file_name}...'):
+                st.session_state[state_key] = build_excel().getvalue()
+    if state_key in st.session_state:
+        st.download_button(f"⬇️ Download {label} (Excel)", st.session_state[state_key],
+                           file_name, XLSX_MIME, key=f"download:{state_key}")
 
 # Set page configuration
 st.set_page_config(
@@ -46,6 +100,10 @@ unique_id_cama = st.sidebar.text_input("CAMA ID Column", "PARID")
 st.sidebar.subheader("⚖️ Comparison Settings")
 numeric_tolerance = st.sidebar.number_input("Numeric Tolerance", value=0.01, format="%.4f")
 skip_zero_values = st.sidebar.checkbox("Skip Zero Values", value=True)
+use_vectorized_engine = st.sidebar.checkbox(
+    "Fast Comparison Engine", value=True,
+    help="Column-wise engine; uncheck to use the original row-by-row comparison"
+)
 
 # WindowId input
 st.sidebar.subheader("🔗 Hyperlink Settings")
@@ -62,397 +120,24 @@ Example URL:
 # Simple windowId input field
 window_id = st.sidebar.text_input(
     "🔑 WindowId",
-    "638981240146803746",
+    DEFAULT_WINDOW_ID,
     help="Copy this from the CAMA website URL after logging in and searching for a property"
 )
 
 # Build the URL template with the user's windowId
-parcel_url_template = f"https://iasworld.starkcountyohio.gov/iasworld/Maintain/Transact.aspx?txtMaskedPin={{parcel_id}}&selYear=&userYear=&selJur=&chkShowHistory=False&chkShowChanges=&chkShowDeactivated=&PinValue={{parcel_id}}&pin=&trans_key=&windowId={window_id}&submitFlag=true&TransPopUp=&ACflag=False&ACflag2=False"
-
-# Column comparisons to perform
-COLUMNS_TO_COMPARE = [
-    {'mls_col': 'Above Grade Finished Area', 'cama_col': 'SFLA'},
-    {'mls_col': 'Bedrooms Total', 'cama_col': 'RMBED'},
-    {'mls_col': 'Bathrooms Full', 'cama_col': 'FIXBATH'},
-    {'mls_col': 'Bathrooms Half', 'cama_col': 'FIXHALF'},
-]
-
-COLUMNS_TO_COMPARE_SUM = [
-    {'mls_col': 'Below Grade Finished Area', 'cama_cols': ['RECROMAREA', 'FINBSMTAREA', 'UFEATAREA']}
-]
-
-COLUMNS_TO_COMPARE_CATEGORICAL = [
-    {
-        'mls_col': 'Cooling',
-        'cama_col': 'HEAT',
-        'mls_check_contains': 'Central Air',
-        'cama_expected_if_true': 1,
-        'cama_expected_if_false': 0,
-        'case_sensitive': False
-    }
-]
-
-ADDRESS_COLUMNS = {
-    'address': 'Address',
-    'city': 'City',
-    'state': 'State or Province',
-    'zip': 'Postal Code'
-}
-
-# Utility functions
-def format_zillow_url(address, city, state, zip_code):
-    """Create a Zillow search URL from address components."""
-    if pd.isna(address) or pd.isna(city) or pd.isna(zip_code):
-        return None
-    
-    address_clean = str(address).strip()
-    city_clean = str(city).strip()
-    zip_clean = str(zip_code).strip().split('-')[0]
-    
-    address_clean = re.sub(r'\s+(Apt|Unit|#|Suite)\s*[\w-]*$', '', address_clean, flags=re.IGNORECASE)
-    address_formatted = re.sub(r'[^\w\s-]', '', address_clean)
-    address_formatted = re.sub(r'\s+', '-', address_formatted)
-    
-    city_formatted = re.sub(r'[^\w\s-]', '', city_clean)
-    city_formatted = re.sub(r'\s+', '-', city_formatted)
-    
-    url_slug = f"{address_formatted}-{city_formatted}-OH-{zip_clean}_rb"
-    return f"https://www.zillow.com/homes/{url_slug}/"
-
-def values_equal(val1, val2, tolerance):
-    """Check if two values are equal within tolerance."""
-    try:
-        num1 = pd.to_numeric(val1, errors='raise')
-        num2 = pd.to_numeric(val2, errors='raise')
-        
-        if pd.isna(num1) and pd.isna(num2):
-            return True
-        elif pd.isna(num1) != pd.isna(num2):
-            return False
-        else:
-            return np.isclose(num1, num2, equal_nan=False, rtol=1e-9, atol=tolerance)
-    except (ValueError, TypeError):
-        str1 = str(val1).strip().lower() if pd.notna(val1) else ''
-        str2 = str(val2).strip().lower() if pd.notna(val2) else ''
-        return str1 == str2
-
-def categorical_match(mls_val, cama_val, mapping, tolerance):
-    """Check if a categorical MLS field matches expected CAMA value."""
-    check_text = mapping.get('mls_check_contains', '')
-    expected_if_true = mapping.get('cama_expected_if_true')
-    expected_if_false = mapping.get('cama_expected_if_false')
-    case_sensitive = mapping.get('case_sensitive', False)
-    
-    mls_str = str(mls_val).strip() if pd.notna(mls_val) else ''
-    
-    if not case_sensitive:
-        mls_str = mls_str.lower()
-        check_text = check_text.lower()
-    
-    text_found = check_text in mls_str
-    expected_cama = expected_if_true if text_found else expected_if_false
-    
-    try:
-        cama_numeric = pd.to_numeric(cama_val, errors='coerce')
-        expected_numeric = pd.to_numeric(expected_cama, errors='coerce')
-        
-        if pd.isna(cama_numeric) and pd.isna(expected_numeric):
-            return True
-        elif pd.isna(cama_numeric) or pd.isna(expected_numeric):
-            return False
-        else:
-            return np.isclose(cama_numeric, expected_numeric, equal_nan=False, rtol=1e-9, atol=tolerance)
-    except:
-        return str(cama_val).strip().lower() == str(expected_cama).strip().lower()
-
-def calculate_difference(val1, val2):
-    """Calculate the difference between two values."""
-    try:
-        num1 = pd.to_numeric(val1, errors='raise')
-        num2 = pd.to_numeric(val2, errors='raise')
-        
-        if pd.isna(num1) or pd.isna(num2):
-            return "N/A"
-        
-        diff = num1 - num2
-        return f"{diff:,.2f}"
-    except (ValueError, TypeError):
-        return "Text difference"
-
-def compare_data_enhanced(df_mls, df_cama, unique_id_col, cols_to_compare_mapping,
-                         cols_to_compare_sum=None, cols_to_compare_categorical=None,
-                         tolerance=0.01, skip_zeros=True):
-    """Compare MLS and CAMA dataframes."""
-    
-    mls_id_col_name = unique_id_col['mls_col']
-    cama_id_col_name = unique_id_col['cama_col']
-    
-    df_mls_renamed = df_mls.copy()
-    df_mls_renamed = df_mls_renamed.rename(columns={mls_id_col_name: cama_id_col_name})
-    
-    merged_df = pd.merge(df_mls_renamed, df_cama, on=cama_id_col_name, how='outer', indicator=True)
-    
-    missing_in_cama = []
-    missing_in_mls = []
-    value_mismatches = []
-    perfect_matches = []
-    
-    for index, row in merged_df.iterrows():
-        record_id = row.get(cama_id_col_name)
-        merge_status = row.get('_merge')
-        
-        if merge_status == 'left_only':
-            listing_num = row.get('Listing #', '')
-            closed_date = row.get('Closed Date', '')
-            missing_in_cama.append({
-                'Parcel_ID': record_id,
-                'Listing_Number': listing_num,
-                'Closed_Date': closed_date
-            })
-            
-        elif merge_status == 'right_only':
-            missing_in_mls.append({'Parcel_ID': record_id})
-            
-        elif merge_status == 'both':
-            listing_num = row.get('Listing #', '')
-            salekey = row.get('SALEKEY', '')
-            address = row.get(ADDRESS_COLUMNS.get('address', 'Address'), '')
-            city = row.get(ADDRESS_COLUMNS.get('city', 'City'), '')
-            state = row.get(ADDRESS_COLUMNS.get('state', 'State or Province'), '')
-            zip_code = row.get(ADDRESS_COLUMNS.get('zip', 'Postal Code'), '')
-            
-            record_mismatches = []
-            fields_compared = []
-            
-            # Standard 1-to-1 comparisons
-            for mapping in cols_to_compare_mapping:
-                mls_col = mapping['mls_col']
-                cama_col = mapping['cama_col']
-                
-                if mls_col not in merged_df.columns or cama_col not in merged_df.columns:
-                    continue
-                
-                mls_val = row.get(mls_col)
-                cama_val = row.get(cama_col)
-                
-                mls_is_blank = pd.isna(mls_val) or (isinstance(mls_val, str) and mls_val.strip() == '')
-                cama_is_blank = pd.isna(cama_val) or (isinstance(cama_val, str) and cama_val.strip() == '')
-                
-                if mls_is_blank or cama_is_blank:
-                    continue
-                
-                fields_compared.append(mls_col)
-                
-                if skip_zeros:
-                    try:
-                        mls_numeric = pd.to_numeric(mls_val, errors='coerce')
-                        cama_numeric = pd.to_numeric(cama_val, errors='coerce')
-                        if (pd.notna(mls_numeric) and mls_numeric == 0) or (pd.notna(cama_numeric) and cama_numeric == 0):
-                            continue
-                    except:
-                        pass
-                
-                if not values_equal(mls_val, cama_val, tolerance):
-                    record_mismatches.append({
-                        'Parcel_ID': record_id,
-                        'Listing_Number': listing_num,
-                        'SALEKEY': salekey,
-                        'Address': address,
-                        'City': city,
-                        'State': state,
-                        'Zip': zip_code,
-                        'Field_MLS': mls_col,
-                        'Field_CAMA': cama_col,
-                        'MLS_Value': mls_val,
-                        'CAMA_Value': cama_val,
-                        'Difference': calculate_difference(mls_val, cama_val)
-                    })
-            
-            # Sum comparisons
-            if cols_to_compare_sum:
-                for mapping in cols_to_compare_sum:
-                    mls_col = mapping['mls_col']
-                    cama_cols = mapping['cama_cols']
-                    
-                    if mls_col not in merged_df.columns:
-                        continue
-                    
-                    missing_cols = [col for col in cama_cols if col not in merged_df.columns]
-                    if missing_cols:
-                        continue
-                    
-                    mls_val = row.get(mls_col)
-                    mls_is_blank = pd.isna(mls_val) or (isinstance(mls_val, str) and mls_val.strip() == '')
-                    
-                    if mls_is_blank:
-                        continue
-                    
-                    cama_sum = 0
-                    all_cama_blank = True
-                    for col in cama_cols:
-                        val = row.get(col)
-                        if pd.notna(val):
-                            all_cama_blank = False
-                            try:
-                                cama_sum += pd.to_numeric(val, errors='coerce')
-                            except:
-                                pass
-                    
-                    if all_cama_blank:
-                        continue
-                    
-                    fields_compared.append(mls_col)
-                    
-                    if skip_zeros:
-                        try:
-                            mls_numeric = pd.to_numeric(mls_val, errors='coerce')
-                            if (pd.notna(mls_numeric) and mls_numeric == 0) or cama_sum == 0:
-                                continue
-                        except:
-                            pass
-                    
-                    if not values_equal(mls_val, cama_sum, tolerance):
-                        record_mismatches.append({
-                            'Parcel_ID': record_id,
-                            'Listing_Number': listing_num,
-                            'SALEKEY': salekey,
-                            'Address': address,
-                            'City': city,
-                            'State': state,
-                            'Zip': zip_code,
-                            'Field_MLS': mls_col,
-                            'Field_CAMA': f"SUM({', '.join(cama_cols)})",
-                            'MLS_Value': mls_val,
-                            'CAMA_Value': cama_sum,
-                            'Difference': calculate_difference(mls_val, cama_sum)
-                        })
-            
-            # Categorical comparisons
-            if cols_to_compare_categorical:
-                for mapping in cols_to_compare_categorical:
-                    mls_col = mapping['mls_col']
-                    cama_col = mapping['cama_col']
-                    
-                    if mls_col not in merged_df.columns or cama_col not in merged_df.columns:
-                        continue
-                    
-                    mls_val = row.get(mls_col)
-                    cama_val = row.get(cama_col)
-                    
-                    mls_is_blank = pd.isna(mls_val) or (isinstance(mls_val, str) and mls_val.strip() == '')
-                    cama_is_blank = pd.isna(cama_val) or (isinstance(cama_val, str) and cama_val.strip() == '')
-                    
-                    if mls_is_blank or cama_is_blank:
-                        continue
-                    
-                    fields_compared.append(mls_col)
-                    
-                    if not categorical_match(mls_val, cama_val, mapping, tolerance):
-                        check_text = mapping.get('mls_check_contains', '')
-                        case_sensitive = mapping.get('case_sensitive', False)
-                        mls_str = str(mls_val).strip() if pd.notna(mls_val) else ''
-                        
-                        if not case_sensitive:
-                            mls_str = mls_str.lower()
-                            check_text_lower = check_text.lower()
-                        else:
-                            check_text_lower = check_text
-                        
-                        text_found = check_text_lower in mls_str
-                        expected_cama = mapping.get('cama_expected_if_true') if text_found else mapping.get('cama_expected_if_false')
-                        
-                        record_mismatches.append({
-                            'Parcel_ID': record_id,
-                            'Listing_Number': listing_num,
-                            'SALEKEY': salekey,
-                            'Address': address,
-                            'City': city,
-                            'State': state,
-                            'Zip': zip_code,
-                            'Field_MLS': mls_col,
-                            'Field_CAMA': cama_col,
-                            'MLS_Value': mls_val,
-                            'CAMA_Value': cama_val,
-                            'Expected_CAMA_Value': expected_cama,
-                            'Match_Rule': f"If '{check_text}' in {mls_col}, then {cama_col} should be {mapping.get('cama_expected_if_true')}, else {mapping.get('cama_expected_if_false')}"
-                        })
-            
-            if not record_mismatches and fields_compared:
-                perfect_matches.append({
-                    'Parcel_ID': record_id,
-                    'Listing_Number': listing_num,
-                    'SALEKEY': salekey,
-                    'Address': address,
-                    'City': city,
-                    'State': state,
-                    'Zip': zip_code,
-                    'Fields_Compared': len(fields_compared),
-                    'Fields_List': ', '.join(fields_compared)
-                })
-            
-            value_mismatches.extend(record_mismatches)
-    
-    return (pd.DataFrame(missing_in_cama), pd.DataFrame(missing_in_mls),
-            pd.DataFrame(value_mismatches), pd.DataFrame(perfect_matches))
-
-def create_excel_with_hyperlinks(df, parcel_url_template):
-    """Create Excel file with hyperlinks."""
-    output = BytesIO()
-    
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
-        df.to_excel(writer, index=False, sheet_name='Data')
-    
-    output.seek(0)
-    wb = load_workbook(output)
-    ws = wb['Data']
-    
-    # Add Parcel_ID hyperlinks
-    if 'Parcel_ID' in df.columns and parcel_url_template:
-        parcel_col_idx = list(df.columns).index('Parcel_ID') + 1
-        
-        for row_idx in range(2, len(df) + 2):
-            cell = ws.cell(row=row_idx, column=parcel_col_idx)
-            parcel_value = cell.value
-            if parcel_value and str(parcel_value).strip():
-                url = parcel_url_template.format(parcel_id=parcel_value)
-                cell.hyperlink = url
-                cell.style = 'Hyperlink'
-    
-    # Add Address hyperlinks to Zillow
-    if 'Address' in df.columns:
-        address_col_idx = list(df.columns).index('Address') + 1
-        has_location_data = all(col in df.columns for col in ['City', 'Zip'])
-        
-        if has_location_data:
-            city_col_idx = list(df.columns).index('City') + 1
-            zip_col_idx = list(df.columns).index('Zip') + 1
-            
-            for row_idx in range(2, len(df) + 2):
-                address_cell = ws.cell(row=row_idx, column=address_col_idx)
-                address_value = address_cell.value
-                
-                if address_value and str(address_value).strip():
-                    city = ws.cell(row=row_idx, column=city_col_idx).value
-                    zip_code = ws.cell(row=row_idx, column=zip_col_idx).value
-                    
-                    url = format_zillow_url(address_value, city, 'OH', zip_code)
-                    if url:
-                        address_cell.hyperlink = url
-                        address_cell.style = 'Hyperlink'
-    
-    output = BytesIO()
-    wb.save(output)
-    output.seek(0)
-    
-    return output
+parcel_url_template = build_parcel_url_template(window_id)
 
 # Main application logic
 if mls_file and cama_file:
     try:
-        # Load data
+        # Load data (parsed once per distinct upload)
+        mls_bytes = mls_file.getvalue()
+        cama_bytes = cama_file.getvalue()
+        mls_hash = hashlib.sha256(mls_bytes).hexdigest()
+        cama_hash = hashlib.sha256(cama_bytes).hexdigest()
         with st.spinner('Loading data...'):
-            df_mls = pd.read_excel(mls_file)
-            df_cama = pd.read_excel(cama_file)
+            df_mls = load_upload(mls_hash, mls_bytes)
+            df_cama = load_upload(cama_hash, cama_bytes)
         
         st.success(f"✅ Loaded {len(df_mls)} MLS records and {len(df_cama)} CAMA records")
         
@@ -463,18 +148,26 @@ if mls_file and cama_file:
         with st.expander("📊 Preview CAMA Data"):
             st.dataframe(df_cama.head())
         
-        # Run comparison button
+        unique_id_col = {'mls_col': unique_id_mls, 'cama_col': unique_id_cama}
+        comparison_args = (mls_hash, cama_hash, unique_id_col, COLUMNS_TO_COMPARE, COLUMNS_TO_COMPARE_SUM,
+                           COLUMNS_TO_COMPARE_CATEGORICAL, numeric_tolerance, skip_zero_values,
+                           use_vectorized_engine)
+        comparison_key = hashlib.sha256(repr(comparison_args).encode('utf-8')).hexdigest()[:16]
+        # Prepared workbooks also depend on the windowId (hyperlinks)
+        result_key = hashlib.sha256(f"{comparison_key}|{parcel_url_template}".encode('utf-8')).hexdigest()[:16]
+        
+        # Drop workbooks prepared for earlier results
+        for key in [k for k in st.session_state if k.startswith('xlsx:') and not k.startswith(f'xlsx:{result_key}:')]:
+            del st.session_state[key]
+        
+        # Run comparison button (results stay visible across reruns until a setting changes)
         if st.button("🔍 Run Comparison", type="primary"):
+            st.session_state['comparison_key'] = comparison_key
+        
+        if st.session_state.get('comparison_key') == comparison_key:
             with st.spinner('Comparing data...'):
-                unique_id_col = {'mls_col': unique_id_mls, 'cama_col': unique_id_cama}
-                
-                df_missing_cama, df_missing_mls, df_value_mismatches, df_perfect_matches = compare_data_enhanced(
-                    df_mls, df_cama, unique_id_col,
-                    COLUMNS_TO_COMPARE,
-                    cols_to_compare_sum=COLUMNS_TO_COMPARE_SUM,
-                    cols_to_compare_categorical=COLUMNS_TO_COMPARE_CATEGORICAL,
-                    tolerance=numeric_tolerance,
-                    skip_zeros=skip_zero_values
+                df_missing_cama, df_missing_mls, df_value_mismatches, df_perfect_matches = run_comparison(
+                    *comparison_args, df_mls, df_cama
                 )
             
             # Display results
@@ -496,52 +189,28 @@ if mls_file and cama_file:
                 mismatch_counts = df_value_mismatches['Field_MLS'].value_counts()
                 st.bar_chart(mismatch_counts)
             
-            # Display and download options
+            # Display and download options (workbooks are built on request)
             st.header("📥 Download Reports")
             
-            if not df_missing_cama.empty:
-                st.subheader("Missing in CAMA")
-                st.dataframe(df_missing_cama)
-                excel_data = create_excel_with_hyperlinks(df_missing_cama, parcel_url_template)
-                st.download_button(
-                    "⬇️ Download Missing in CAMA (Excel)",
-                    excel_data,
-                    "missing_in_CAMA.xlsx",
-                    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-                )
-            
-            if not df_missing_mls.empty:
-                st.subheader("Missing in MLS")
-                st.dataframe(df_missing_mls)
-                excel_data = create_excel_with_hyperlinks(df_missing_mls, parcel_url_template)
-                st.download_button(
-                    "⬇️ Download Missing in MLS (Excel)",
-                    excel_data,
-                    "missing_in_MLS.xlsx",
-                    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+            if not (df_missing_cama.empty and df_missing_mls.empty
+                    and df_value_mismatches.empty and df_perfect_matches.empty):
+                lazy_download(
+                    "All Reports (one workbook with Summary)", "mls_cama_reports.xlsx", result_key,
+                    lambda: create_report_workbook(df_missing_cama, df_missing_mls, df_value_mismatches,
+                                                   df_perfect_matches, parcel_url_template)
                 )
             
-            if not df_value_mismatches.empty:
-                st.subheader("Value Mismatches")
-                st.dataframe(df_value_mismatches)
-                excel_data = create_excel_with_hyperlinks(df_value_mismatches, parcel_url_template)
-                st.download_button(
-                    "⬇️ Download Value Mismatches (Excel)",
-                    excel_data,
-                    "value_mismatches.xlsx",
-                    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-                )
-            
-            if not df_perfect_matches.empty:
-                st.subheader("Perfect Matches")
-                st.dataframe(df_perfect_matches)
-                excel_data = create_excel_with_hyperlinks(df_perfect_matches, parcel_url_template)
-                st.download_button(
-                    "⬇️ Download Perfect Matches (Excel)",
-                    excel_data,
-                    "perfect_matches.xlsx",
-                    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-                )
+            for title, df, file_name in [
+                ("Missing in CAMA", df_missing_cama, "missing_in_CAMA.xlsx"),
+                ("Missing in MLS", df_missing_mls, "missing_in_MLS.xlsx"),
+                ("Value Mismatches", df_value_mismatches, "value_mismatches.xlsx"),
+                ("Perfect Matches", df_perfect_matches, "perfect_matches.xlsx"),
+            ]:
+                if not df.empty:
+                    st.subheader(title)
+                    st.dataframe(df)
+                    lazy_download(title, file_name, result_key,
+                                  lambda df=df: create_excel_with_hyperlinks(df, parcel_url_template))
     
     except Exception as e:
         st.error(f"❌ Error: {str(e)}")
@@ -0,0 +1,403 @@
+"""
+MLS vs CAMA Batch Runner
+Runs many comparisons (several counties, several MLS board extracts) headlessly
+from a JSON manifest, with no windowId prompt.
+
+Jobs run concurrently in up to MAX_PROCESSES worker processes. Each distinct
+MLS and CAMA file is loaded once, written to a shared Arrow IPC file and
+memory-mapped by every job that uses it (one board extract often covers several
+counties); a job starts as soon as both of its files are ready.
+Every job writes its reports, a job.log with its console output and a
+profile.json with its stage timings to its own output folder. The batch writes
+batch_report.json/.csv with the status, counts, timings and peak memory of every job.
+
+Manifest (see batch_manifest_TEMPLATE.json; relative paths are resolved against
+the manifest's folder):
+
+    {
+      "max_processes": 4,
+      "report_dir": "batch_reports",
+      "defaults": {"window_id": "638981240146803746"},
+      "jobs": [
+        {"name": "stark_board1", "mls": "MLS_board1.xlsx", "cama": "CAMA_stark.xls",
+         "output_dir": "reports/stark_board1"},
+        {"name": "summit", "mls": "MLS_summit.xlsx", "cama": "CAMA_summit.xlsx",
+         "output_dir": "reports/summit", "config": "summit_columns.json"}
+      ]
+    }
+
+Job settings are taken from mls_cama_core's defaults, then "defaults", then the
+job's "config" file, then the job itself. Setting keys: unique_id_column,
+columns_to_compare, columns_to_compare_sum, columns_to_compare_categorical,
+address_columns, numeric_tolerance, skip_zero_values, duplicate_policy,
+include_nopar, single_workbook, window_id, parcel_url_template (with a {parcel_id} placeholder).
+
+Run:  python mls_cama_batch.py [manifest.json]
+"""
+
+import contextlib
+import csv
+import json
+import os
+import sys
+import tempfile
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime
+
+from mls_cama_cache import pa, read_frame_ipc, write_frame_ipc
+from mls_cama_core import (
+    ADDRESS_COLUMNS,
+    COLUMNS_TO_COMPARE,
+    COLUMNS_TO_COMPARE_CATEGORICAL,
+    COLUMNS_TO_COMPARE_SUM,
+    DEFAULT_WINDOW_ID,
+    DUPLICATE_POLICY,
+    NUMERIC_TOLERANCE,
+    SKIP_ZERO_VALUES,
+    UNIQUE_ID_COLUMN,
+    build_parcel_url_template,
+    compare_data_enhanced,
+    comparison_columns,
+    comparison_dtypes,
+    find_duplicate_ids,
+    read_cama_data,
+    read_mls_data,
+    report_discrepancies_enhanced,
+)
+from mls_cama_profile import child_peak_rss_mb, profile_stage, start_profile, stop_profile, write_profile
+
+# --- Configuration ---
+MANIFEST_PATH = 'batch_manifest.json'  # Used when no manifest is given on the command line
+MAX_PROCESSES = os.cpu_count() or 1    # Process budget (the manifest's "max_processes" overrides it)
+REPORT_DIR = 'batch_reports'           # Aggregate report folder (the manifest's "report_dir" overrides it)
+USE_LOAD_CACHE = True                  # Parse each Excel file once, then load the columnar cache
+
+JOB_DEFAULTS = {
+    'unique_id_column': UNIQUE_ID_COLUMN,
+    'columns_to_compare': COLUMNS_TO_COMPARE,
+    'columns_to_compare_sum': COLUMNS_TO_COMPARE_SUM,
+    'columns_to_compare_categorical': COLUMNS_TO_COMPARE_CATEGORICAL,
+    'address_columns': ADDRESS_COLUMNS,
+    'numeric_tolerance': NUMERIC_TOLERANCE,
+    'skip_zero_values': SKIP_ZERO_VALUES,
+    'duplicate_policy': DUPLICATE_POLICY,
+    'include_nopar': True,
+    'single_workbook': False,
+    'window_id': DEFAULT_WINDOW_ID,
+    'parcel_url_template': None,
+}
+
+REPORT_FIELDS = ['job', 'status', 'error', 'mls_rows', 'cama_rows', 'matched', 'missing_in_cama',
+                 'missing_in_mls', 'value_mismatches', 'perfect_matches', 'mls_load_s', 'cama_load_s', 'wall_s',
+                 'peak_rss_mb', 'reports', 'output_dir']
+
+# ==================================================================================
+# MANIFEST
+# ==================================================================================
+
+def _resolve(path, base_dir):
+    return path if os.path.isabs(path) else os.path.normpath(os.path.join(base_dir, path))
+
+
+def load_manifest(manifest_path):
+    """
+    Read a batch manifest and resolve every job's settings and paths.
+
+    Returns:
+        (jobs, options): jobs is a list of complete job dicts, options holds the
+        batch-level max_processes and report_dir
+    """
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    base_dir = os.path.dirname(os.path.abspath(manifest_path))
+
+    jobs = []
+    for number, entry in enumerate(manifest.get('jobs') or [], start=1):
+        job = dict(JOB_DEFAULTS, **manifest.get('defaults', {}))
+        if entry.get('config'):
+            with open(_resolve(entry['config'], base_dir), 'r', encoding='utf-8') as f:
+                job.update(json.load(f))
+        job.update(entry)
+        job.setdefault('name', f'job{number}')
+
+        missing = [key for key in ('mls', 'cama') if not job.get(key)]
+        if missing:
+            raise ValueError(f"Manifest job '{job['name']}' has no {' or '.join(missing)} file")
+        job['mls'] = _resolve(job['mls'], base_dir)
+        job['cama'] = _resolve(job['cama'], base_dir)
+        job['output_dir'] = _resolve(job.get('output_dir') or job['name'], base_dir)
+        jobs.append(job)
+
+    names = [job['name'] for job in jobs]
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        raise ValueError(f"Manifest job names must be unique: {', '.join(duplicates)}")
+
+    options = {
+        'max_processes': manifest.get('max_processes') or MAX_PROCESSES,
+        'report_dir': _resolve(manifest.get('report_dir') or REPORT_DIR, base_dir),
+    }
+    return jobs, options
+
+
+def job_columns(job):
+    """(columns, dtypes) a job reads from both files."""
+    columns = comparison_columns(job['unique_id_column'], job['columns_to_compare'],
+                                 job['columns_to_compare_sum'], job['columns_to_compare_categorical'],
+                                 job['address_columns'])
+    dtypes = comparison_dtypes(job['columns_to_compare_categorical'], job['address_columns'])
+    return columns, dtypes
+
+
+def _source_key(job, kind):
+    """Jobs with the same key share one loaded 'mls' or 'cama' dataset (same file, same read dtypes)."""
+    _, dtypes = job_columns(job)
+    return kind, os.path.abspath(job[kind]), tuple(sorted((col, t.__name__) for col, t in dtypes.items()))
+
+# ==================================================================================
+# WORKERS
+# ==================================================================================
+
+def _load_shared(kind, path, columns, dtypes, base_path):
+    """Worker: load an MLS or CAMA file once (union of every job's columns) into a shared IPC file."""
+    start = time.perf_counter()
+    read = read_mls_data if kind == 'mls' else read_cama_data
+    df = read(path, columns=columns, dtype=dtypes, use_cache=USE_LOAD_CACHE)
+    if df is None:
+        raise ValueError(f"Could not load {kind.upper()} data from {path}")
+    write_frame_ipc(df, base_path)
+    return len(df), round(time.perf_counter() - start, 3)
+
+
+def _load_job_source(job, kind, columns, dtypes):
+    """A job's MLS or CAMA frame: from the shared IPC file when there is one, else from the file."""
+    if job.get(f'{kind}_ipc'):
+        wanted = set(columns)
+        df = read_frame_ipc(job[f'{kind}_ipc'])
+        print(f"Successfully loaded {kind.upper()} data from: {job[kind]} (shared)")
+        return df[[c for c in df.columns if c in wanted]]
+    read = read_mls_data if kind == 'mls' else read_cama_data
+    return read(job[kind], columns=columns, dtype=dtypes, use_cache=USE_LOAD_CACHE)
+
+
+def _job_result(job, status, error=None, **values):
+    result = {field: None for field in REPORT_FIELDS}
+    result.update(job=job['name'], status=status, error=error, output_dir=job['output_dir'], **values)
+    return result
+
+
+def _compare_job(job):
+    """Load, compare and report one job (console output goes to the log, not the terminal)."""
+    columns, dtypes = job_columns(job)
+    mls_id_col = job['unique_id_column']['mls_col']
+    cama_id_col = job['unique_id_column']['cama_col']
+
+    with profile_stage('load MLS') as stage:
+        mls_data = _load_job_source(job, 'mls', columns, dtypes)
+        stage['rows'] = None if mls_data is None else len(mls_data)
+    with profile_stage('load CAMA') as stage:
+        cama_data = _load_job_source(job, 'cama', columns, dtypes)
+        stage['rows'] = None if cama_data is None else len(cama_data)
+
+    if mls_data is None or cama_data is None:
+        raise ValueError("Data loading failed, see job.log")
+    if mls_id_col not in mls_data.columns:
+        raise ValueError(f"Unique ID column '{mls_id_col}' not found in MLS data")
+    if cama_id_col not in cama_data.columns:
+        raise ValueError(f"Unique ID column '{cama_id_col}' not found in CAMA data")
+
+    with profile_stage('duplicate check'):
+        find_duplicate_ids(mls_data, mls_id_col, "MLS")
+        find_duplicate_ids(cama_data, cama_id_col, "CAMA")
+
+    with profile_stage('compare') as stage:
+        df_missing_cama, df_missing_mls, df_value_mismatches, matched_records, df_perfect_matches = \
+            compare_data_enhanced(mls_data, cama_data, job['unique_id_column'], job['columns_to_compare'],
+                                  cols_to_compare_sum=job['columns_to_compare_sum'],
+                                  cols_to_compare_categorical=job['columns_to_compare_categorical'],
+                                  tolerance=job['numeric_tolerance'], skip_zeros=job['skip_zero_values'],
+                                  address_columns=job['address_columns'], include_nopar=job['include_nopar'],
+                                  duplicate_policy=job['duplicate_policy'])
+        stage.update(rows=len(matched_records), mismatches=len(df_value_mismatches))
+
+    parcel_url_template = job['parcel_url_template'] or build_parcel_url_template(job['window_id'])
+    with profile_stage('report'):
+        reports = report_discrepancies_enhanced(df_missing_cama, df_missing_mls, df_value_mismatches,
+                                                df_perfect_matches,
+                                                output_prefix=os.path.join(job['output_dir'], 'discrepancies'),
+                                                parcel_url_template=parcel_url_template,
+                                                single_workbook=job['single_workbook'])
+
+    return {'mls_rows': len(mls_data), 'cama_rows': len(cama_data), 'matched': len(matched_records),
+            'missing_in_cama': len(df_missing_cama), 'missing_in_mls': len(df_missing_mls),
+            'value_mismatches': len(df_value_mismatches), 'perfect_matches': len(df_perfect_matches),
+            'reports': len(reports)}
+
+
+def run_job(job):
+    """
+    Worker: run one job into its output folder (reports, job.log, profile.json).
+    Never raises; failures come back as status 'failed' with the error message.
+    """
+    os.makedirs(job['output_dir'], exist_ok=True)
+    start = time.perf_counter()
+    start_profile()
+    with open(os.path.join(job['output_dir'], 'job.log'), 'w', encoding='utf-8') as log, \
+            contextlib.redirect_stdout(log):
+        print(f"Job {job['name']} started {datetime.now():%Y-%m-%d %H:%M:%S}")
+        try:
+            values = _compare_job(job)
+            status, error = 'ok', None
+        except Exception as e:
+            traceback.print_exc(file=log)
+            values, status, error = {}, 'failed', f"{type(e).__name__}: {e}"
+        print(f"Job {job['name']} {status} in {time.perf_counter() - start:.1f}s")
+
+    profile = stop_profile()
+    if profile:
+        write_profile(os.path.join(job['output_dir'], 'profile.json'), profile)
+    # On Linux stage peaks leave out earlier jobs this worker process ran
+    peaks = [record['peak_rss_mb'] for record in profile if record.get('peak_rss_mb') is not None]
+    return _job_result(job, status, error, wall_s=round(time.perf_counter() - start, 3),
+                       peak_rss_mb=max(peaks, default=None), **values)
+
+# ==================================================================================
+# BATCH
+# ==================================================================================
+
+def run_batch(jobs, max_processes=MAX_PROCESSES):
+    """
+    Run jobs concurrently in up to `max_processes` worker processes.
+
+    Each distinct MLS and CAMA file is loaded once by a worker and shared with its
+    jobs through an Arrow IPC file (without pyarrow every job loads its own copy).
+    A job is submitted as soon as both of its files are ready.
+
+    Returns:
+        List of per-job result dicts (REPORT_FIELDS), in manifest order
+    """
+    results = {}
+    with tempfile.TemporaryDirectory(prefix='mls_cama_batch_', ignore_cleanup_errors=True) as shared_dir, \
+            ProcessPoolExecutor(max_workers=max(1, max_processes)) as pool:
+        pending = {}
+        if pa is None:
+            for job in jobs:
+                pending[pool.submit(run_job, job)] = ('job', job)
+        else:
+            groups = {}
+            for job in jobs:
+                for kind in ('mls', 'cama'):
+                    groups.setdefault(_source_key(job, kind), []).append(job)
+            # Jobs still waiting for a shared file: name -> [job with *_ipc/*_load_s filled in, files left]
+            waiting = {job['name']: [dict(job), 2] for job in jobs}
+            for group_no, (key, group) in enumerate(groups.items()):
+                kind, path, _ = key
+                columns = list(dict.fromkeys(col for job in group for col in job_columns(job)[0]))
+                base_path = os.path.join(shared_dir, f'{kind}{group_no}')
+                future = pool.submit(_load_shared, kind, path, columns, job_columns(group[0])[1], base_path)
+                pending[future] = ('load', (kind, group, base_path))
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                kind, item = pending.pop(future)
+                if kind == 'job':
+                    try:
+                        result = future.result()
+                    except Exception as e:  # worker process died (e.g. out of memory)
+                        result = _job_result(item, 'failed', f"{type(e).__name__}: {e}")
+                    result['mls_load_s'] = item.get('mls_load_s')
+                    result['cama_load_s'] = item.get('cama_load_s')
+                    results[item['name']] = result
+                    print(f"  {'✓' if result['status'] == 'ok' else '✗'} {item['name']}")
+                    continue
+
+                source, group, base_path = item
+                try:
+                    rows, load_s = future.result()
+                except Exception as e:
+                    print(f"  ✗ {source.upper()} load failed: {group[0][source]} ({e})")
+                    for job in group:
+                        if job['name'] not in results:
+                            results[job['name']] = _job_result(job, 'failed', f"{source.upper()} load failed: {e}")
+                        waiting.pop(job['name'], None)
+                    continue
+                print(f"  ✓ {source.upper()} loaded once for {len(group)} job(s): {group[0][source]} "
+                      f"({rows:,} rows, {load_s:.1f}s)")
+                for job in group:
+                    entry = waiting.get(job['name'])
+                    if entry is None:  # its other file failed to load
+                        continue
+                    entry[0].update({f'{source}_ipc': base_path, f'{source}_load_s': load_s})
+                    entry[1] -= 1
+                    if entry[1] == 0:
+                        ready = waiting.pop(job['name'])[0]
+                        pending[pool.submit(run_job, ready)] = ('job', ready)
+
+    return [results[job['name']] for job in jobs]
+
+
+def write_batch_report(results, report_dir, total_s=None):
+    """Write batch_report.json (with batch totals) and batch_report.csv; returns their paths."""
+    os.makedirs(report_dir, exist_ok=True)
+    json_path = os.path.join(report_dir, 'batch_report.json')
+    csv_path = os.path.join(report_dir, 'batch_report.csv')
+
+    # Profiled jobs reset their worker's peak at every stage, so RUSAGE_CHILDREN alone can miss it
+    peaks = [r['peak_rss_mb'] for r in results if r.get('peak_rss_mb') is not None] + [child_peak_rss_mb()]
+    summary = {
+        'finished': datetime.now().isoformat(timespec='seconds'),
+        'jobs': len(results),
+        'ok': sum(1 for r in results if r['status'] == 'ok'),
+        'failed': sum(1 for r in results if r['status'] != 'ok'),
+        'wall_s': total_s,
+        'worker_peak_rss_mb': max((peak for peak in peaks if peak is not None), default=None),
+    }
+    with open(json_path, 'w', encoding='utf-8') as f:
+        json.dump({'summary': summary, 'jobs': results}, f, indent=2)
+    with open(csv_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=REPORT_FIELDS)
+        writer.writeheader()
+        writer.writerows(results)
+    return json_path, csv_path
+
+
+def print_batch_report(results):
+    """Print one status line per job."""
+    print(f"\n{'Job':<24} {'Status':<8} {'Matched':>9} {'Mismatches':>11} {'Wall (s)':>9}")
+    print("-" * 65)
+    for r in results:
+        matched = '-' if r['matched'] is None else f"{r['matched']:,}"
+        mismatches = '-' if r['value_mismatches'] is None else f"{r['value_mismatches']:,}"
+        wall = '-' if r['wall_s'] is None else f"{r['wall_s']:.1f}"
+        print(f"{r['job'][:24]:<24} {r['status']:<8} {matched:>9} {mismatches:>11} {wall:>9}")
+        if r['error']:
+            print(f"    {r['error']}")
+
+
+def main(manifest_path=None):
+    """Run every job in the manifest and write the aggregate report."""
+    manifest_path = manifest_path or MANIFEST_PATH
+    jobs, options = load_manifest(manifest_path)
+
+    print("=" * 80)
+    print(f"MLS vs. CAMA Batch: {len(jobs)} job(s), up to {options['max_processes']} processes")
+    print("=" * 80)
+
+    start = time.perf_counter()
+    results = run_batch(jobs, max_processes=options['max_processes'])
+    total_s = round(time.perf_counter() - start, 3)
+
+    print_batch_report(results)
+    json_path, csv_path = write_batch_report(results, options['report_dir'], total_s)
+    failed = sum(1 for r in results if r['status'] != 'ok')
+    print(f"\n✓ Batch finished in {total_s:.1f}s ({len(results) - failed} ok, {failed} failed)")
+    print(f"✓ Batch report saved: {json_path}, {csv_path}")
+    return results
+
+
+if __name__ == "__main__":
+    results = main(sys.argv[1] if len(sys.argv) > 1 else None)
+    sys.exit(1 if any(r['status'] != 'ok' for r in results) else 0)
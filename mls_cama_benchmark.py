@@ -0,0 +1,301 @@
+"""
+MLS vs CAMA Benchmark
+Times each pipeline stage (load, duplicate check, merge, compare, report) on
+synthetic MLS/CAMA extracts that use the real column names, and records the
+timings in a JSON baseline that later runs are diffed against.
+
+Run:  python mls_cama_benchmark.py
+"""
+
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from mls_cama_cache import load_excel_cached, read_excel_projected
+from mls_cama_core import (
+    ADDRESS_COLUMNS,
+    COLUMNS_TO_COMPARE,
+    COLUMNS_TO_COMPARE_CATEGORICAL,
+    COLUMNS_TO_COMPARE_SUM,
+    UNIQUE_ID_COLUMN,
+    compare_data_enhanced,
+    comparison_columns,
+    comparison_dtypes,
+    find_duplicate_ids,
+    merge_on_parcel_keys,
+    report_discrepancies_enhanced,
+)
+
+# --- Configuration ---
+BENCHMARK_SIZES = [10_000, 100_000, 1_000_000]  # Rows per source (MLS and CAMA)
+BENCHMARK_REPEAT = 1          # Runs per stage; the fastest one is recorded
+INCLUDE_LOAD_STAGE = True     # Write the synthetic data to .xlsx and time reading it back
+ROWWISE_MAX_ROWS = 10_000     # Also time the row-by-row engine up to this size
+BASELINE_PATH = 'benchmark_baseline.json'
+UPDATE_BASELINE = False       # True = overwrite the baseline with this run's timings
+REGRESSION_THRESHOLD = 1.25   # Flag stages at least 25% slower than the baseline
+
+# Synthetic data shape
+OVERLAP_RATIO = 0.85      # Share of MLS parcels that also exist in CAMA
+DUPLICATE_RATE = 0.005    # Share of rows repeated with the same parcel ID
+BLANK_RATE = 0.05         # Share of blank cells per compared column
+ZERO_RATE = 0.03          # Share of 0 cells per compared column
+MISMATCH_RATE = 0.10      # Share of MLS values that disagree with CAMA, per column
+
+# ==================================================================================
+# SYNTHETIC DATA
+# ==================================================================================
+
+def _with_blanks_and_zeros(values, rng, blank_rate, zero_rate):
+    """Return a float copy of `values` with random NaN and 0 cells."""
+    values = values.astype(float)
+    draw = rng.random(len(values))
+    values[draw < zero_rate] = 0
+    values[(draw >= zero_rate) & (draw < zero_rate + blank_rate)] = np.nan
+    return values
+
+
+def _perturb(values, rng, mismatch_rate, low, high):
+    """Copy of `values` where `mismatch_rate` of the cells get a different random value."""
+    values = values.copy()
+    changed = rng.random(len(values)) < mismatch_rate
+    values[changed] = rng.integers(low, high, changed.sum())
+    return values
+
+
+def generate_synthetic_data(n_mls, n_cama=None, overlap_ratio=OVERLAP_RATIO,
+                            duplicate_rate=DUPLICATE_RATE, blank_rate=BLANK_RATE,
+                            zero_rate=ZERO_RATE, mismatch_rate=MISMATCH_RATE, seed=0):
+    """
+    Build an MLS and a CAMA frame with the real column layout.
+
+    CAMA values are drawn first; matching MLS rows copy them and then disagree on
+    `mismatch_rate` of the cells per compared column. Blanks and zeros are sprinkled
+    into both sides, and `duplicate_rate` of the rows in each frame are repeated.
+
+    Returns:
+        (df_mls, df_cama)
+    """
+    n_cama = n_mls if n_cama is None else n_cama
+    rng = np.random.default_rng(seed)
+
+    # Parcel IDs: `overlap_ratio` of the MLS parcels also exist in CAMA
+    n_shared = min(int(n_mls * overlap_ratio), n_cama)
+    ids = rng.permutation(n_mls + n_cama - n_shared) + 10_000_000
+    cama_ids = ids[:n_cama]
+    mls_ids = np.concatenate([cama_ids[:n_shared], ids[n_cama:]])
+    rng.shuffle(mls_ids)
+
+    cama = pd.DataFrame({'PARID': cama_ids})
+    cama['SALEKEY'] = rng.integers(1, 999_999, n_cama)
+    cama['NOPAR'] = rng.integers(1, 3, n_cama)
+    cama_values = {
+        'SFLA': rng.integers(600, 4_000, n_cama),
+        'RMBED': rng.integers(1, 6, n_cama),
+        'FIXBATH': rng.integers(1, 4, n_cama),
+        'FIXHALF': rng.integers(0, 3, n_cama),
+        'RECROMAREA': rng.integers(0, 800, n_cama),
+        'FINBSMTAREA': rng.integers(0, 800, n_cama),
+        'UFEATAREA': rng.integers(0, 200, n_cama),
+    }
+    for col, values in cama_values.items():
+        cama[col] = _with_blanks_and_zeros(values, rng, blank_rate, zero_rate)
+    cama['HEAT'] = rng.integers(0, 2, n_cama)
+
+    # MLS rows start from the CAMA values of the same parcel (random values for MLS-only parcels)
+    position = pd.Series(np.arange(n_cama), index=cama_ids).reindex(mls_ids).to_numpy()
+    shared = ~np.isnan(position)
+    source = np.where(shared, position, 0).astype(int)
+
+    def from_cama(col, low, high):
+        values = np.where(shared, cama_values[col][source], rng.integers(low, high, n_mls))
+        return _perturb(values, rng, mismatch_rate, low, high)
+
+    below_grade = (cama_values['RECROMAREA'] + cama_values['FINBSMTAREA']
+                   + cama_values['UFEATAREA'])[source]
+    below_grade = np.where(shared, below_grade, rng.integers(0, 1_800, n_mls))
+
+    mls = pd.DataFrame({'Parcel Number': mls_ids})
+    mls['Listing #'] = rng.integers(1_000_000, 9_999_999, n_mls)
+    mls['Closed Date'] = pd.Timestamp('2025-01-01') + pd.to_timedelta(rng.integers(0, 365, n_mls), unit='D')
+    mls['Address'] = [f"{number} {street}" for number, street in zip(
+        rng.integers(1, 9_999, n_mls), rng.choice(['Main St', 'Oak Ave', 'Market Ave N', 'Lincoln Way E'], n_mls))]
+    mls['City'] = rng.choice(['Canton', 'North Canton', 'Massillon', 'Alliance'], n_mls)
+    mls['State or Province'] = 'OH'
+    mls['Postal Code'] = rng.choice(['44702', '44709', '44720', '44646', '44601'], n_mls)
+    mls['Above Grade Finished Area'] = _with_blanks_and_zeros(from_cama('SFLA', 600, 4_000), rng,
+                                                              blank_rate, zero_rate)
+    mls['Bedrooms Total'] = _with_blanks_and_zeros(from_cama('RMBED', 1, 6), rng, blank_rate, zero_rate)
+    mls['Bathrooms Full'] = _with_blanks_and_zeros(from_cama('FIXBATH', 1, 4), rng, blank_rate, zero_rate)
+    mls['Bathrooms Half'] = _with_blanks_and_zeros(from_cama('FIXHALF', 0, 3), rng, blank_rate, zero_rate)
+    mls['Below Grade Finished Area'] = _with_blanks_and_zeros(
+        _perturb(below_grade, rng, mismatch_rate, 0, 1_800), rng, blank_rate, zero_rate)
+
+    # Cooling text agrees with CAMA HEAT except for `mismatch_rate` of the rows
+    heat = np.where(shared, cama['HEAT'].to_numpy()[source], rng.integers(0, 2, n_mls))
+    heat = _perturb(heat, rng, mismatch_rate, 0, 2)
+    mls['Cooling'] = np.where(heat == 1, 'Central Air', rng.choice(['None', 'Window Unit', 'Ceiling Fan(s)'], n_mls))
+    mls.loc[rng.random(n_mls) < blank_rate, 'Cooling'] = None
+
+    def with_duplicates(df):
+        repeats = df.iloc[np.flatnonzero(rng.random(len(df)) < duplicate_rate)]
+        return pd.concat([df, repeats], ignore_index=True)
+
+    return with_duplicates(mls), with_duplicates(cama)
+
+# ==================================================================================
+# BENCHMARK
+# ==================================================================================
+
+def _time_stage(func, repeat=BENCHMARK_REPEAT):
+    """Run `func` `repeat` times with its console output suppressed; return (best seconds, last result)."""
+    best, result = None, None
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            result = func()
+            elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def benchmark_size(n_rows, work_dir, include_load=INCLUDE_LOAD_STAGE, repeat=BENCHMARK_REPEAT):
+    """Time every stage at one size. Returns {stage: seconds}."""
+    timings = {}
+    timings['generate'], (df_mls, df_cama) = _time_stage(lambda: generate_synthetic_data(n_rows), 1)
+
+    columns = comparison_columns(UNIQUE_ID_COLUMN, COLUMNS_TO_COMPARE, COLUMNS_TO_COMPARE_SUM,
+                                 COLUMNS_TO_COMPARE_CATEGORICAL, ADDRESS_COLUMNS)
+    dtypes = comparison_dtypes(COLUMNS_TO_COMPARE_CATEGORICAL, ADDRESS_COLUMNS)
+
+    if include_load:
+        mls_path = os.path.join(work_dir, f'mls_{n_rows}.xlsx')
+        cama_path = os.path.join(work_dir, f'cama_{n_rows}.xlsx')
+        df_mls.to_excel(mls_path, index=False)
+        df_cama.to_excel(cama_path, index=False)
+        cache_dir = os.path.join(work_dir, 'cache')
+
+        timings['load_excel'], _ = _time_stage(lambda: (
+            read_excel_projected(mls_path, columns, dtypes),
+            read_excel_projected(cama_path, columns, dtypes)), repeat)
+        # First cached load builds the cache; the timed one reads it back
+        load_excel_cached(mls_path, columns, dtypes, cache_dir=cache_dir)
+        load_excel_cached(cama_path, columns, dtypes, cache_dir=cache_dir)
+        timings['load_cached'], _ = _time_stage(lambda: (
+            load_excel_cached(mls_path, columns, dtypes, cache_dir=cache_dir),
+            load_excel_cached(cama_path, columns, dtypes, cache_dir=cache_dir)), repeat)
+
+    timings['duplicates'], _ = _time_stage(lambda: (
+        find_duplicate_ids(df_mls, UNIQUE_ID_COLUMN['mls_col'], 'MLS'),
+        find_duplicate_ids(df_cama, UNIQUE_ID_COLUMN['cama_col'], 'CAMA')), repeat)
+
+    timings['merge'], _ = _time_stage(lambda: merge_on_parcel_keys(
+        df_mls, df_cama, UNIQUE_ID_COLUMN, how='outer', indicator=True), repeat)
+
+    def compare(vectorized):
+        return compare_data_enhanced(
+            df_mls, df_cama, UNIQUE_ID_COLUMN, COLUMNS_TO_COMPARE,
+            cols_to_compare_sum=COLUMNS_TO_COMPARE_SUM,
+            cols_to_compare_categorical=COLUMNS_TO_COMPARE_CATEGORICAL,
+            address_columns=ADDRESS_COLUMNS, vectorized=vectorized)
+
+    timings['compare'], results = _time_stage(lambda: compare(True), repeat)
+    if n_rows <= ROWWISE_MAX_ROWS:
+        timings['compare_rowwise'], _ = _time_stage(lambda: compare(False), repeat)
+
+    df_missing_cama, df_missing_mls, df_value_mismatches, _, df_perfect_matches = results
+    output_prefix = os.path.join(work_dir, f'report_{n_rows}')
+    timings['report'], _ = _time_stage(lambda: report_discrepancies_enhanced(
+        df_missing_cama, df_missing_mls, df_value_mismatches, df_perfect_matches,
+        output_prefix=output_prefix, parcel_url_template='{parcel_id}'), repeat)
+
+    return timings
+
+
+def run_benchmarks(sizes=None, include_load=INCLUDE_LOAD_STAGE, repeat=BENCHMARK_REPEAT):
+    """
+    Benchmark every size and return a JSON-ready result:
+    {'environment': {...}, 'results': {rows: {stage: seconds}}}
+    """
+    sizes = sizes or BENCHMARK_SIZES
+    results = {}
+    work_dir = tempfile.mkdtemp(prefix='mls_cama_benchmark_')
+    try:
+        for n_rows in sizes:
+            print(f"⏱  Benchmarking {n_rows:,} rows...")
+            results[str(n_rows)] = benchmark_size(n_rows, work_dir, include_load, repeat)
+            for stage, seconds in results[str(n_rows)].items():
+                print(f"   {stage:<16} {seconds:9.3f}s")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    return {
+        'environment': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+            'processor': platform.processor(),
+            'repeat': repeat,
+        },
+        'results': results,
+    }
+
+
+def compare_to_baseline(benchmark, baseline, threshold=REGRESSION_THRESHOLD):
+    """
+    Print current vs baseline timings per size and stage.
+
+    Returns:
+        List of (rows, stage, baseline seconds, current seconds) that regressed past `threshold`
+    """
+    regressions = []
+    print(f"\n{'Rows':>10}  {'Stage':<16} {'Baseline':>10} {'Current':>10} {'Ratio':>7}")
+    for rows, stages in benchmark['results'].items():
+        for stage, seconds in stages.items():
+            before = baseline.get('results', {}).get(rows, {}).get(stage)
+            if before is None:
+                print(f"{int(rows):>10,}  {stage:<16} {'-':>10} {seconds:>9.3f}s {'new':>7}")
+                continue
+            ratio = seconds / before if before else float('inf')
+            flag = ' ⚠' if ratio >= threshold else ''
+            print(f"{int(rows):>10,}  {stage:<16} {before:>9.3f}s {seconds:>9.3f}s {ratio:>6.2f}x{flag}")
+            if ratio >= threshold:
+                regressions.append((rows, stage, before, seconds))
+    return regressions
+
+
+def main(sizes=None, baseline_path=BASELINE_PATH, update_baseline=UPDATE_BASELINE):
+    """Run the benchmarks, diff against the baseline file and optionally replace it."""
+    benchmark = run_benchmarks(sizes)
+
+    if os.path.exists(baseline_path):
+        with open(baseline_path, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare_to_baseline(benchmark, baseline)
+        if regressions:
+            print(f"\n⚠ {len(regressions)} stage(s) at least {REGRESSION_THRESHOLD:.2f}x slower than the baseline")
+        else:
+            print("\n✓ No regressions against the baseline")
+    else:
+        update_baseline = True
+
+    if update_baseline:
+        with open(baseline_path, 'w', encoding='utf-8') as f:
+            json.dump(benchmark, f, indent=2)
+        print(f"✓ Baseline saved: {baseline_path}")
+    return benchmark
+
+
+if __name__ == "__main__":
+    main()
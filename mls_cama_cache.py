@@ -0,0 +1,529 @@
+"""
+MLS/CAMA Load Cache
+Converts each Excel extract once into a columnar Feather (Arrow IPC) file and
+memory-maps it on later runs, reading only the requested columns.
+
+Cache entries are keyed on the source path and validated against its size,
+mtime and content hash, so a changed workbook is re-parsed automatically.
+Only the requested columns are parsed (usecols) and cached; asking for a column
+the cache does not hold yet re-parses the workbook with the combined column set.
+Several processes can build the same entry at once: each writes its own files
+and the manifest naming them is swapped in last.
+Columns Arrow cannot type (mixed numbers and text) are stored as their text
+plus a per-cell type tag and rebuilt exactly on load.
+Requires pyarrow; without it, load_excel_cached() simply reads the workbook.
+
+read_excel_chunks() streams a sheet (or CSV export) in row chunks instead, for
+extracts too large to hold in memory at once.
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import time
+import uuid
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+from pandas.io.parsers import TextParser
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:
+    pa = None
+    feather = None
+
+# pandas >= 2.2 can parse workbooks with the Rust-based calamine engine (much faster than openpyxl)
+try:
+    import python_calamine
+    _PANDAS_VERSION = tuple(int(part) for part in pd.__version__.split('.')[:2])
+    EXCEL_ENGINE = 'calamine' if _PANDAS_VERSION >= (2, 2) else None
+except ImportError:
+    python_calamine = None
+    EXCEL_ENGINE = None
+
+CACHE_VERSION = 2
+ORPHAN_AGE_SECONDS = 3600  # Unreferenced entry files older than this are left over from a race
+CACHE_DIR = os.environ.get(
+    'MLS_CAMA_CACHE_DIR',
+    os.path.join(os.path.expanduser('~'), '.cache', 'mls_cama')
+)
+
+
+def file_content_hash(file_path, chunk_size=1024 * 1024):
+    """SHA-256 of a file's bytes, read in chunks."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _frame_paths(base_path):
+    """File names of one cache entry (table/objects: names used before manifests pointed to the files)."""
+    return {
+        'base': base_path,
+        'manifest': base_path + '.json',
+        'table': base_path + '.feather',
+        'objects': base_path + '.objects.pkl',
+    }
+
+
+def _cache_paths(file_path, sheet_name, cache_dir):
+    """Cache file names for one (source path, sheet) pair."""
+    key = hashlib.sha1(f"{os.path.abspath(file_path)}|{sheet_name}".encode('utf-8')).hexdigest()
+    return _frame_paths(os.path.join(cache_dir, key))
+
+
+def _read_manifest(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _unique_suffix():
+    """Per-write file name part, so concurrent writers never share a file."""
+    return f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+
+def _write_json_atomic(path, data):
+    tmp_path = f"{path}.{_unique_suffix()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+def _source_is_current(file_path, manifest, stat):
+    """
+    Check a manifest against the source file.
+    Size+mtime matching is trusted; otherwise the content hash decides.
+
+    Returns:
+        (is_current, content_hash or None if not computed)
+    """
+    if manifest is None or manifest.get('version') != CACHE_VERSION:
+        return False, None
+    if manifest.get('size') == stat.st_size and manifest.get('mtime_ns') == stat.st_mtime_ns:
+        return True, manifest.get('sha256')
+
+    content_hash = file_content_hash(file_path)
+    return manifest.get('sha256') == content_hash, content_hash
+
+
+# Cell types a mixed column can hold without the pickle sidecar: type -> (tag, to text).
+# The tag is the position in _TAG_DECODERS; keep both tables in the same order.
+_TAG_ENCODERS = {
+    type(None): (0, None),
+    str: (1, str),
+    int: (2, str),
+    float: (3, repr),
+    bool: (4, str),
+    np.int64: (5, lambda v: str(int(v))),
+    np.float64: (6, lambda v: repr(float(v))),
+    np.bool_: (7, str),
+    datetime: (8, datetime.isoformat),
+    date: (9, date.isoformat),
+    pd.Timestamp: (10, pd.Timestamp.isoformat),
+    type(pd.NaT): (11, None),
+    type(pd.NA): (12, None),
+}
+_TAG_DECODERS = (
+    lambda s: None,
+    str,
+    int,
+    float,
+    lambda s: s == 'True',
+    lambda s: np.int64(int(s)),
+    lambda s: np.float64(float(s)),
+    lambda s: np.bool_(s == 'True'),
+    datetime.fromisoformat,
+    date.fromisoformat,
+    pd.Timestamp,
+    lambda s: pd.NaT,
+    lambda s: pd.NA,
+)
+TAG_SUFFIX = '.__type'
+
+
+def _tag_column(values):
+    """
+    (text, tags) arrays for a mixed-type column, or None when a cell has a type
+    _TAG_ENCODERS does not cover.
+    """
+    text = np.empty(len(values), dtype=object)
+    tags = np.empty(len(values), dtype=np.int8)
+    for i, value in enumerate(values):
+        encoder = _TAG_ENCODERS.get(type(value))
+        if encoder is None:
+            return None
+        tags[i], to_text = encoder
+        text[i] = None if to_text is None else to_text(value)
+    return text, tags
+
+
+def _untag_column(text, tags):
+    """Rebuild the original cells (as an object array) from _tag_column's output."""
+    values = np.empty(len(tags), dtype=object)
+    for tag in np.unique(tags):
+        positions = np.flatnonzero(tags == tag)
+        decode = _TAG_DECODERS[tag]
+        values[positions] = [decode(s) for s in text[positions]]
+    return values
+
+
+def _entry_file(paths, manifest, kind):
+    """Path of an entry's 'table' or 'objects' file (the names the manifest points to)."""
+    name = (manifest or {}).get(f'{kind}_file')
+    return os.path.join(os.path.dirname(paths['manifest']), name) if name else paths[kind]
+
+
+def _write_cache(df, paths, manifest):
+    """
+    Store a DataFrame as an uncompressed Feather file (memory-mappable).
+    Columns Arrow cannot type (e.g. mixed numbers and text) are stored as text plus
+    a type tag column so their original Python values round-trip unchanged. Only
+    cells of other types (arbitrary objects) fall back to a pickle sidecar.
+
+    Every write uses new, uniquely named data files and then swaps in the manifest
+    that points to them, so processes building the same entry at once never touch
+    each other's files and a reader always sees one complete entry.
+    """
+    original_columns = list(df.columns)
+    df = df.copy()
+    df.columns = [str(c) for c in original_columns]
+
+    tagged_columns = []
+    object_columns = []
+    for name in list(df.columns):
+        try:
+            pa.Array.from_pandas(df[name])
+        except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+            tagged = _tag_column(df[name].to_numpy(dtype=object))
+            if tagged is None:
+                object_columns.append(name)
+                continue
+            tagged_columns.append(name)
+            df[name] = pd.Series(tagged[0], index=df.index, dtype=object)
+            df[name + TAG_SUFFIX] = tagged[1]
+
+    suffix = _unique_suffix()
+    table_path = f"{paths['base']}.{suffix}.feather"
+    table = pa.Table.from_pandas(df.drop(columns=object_columns), preserve_index=False)
+    feather.write_feather(table, table_path, compression='uncompressed')
+
+    objects_path = None
+    if object_columns:
+        objects_path = f"{paths['base']}.{suffix}.objects.pkl"
+        with open(objects_path, 'wb') as f:
+            pickle.dump(df[object_columns], f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    previous = _read_manifest(paths['manifest'])
+    manifest = dict(manifest, columns=[str(c) for c in original_columns], object_columns=object_columns,
+                    tagged_columns=tagged_columns,
+                    original_columns=original_columns
+                    if any(not isinstance(c, str) for c in original_columns) else None,
+                    table_file=os.path.basename(table_path),
+                    objects_file=objects_path and os.path.basename(objects_path))
+    # Manifest last: a half-written cache is never considered valid
+    _write_json_atomic(paths['manifest'], manifest)
+
+    # Drop the replaced entry's files, or our own if a concurrent writer's manifest won
+    # (a file another process still has mapped stays until clear_cache())
+    current = _read_manifest(paths['manifest'])
+    stale = [previous] if current and current.get('table_file') == manifest['table_file'] else [previous, manifest]
+    stale_paths = {_entry_file(paths, entry, kind) for entry in stale for kind in ('table', 'objects')}
+    # Plus files an earlier race left behind (old enough that no writer is still working on them)
+    directory, prefix = os.path.split(paths['base'])
+    for name in os.listdir(directory or '.'):
+        path = os.path.join(directory, name)
+        if name.startswith(prefix + '.') and not name.endswith('.json'):
+            try:
+                if time.time() - os.path.getmtime(path) > ORPHAN_AGE_SECONDS:
+                    stale_paths.add(path)
+            except OSError:
+                pass
+    keep = {_entry_file(paths, current, kind) for kind in ('table', 'objects')}
+    for old_path in stale_paths - keep:
+        if os.path.exists(old_path):
+            try:
+                os.remove(old_path)
+            except OSError:
+                pass
+
+
+def _read_cache(paths, manifest, columns):
+    """Memory-map the cached table, reading only the requested columns (in source order)."""
+    cached_columns = manifest['columns']
+    object_columns = set(manifest.get('object_columns') or [])
+    tagged_columns = set(manifest.get('tagged_columns') or [])
+    if columns is None:
+        selected = cached_columns
+    else:
+        wanted = {str(c) for c in columns}
+        selected = [c for c in cached_columns if c in wanted]
+
+    table_columns = [c for c in selected if c not in object_columns]
+    table_columns += [c + TAG_SUFFIX for c in selected if c in tagged_columns]
+    table = feather.read_table(_entry_file(paths, manifest, 'table'), columns=table_columns, memory_map=True)
+    df = table.drop([c + TAG_SUFFIX for c in selected if c in tagged_columns]).to_pandas()
+    for name in selected:
+        if name in tagged_columns:
+            df[name] = _untag_column(table.column(name).to_numpy(zero_copy_only=False),
+                                     table.column(name + TAG_SUFFIX).to_numpy())
+
+    sidecar_columns = [c for c in selected if c in object_columns]
+    if sidecar_columns:
+        with open(_entry_file(paths, manifest, 'objects'), 'rb') as f:
+            objects = pickle.load(f)
+        for name in sidecar_columns:
+            df[name] = objects[name].to_numpy()
+        df = df[selected]
+
+    original_columns = manifest.get('original_columns')
+    if original_columns:
+        names = dict(zip(cached_columns, original_columns))
+        df.columns = [names[c] for c in df.columns]
+    return df
+
+
+def _dtype_spec(dtype):
+    """JSON-friendly form of a {column: dtype} mapping (for cache validation)."""
+    if not dtype:
+        return {}
+    return {str(col): getattr(t, '__name__', str(t)) for col, t in dtype.items()}
+
+
+def read_excel_projected(file_path, columns=None, dtype=None, sheet_name=0):
+    """
+    pd.read_excel restricted to `columns` (missing names are ignored), using the
+    calamine engine when python-calamine is installed.
+
+    Returns:
+        (DataFrame, header): the projected frame and every column name in the sheet
+    """
+    header = []
+    if columns is None:
+        usecols = None
+    else:
+        wanted = set(columns)
+
+        def usecols(name):
+            header.append(name)
+            return name in wanted
+
+    df = pd.read_excel(file_path, sheet_name=sheet_name, usecols=usecols, dtype=dtype, engine=EXCEL_ENGINE)
+    return df, (list(dict.fromkeys(header)) if columns is not None else list(df.columns))
+
+
+def _cache_covers(manifest, columns, dtype_spec):
+    """True when the cached column set (and dtypes) can serve this request."""
+    if manifest.get('dtype') != dtype_spec or manifest.get('engine') != EXCEL_ENGINE:
+        return False
+    cached = set(manifest.get('columns') or [])
+    source = [str(c) for c in manifest.get('source_columns') or []]
+    if columns is None:
+        return cached.issuperset(source)
+    wanted = {str(c) for c in columns}
+    return cached.issuperset(wanted.intersection(source))
+
+
+def load_excel_cached(file_path, columns=None, dtype=None, sheet_name=0, cache_dir=None, use_cache=True):
+    """
+    Read an Excel sheet through the columnar cache.
+
+    The first run parses only `columns` from the workbook (usecols) and caches them;
+    later runs memory-map the cache. Missing names are ignored. The cache is rebuilt
+    automatically when the source file changes or when a column that exists in the
+    sheet is requested but not cached yet.
+
+    Args:
+        file_path: Path to the .xlsx/.xls file
+        columns: Optional list of column names to return (None = all)
+        dtype: Optional {column: dtype} passed to pd.read_excel
+        sheet_name: Sheet to read (as in pd.read_excel)
+        cache_dir: Cache directory (default CACHE_DIR / $MLS_CAMA_CACHE_DIR)
+        use_cache: Set to False to always parse the workbook
+
+    Returns:
+        (DataFrame, cache_hit)
+    """
+    if not use_cache or pa is None:
+        df, _ = read_excel_projected(file_path, columns, dtype, sheet_name)
+        return df, False
+
+    cache_dir = cache_dir or CACHE_DIR
+    os.makedirs(cache_dir, exist_ok=True)
+    paths = _cache_paths(file_path, sheet_name, cache_dir)
+    dtype_spec = _dtype_spec(dtype)
+
+    stat = os.stat(file_path)
+    manifest = _read_manifest(paths['manifest'])
+    is_current, content_hash = _source_is_current(file_path, manifest, stat)
+
+    if is_current and os.path.exists(_entry_file(paths, manifest, 'table')):
+        if manifest.get('size') != stat.st_size or manifest.get('mtime_ns') != stat.st_mtime_ns:
+            # Touched but unchanged: refresh stat info so the next run skips hashing
+            manifest.update(size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+            _write_json_atomic(paths['manifest'], manifest)
+        if _cache_covers(manifest, columns, dtype_spec):
+            try:
+                return _read_cache(paths, manifest, columns), True
+            except (OSError, EOFError, pickle.UnpicklingError, pa.ArrowException):
+                pass  # Replaced by another process while we read it: parse the workbook instead
+
+    # Widen an existing projection instead of replacing it
+    read_columns = columns
+    if (columns is not None and is_current and manifest.get('dtype') == dtype_spec
+            and manifest.get('engine') == EXCEL_ENGINE):
+        read_columns = list(dict.fromkeys(list(manifest.get('columns') or []) + list(columns)))
+
+    df, header = read_excel_projected(file_path, read_columns, dtype, sheet_name)
+    try:
+        _write_cache(df, paths, {
+            'version': CACHE_VERSION,
+            'source': os.path.abspath(file_path),
+            'sheet_name': sheet_name,
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'sha256': content_hash or file_content_hash(file_path),
+            'source_columns': [str(c) for c in header],
+            'dtype': dtype_spec,
+            'engine': EXCEL_ENGINE,
+        })
+    except Exception as e:
+        # The data is already loaded; a cache that cannot be written only costs the next run
+        print(f"⚠ Could not write the load cache for {file_path}: {e}")
+
+    if columns is not None and read_columns is not columns:
+        wanted = set(columns)
+        df = df[[c for c in df.columns if c in wanted]]
+    return df, False
+
+
+def write_frame_ipc(df, base_path):
+    """
+    Write a DataFrame as an uncompressed Arrow IPC (Feather) file that another
+    process can memory-map with read_frame_ipc(), e.g. to hand column data to a
+    worker process without pickling the frame. Mixed-type columns are stored as
+    text plus a type tag, as in the load cache; only a column holding cells of
+    other types (arbitrary Python objects) is pickled to a sidecar file.
+    Requires pyarrow.
+    """
+    _write_cache(df, _frame_paths(base_path), {})
+
+
+def read_frame_ipc(base_path):
+    """Memory-map a frame written by write_frame_ipc()."""
+    paths = _frame_paths(base_path)
+    return _read_cache(paths, _read_manifest(paths['manifest']), None)
+
+
+def _excel_cell(value):
+    """Cell conversion pandas' Excel readers apply (blank -> '', whole floats -> int)."""
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, date) and not isinstance(value, datetime):
+        return datetime(value.year, value.month, value.day)
+    return value
+
+
+def _iter_sheet_rows(file_path, sheet_name=0):
+    """
+    Yield raw sheet rows one at a time without loading the whole sheet:
+    openpyxl read-only mode for .xlsx/.xlsm, python-calamine for other formats.
+    """
+    if os.path.splitext(file_path)[1].lower() in ('.xlsx', '.xlsm'):
+        import openpyxl
+        wb = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+        try:
+            ws = wb.worksheets[sheet_name] if isinstance(sheet_name, int) else wb[sheet_name]
+            ws.reset_dimensions()
+            for row in ws.iter_rows(values_only=True):
+                yield row
+        finally:
+            wb.close()
+    else:
+        wb = python_calamine.CalamineWorkbook.from_path(file_path)
+        sheet = (wb.get_sheet_by_index(sheet_name) if isinstance(sheet_name, int)
+                 else wb.get_sheet_by_name(sheet_name))
+        yield from sheet.iter_rows()
+
+
+def _parse_rows(header, rows, usecols, dtype):
+    """Type a block of raw rows exactly as pd.read_excel would."""
+    return TextParser([header] + rows, header=0, usecols=usecols, dtype=dtype,
+                      skip_blank_lines=False).read()
+
+
+def read_excel_chunks(file_path, columns=None, dtype=None, chunk_size=50000, sheet_name=0):
+    """
+    Read a sheet in chunks of `chunk_size` rows, restricted to `columns`.
+
+    Only one chunk of rows is held in memory at a time. Rows are typed by the
+    same parser pd.read_excel uses, so each chunk matches the corresponding
+    slice of a full read. CSV exports are read with pd.read_csv(chunksize=...).
+    Old .xls files can only be streamed with python-calamine installed; without
+    it the sheet is read whole and then sliced.
+
+    Yields:
+        DataFrame chunks (the first one may be empty if the sheet has no data rows)
+    """
+    usecols = None if columns is None else set(columns).__contains__
+    extension = os.path.splitext(file_path)[1].lower()
+
+    if extension in ('.csv', '.txt'):
+        yield from pd.read_csv(file_path, usecols=usecols, dtype=dtype, chunksize=chunk_size)
+        return
+    if extension not in ('.xlsx', '.xlsm') and python_calamine is None:
+        df, _ = read_excel_projected(file_path, columns, dtype, sheet_name)
+        for start in range(0, max(len(df), 1), chunk_size):
+            yield df.iloc[start:start + chunk_size]
+        return
+
+    rows_iter = _iter_sheet_rows(file_path, sheet_name)
+    header = next(rows_iter, None)
+    if header is None:
+        return
+    header = [_excel_cell(v) for v in header]
+    while header and header[-1] == '':
+        header.pop()
+    width = len(header)
+
+    rows, blank_run, emitted = [], [], False
+    for raw in rows_iter:
+        row = [_excel_cell(v) for v in raw[:width]]
+        row += [''] * (width - len(row))
+        if all(v == '' for v in row):
+            # pandas drops trailing blank rows, so hold blanks until data follows
+            blank_run.append(row)
+            continue
+        if blank_run:
+            rows.extend(blank_run)
+            blank_run = []
+        rows.append(row)
+        if len(rows) >= chunk_size:
+            yield _parse_rows(header, rows[:chunk_size], usecols, dtype)
+            rows = rows[chunk_size:]
+            emitted = True
+
+    if rows or not emitted:
+        yield _parse_rows(header, rows, usecols, dtype)
+
+
+def clear_cache(cache_dir=None):
+    """Delete every cached workbook. Returns the number of files removed."""
+    cache_dir = cache_dir or CACHE_DIR
+    removed = 0
+    if os.path.isdir(cache_dir):
+        for name in os.listdir(cache_dir):
+            if name.endswith(('.json', '.feather', '.pkl', '.tmp')):
+                os.remove(os.path.join(cache_dir, name))
+                removed += 1
+    return removed
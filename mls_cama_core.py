@@ -0,0 +1,2036 @@
+"""
+MLS vs CAMA Comparison Core
+Shared comparison engine and report writer used by the CLI scripts and the Streamlit app.
+Importing this module has no side effects (no prompts, no installs, no I/O).
+"""
+
+import hashlib
+import itertools
+import os
+import pickle
+import re
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+
+from mls_cama_cache import load_excel_cached, pa, read_excel_chunks, read_frame_ipc, write_frame_ipc
+from mls_cama_profile import (merge_worker_records, profile_active, profile_stage, record_stage, stage_timer,
+                              start_profile, stop_profile)
+
+# --- Default Configuration ---
+
+UNIQUE_ID_COLUMN = {'mls_col': 'Parcel Number', 'cama_col': 'PARID'}
+
+COLUMNS_TO_COMPARE = [
+    {'mls_col': 'Above Grade Finished Area', 'cama_col': 'SFLA'},
+    {'mls_col': 'Bedrooms Total', 'cama_col': 'RMBED'},
+    {'mls_col': 'Bathrooms Full', 'cama_col': 'FIXBATH'},
+    {'mls_col': 'Bathrooms Half', 'cama_col': 'FIXHALF'},
+]
+
+# MLS "Below Grade Finished Area" should equal sum of CAMA (RECROMAREA + FINBSMTAREA + UFEATAREA)
+COLUMNS_TO_COMPARE_SUM = [
+    {'mls_col': 'Below Grade Finished Area', 'cama_cols': ['RECROMAREA', 'FINBSMTAREA', 'UFEATAREA']}
+]
+
+# If MLS "Cooling" contains "Central Air", CAMA "HEAT" should be 1; otherwise 0
+COLUMNS_TO_COMPARE_CATEGORICAL = [
+    {
+        'mls_col': 'Cooling',
+        'cama_col': 'HEAT',
+        'mls_check_contains': 'Central Air',
+        'cama_expected_if_true': 1,
+        'cama_expected_if_false': 0,
+        'case_sensitive': False
+    }
+]
+
+NUMERIC_TOLERANCE = 0.01  # Absolute tolerance for numeric comparisons
+SKIP_ZERO_VALUES = True   # Treat 0 as "no data" on either side
+CAMA_CHUNK_SIZE = 50000   # Rows per chunk when streaming CAMA data
+
+# How parcels listed more than once are handled before the join (see resolve_duplicates)
+DUPLICATE_POLICIES = ('keep_all', 'latest', 'salekey', 'cap')
+DUPLICATE_POLICY = 'keep_all'
+DUPLICATE_FANOUT_CAP = 3  # Rows kept per parcel and source with the 'cap' policy
+DUPLICATE_ORDER_COLUMNS = {'mls': 'Closed Date', 'cama': 'SALEKEY'}  # Defines "latest"
+
+# MLS column names for address components
+ADDRESS_COLUMNS = {
+    'address': 'Address',
+    'city': 'City',
+    'state': 'State or Province',
+    'zip': 'Postal Code'
+}
+
+DEFAULT_WINDOW_ID = "638981240146803746"
+PARCEL_URL_TEMPLATE = "https://iasworld.starkcountyohio.gov/iasworld/Maintain/Transact.aspx?txtMaskedPin={parcel_id}&selYear=&userYear=&selJur=&chkShowHistory=False&chkShowChanges=&chkShowDeactivated=&PinValue={parcel_id}&pin=&trans_key=&windowId={window_id}&submitFlag=true&TransPopUp=&ACflag=False&ACflag2=False"
+
+# Zillow URL - will use search format since we don't have zpid
+ZILLOW_URL_BASE = "https://www.zillow.com/homes/"
+
+# Record layouts produced by the comparison (same key order as the original row loop)
+BASE_RECORD_COLUMNS = ['Parcel_ID', 'NOPAR', 'Listing_Number', 'SALEKEY',
+                       'Address', 'City', 'State', 'Zip']
+NUMERIC_RECORD_COLUMNS = ['Field_MLS', 'Field_CAMA', 'MLS_Value', 'CAMA_Value', 'Difference']
+CATEGORICAL_RECORD_COLUMNS = ['Field_MLS', 'Field_CAMA', 'MLS_Value', 'CAMA_Value',
+                              'Expected_CAMA_Value', 'Match_Rule']
+# Record columns taken from each side of the outer merge (NaN-padded where the other side has no row)
+MLS_RECORD_COLUMNS = ['Listing_Number', 'Closed_Date', 'Address', 'City', 'State', 'Zip', 'MLS_Value']
+CAMA_RECORD_COLUMNS = ['NOPAR', 'SALEKEY', 'CAMA_Value']
+
+
+def build_parcel_url_template(window_id=DEFAULT_WINDOW_ID):
+    """Return the CAMA parcel URL template (with a {parcel_id} placeholder) for a windowId."""
+    return PARCEL_URL_TEMPLATE.replace('{window_id}', str(window_id))
+
+# --- Value Helpers ---
+
+def format_zillow_url(address, city, state, zip_code):
+    """
+    Create a Zillow search URL from address components.
+    Example: https://www.zillow.com/homes/1610-20th-St-NW-Canton-OH-44709_rb/
+    """
+    if pd.isna(address) or pd.isna(city) or pd.isna(zip_code):
+        return None
+
+    address_clean = str(address).strip()
+    city_clean = str(city).strip()
+    zip_clean = str(zip_code).strip().split('-')[0]  # Remove ZIP+4 if present
+
+    # Remove apartment/unit numbers (e.g., "Apt 2", "Unit B", "#3")
+    address_clean = re.sub(r'\s+(Apt|Unit|#|Suite)\s*[\w-]*$', '', address_clean, flags=re.IGNORECASE)
+
+    # Replace spaces with hyphens and remove special characters except hyphens
+    address_formatted = re.sub(r'[^\w\s-]', '', address_clean)
+    address_formatted = re.sub(r'\s+', '-', address_formatted)
+
+    city_formatted = re.sub(r'[^\w\s-]', '', city_clean)
+    city_formatted = re.sub(r'\s+', '-', city_formatted)
+
+    # Construct the Zillow search URL - format: address-city-OH-zip_rb/
+    url_slug = f"{address_formatted}-{city_formatted}-OH-{zip_clean}_rb"
+
+    return f"{ZILLOW_URL_BASE}{url_slug}/"
+
+
+def values_equal(val1, val2, tolerance=NUMERIC_TOLERANCE):
+    """Check if two values are equal within tolerance (numeric first, then case-insensitive text)."""
+    try:
+        num1 = pd.to_numeric(val1, errors='raise')
+        num2 = pd.to_numeric(val2, errors='raise')
+
+        if pd.isna(num1) and pd.isna(num2):
+            return True
+        elif pd.isna(num1) != pd.isna(num2):
+            return False
+        else:
+            return np.isclose(num1, num2, equal_nan=False, rtol=1e-9, atol=tolerance)
+    except (ValueError, TypeError):
+        str1 = str(val1).strip().lower() if pd.notna(val1) else ''
+        str2 = str(val2).strip().lower() if pd.notna(val2) else ''
+        return str1 == str2
+
+
+def expected_categorical_value(mls_val, mapping):
+    """Return the CAMA value a categorical mapping expects for this MLS value."""
+    check_text = mapping.get('mls_check_contains', '')
+    case_sensitive = mapping.get('case_sensitive', False)
+
+    # Convert MLS value to string for text searching
+    mls_str = str(mls_val).strip() if pd.notna(mls_val) else ''
+    if not case_sensitive:
+        mls_str = mls_str.lower()
+        check_text = check_text.lower()
+
+    if check_text in mls_str:
+        return mapping.get('cama_expected_if_true')
+    return mapping.get('cama_expected_if_false')
+
+
+def categorical_match(mls_val, cama_val, mapping, tolerance=NUMERIC_TOLERANCE):
+    """
+    Check if a categorical MLS field matches expected CAMA value based on text content.
+
+    Args:
+        mls_val: MLS field value to check for text
+        cama_val: CAMA field value to validate
+        mapping: Dict with comparison rules
+        tolerance: Absolute tolerance for the numeric comparison
+
+    Returns:
+        True if values match expected mapping, False otherwise
+    """
+    expected_cama = expected_categorical_value(mls_val, mapping)
+
+    try:
+        cama_numeric = pd.to_numeric(cama_val, errors='coerce')
+        expected_numeric = pd.to_numeric(expected_cama, errors='coerce')
+
+        if pd.isna(cama_numeric) and pd.isna(expected_numeric):
+            return True
+        elif pd.isna(cama_numeric) or pd.isna(expected_numeric):
+            return False
+        else:
+            return np.isclose(cama_numeric, expected_numeric, equal_nan=False, rtol=1e-9, atol=tolerance)
+    except:
+        return str(cama_val).strip().lower() == str(expected_cama).strip().lower()
+
+
+def calculate_difference(val1, val2):
+    """Calculate the difference between two values (numeric or text)."""
+    try:
+        num1 = pd.to_numeric(val1, errors='raise')
+        num2 = pd.to_numeric(val2, errors='raise')
+
+        if pd.isna(num1) or pd.isna(num2):
+            return "N/A"
+
+        diff = num1 - num2
+        return f"{diff:,.2f}"
+    except (ValueError, TypeError):
+        return "Text difference"
+
+
+def _is_blank(value):
+    """Blank = null/NaN or a whitespace-only string."""
+    return pd.isna(value) or (isinstance(value, str) and value.strip() == '')
+
+
+def _display(df):
+    """Show a DataFrame with IPython's display() when available (Colab/Jupyter)."""
+    try:
+        from IPython.display import display
+        display(df)
+    except ImportError:
+        print(df.to_string())
+
+# --- Data Loading Functions ---
+
+# Columns copied into the reports without being compared
+PASSTHROUGH_COLUMNS = ['Listing #', 'Closed Date', 'SALEKEY', 'NOPAR']
+
+
+def comparison_columns(unique_id_col=None, cols_to_compare_mapping=None, cols_to_compare_sum=None,
+                       cols_to_compare_categorical=None, address_columns=None):
+    """
+    List every column the comparison and reports read, in configuration order.
+    The same list is used for both sources so column collisions (and merge
+    suffixes) behave exactly as when loading full workbooks.
+    """
+    unique_id_col = unique_id_col or UNIQUE_ID_COLUMN
+    if cols_to_compare_mapping is None:
+        cols_to_compare_mapping = COLUMNS_TO_COMPARE
+    address_columns = address_columns or ADDRESS_COLUMNS
+
+    columns = [unique_id_col['mls_col'], unique_id_col['cama_col']]
+    for mapping in cols_to_compare_mapping:
+        columns += [mapping['mls_col'], mapping['cama_col']]
+    for mapping in cols_to_compare_sum or []:
+        columns += [mapping['mls_col']] + list(mapping['cama_cols'])
+    for mapping in cols_to_compare_categorical or []:
+        columns += [mapping['mls_col'], mapping['cama_col']]
+    columns += list(address_columns.values()) + PASSTHROUGH_COLUMNS
+
+    return list(dict.fromkeys(columns))
+
+
+def comparison_dtypes(cols_to_compare_categorical=None, address_columns=None):
+    """
+    Explicit read dtypes for columns that are always text.
+    Compared numeric columns are left to inference because exports mix numbers and text.
+    """
+    address_columns = address_columns or ADDRESS_COLUMNS
+    text_columns = list(address_columns.values())
+    text_columns += [mapping['mls_col'] for mapping in cols_to_compare_categorical or []]
+    return {col: str for col in text_columns}
+
+
+def find_missing_columns(df_mls, df_cama, unique_id_col=None, cols_to_compare_mapping=None,
+                         cols_to_compare_sum=None, cols_to_compare_categorical=None,
+                         address_columns=None):
+    """
+    Check the configured columns against the loaded data.
+
+    Returns:
+        Dict with 'MLS' and 'CAMA' lists of required columns that are missing, and
+        'Optional' for passthrough columns found in neither source
+    """
+    unique_id_col = unique_id_col or UNIQUE_ID_COLUMN
+    if cols_to_compare_mapping is None:
+        cols_to_compare_mapping = COLUMNS_TO_COMPARE
+    address_columns = address_columns or ADDRESS_COLUMNS
+
+    mls_required = [unique_id_col['mls_col']]
+    cama_required = [unique_id_col['cama_col']]
+    for mapping in cols_to_compare_mapping:
+        mls_required.append(mapping['mls_col'])
+        cama_required.append(mapping['cama_col'])
+    for mapping in cols_to_compare_sum or []:
+        mls_required.append(mapping['mls_col'])
+        cama_required.extend(mapping['cama_cols'])
+    for mapping in cols_to_compare_categorical or []:
+        mls_required.append(mapping['mls_col'])
+        cama_required.append(mapping['cama_col'])
+    mls_required.extend(address_columns.values())
+
+    available = set(df_mls.columns) | set(df_cama.columns)
+    return {
+        'MLS': [c for c in dict.fromkeys(mls_required) if c not in df_mls.columns],
+        'CAMA': [c for c in dict.fromkeys(cama_required) if c not in df_cama.columns],
+        'Optional': [c for c in PASSTHROUGH_COLUMNS if c not in available],
+    }
+
+
+def report_missing_columns(missing):
+    """Print the result of find_missing_columns() once, before comparing."""
+    if not any(missing.values()):
+        print("✓ All configured columns found in MLS and CAMA data")
+        return
+
+    for source in ['MLS', 'CAMA']:
+        if missing[source]:
+            print(f"⚠ Columns not found in {source} data (comparisons using them are skipped): "
+                  f"{', '.join(missing[source])}")
+    if missing['Optional']:
+        print(f"ℹ️  Optional report columns not found: {', '.join(missing['Optional'])}")
+
+
+def _read_source(file_path, source_name, columns, dtype, use_cache):
+    """Shared loader for MLS/CAMA extracts (columnar cache when available)."""
+    # Only the source itself counts as "not found" (cache problems are reported as they are)
+    if not os.path.isfile(file_path):
+        print(f"Error: {source_name} data file not found at {file_path}")
+        return None
+    try:
+        df, cache_hit = load_excel_cached(file_path, columns=columns, dtype=dtype, use_cache=use_cache)
+        origin = " (cached)" if cache_hit else ""
+        print(f"Successfully loaded {source_name} data from: {file_path}{origin}")
+        return df
+    except Exception as e:
+        print(f"Error reading {source_name} data: {e}")
+        return None
+
+
+def read_mls_data(file_path, columns=None, dtype=None, use_cache=True):
+    """Reads MLS data from a specified Excel file (optionally only `columns`, with `dtype`)."""
+    return _read_source(file_path, 'MLS', columns, dtype, use_cache)
+
+
+def read_cama_data(file_path, columns=None, dtype=None, use_cache=True):
+    """Reads CAMA system data from a specified Excel file (optionally only `columns`, with `dtype`)."""
+    return _read_source(file_path, 'CAMA', columns, dtype, use_cache)
+
+
+def read_cama_chunks(file_path, columns=None, dtype=None, chunk_size=CAMA_CHUNK_SIZE):
+    """
+    Streams CAMA data in chunks of `chunk_size` rows (optionally only `columns`, with `dtype`).
+    The first chunk is read up front so a bad path or format is reported here.
+
+    Returns:
+        Iterator of DataFrames, or None if the file cannot be read
+    """
+    if not os.path.isfile(file_path):
+        print(f"Error: CAMA data file not found at {file_path}")
+        return None
+    try:
+        chunks = read_excel_chunks(file_path, columns=columns, dtype=dtype, chunk_size=chunk_size)
+        first_chunk = next(chunks, None)
+    except Exception as e:
+        print(f"Error reading CAMA data: {e}")
+        return None
+
+    print(f"Streaming CAMA data from: {file_path} ({chunk_size:,} rows per chunk)")
+    return itertools.chain([] if first_chunk is None else [first_chunk], chunks)
+
+# --- Parcel Keys ---
+
+# Formatting stripped from parcel IDs before they are matched (spaces, dashes, slashes).
+# Dots are kept: '1.2345' and '12345' are different parcels.
+PARCEL_ID_FORMATTING = r'[\s\-/]'
+# A whole number written as text by a float-typed export ('12345.0', '12345.00')
+WHOLE_NUMBER_SUFFIX = r'^(\d+)\.0+$'
+PARCEL_KEY_COLUMN = '_parcel_key'
+
+
+def _canonical_parcel_id(value):
+    if _is_blank(value):
+        return None
+    if isinstance(value, (float, np.floating)) and float(value).is_integer():
+        value = int(value)
+    text = re.sub(PARCEL_ID_FORMATTING, '', str(value))
+    text = re.sub(WHOLE_NUMBER_SUFFIX, r'\1', text).upper()
+    if text.isdigit():
+        text = text.lstrip('0') or '0'
+    return text or None
+
+
+def canonical_parcel_ids(ids):
+    """
+    Canonical text form of a column of parcel IDs, so the formats the two systems
+    export agree: '00-12-345', ' 0012345', '12345.0' and 12345.0 all become '12345'.
+    PARCEL_ID_FORMATTING is removed, whole numbers lose their '.0' (stored as
+    floats or as text), letters are upper-cased and leading zeros of all-digit
+    IDs are dropped. Blank IDs become None.
+    """
+    if pd.api.types.is_integer_dtype(ids.dtype) and not ids.hasnans:
+        return ids.abs().astype(str).astype(object)
+    if pd.api.types.infer_dtype(ids, skipna=True) not in ('string', 'empty'):
+        # Mixed numbers and text: one Python call per distinct value
+        return pd.Series(_map_unique(ids, _canonical_parcel_id, None), index=ids.index, dtype=object)
+
+    # All text: the same steps as _canonical_parcel_id with column-wise string methods
+    text = ids.astype('str').str.replace(PARCEL_ID_FORMATTING, '', regex=True)
+    text = text.str.replace(WHOLE_NUMBER_SUFFIX, r'\1', regex=True).str.upper()
+    digits = text.str.isdigit().fillna(False).astype(bool)
+    unpadded = text.str.lstrip('0')
+    text = text.where(~digits, unpadded.where(unpadded != '', '0'))
+    return text.astype(object).where(text.notna() & (text != ''), None)
+
+
+def encode_parcel_keys(mls_ids, cama_ids):
+    """
+    Encode both sides' parcel IDs as int64 join codes sharing one code space.
+
+    Equal canonical IDs get the same code, numbered in canonical sort order, so
+    joins, anti-joins and duplicate checks run on integers instead of hashing
+    mixed-type objects. Every blank ID gets a code of its own (after the others),
+    so blank IDs never match anything.
+
+    Returns:
+        (mls_codes, cama_codes): int64 arrays aligned with the inputs
+    """
+    canonical = pd.concat([canonical_parcel_ids(mls_ids), canonical_parcel_ids(cama_ids)], ignore_index=True)
+    # A string dtype sorts the distinct keys several times faster than object
+    codes, uniques = pd.factorize(canonical.astype('str'), sort=True, use_na_sentinel=True)
+    codes = codes.astype(np.int64)
+    blank = codes < 0
+    codes[blank] = len(uniques) + np.arange(blank.sum())
+    return codes[:len(mls_ids)], codes[len(mls_ids):]
+
+
+def merge_on_parcel_keys(df_mls, df_cama, unique_id_col, how='outer', indicator=False):
+    """
+    pd.merge of MLS and CAMA on their encoded parcel keys (see encode_parcel_keys).
+
+    The result has a single ID column, named after the CAMA ID column, that holds
+    the original ID for display: the CAMA value for parcels CAMA has, the MLS
+    value otherwise. Outer joins come out in canonical parcel order.
+    """
+    mls_id_col_name = unique_id_col['mls_col']
+    cama_id_col_name = unique_id_col['cama_col']
+    mls_codes, cama_codes = encode_parcel_keys(df_mls[mls_id_col_name], df_cama[cama_id_col_name])
+
+    # Display ID per code (CAMA's spelling wins where both sides have the parcel)
+    display_ids = np.empty(max(mls_codes.max(initial=-1), cama_codes.max(initial=-1)) + 1, dtype=object)
+    display_ids[mls_codes] = df_mls[mls_id_col_name].to_numpy(dtype=object)
+    display_ids[cama_codes] = df_cama[cama_id_col_name].to_numpy(dtype=object)
+
+    left = df_mls.drop(columns=[mls_id_col_name])
+    left.insert(df_mls.columns.get_loc(mls_id_col_name), PARCEL_KEY_COLUMN, mls_codes)
+    right = df_cama.drop(columns=[cama_id_col_name])
+    right[PARCEL_KEY_COLUMN] = cama_codes
+
+    merged = pd.merge(left, right, on=PARCEL_KEY_COLUMN, how=how, indicator=indicator)
+    display = pd.Series(display_ids[merged[PARCEL_KEY_COLUMN].to_numpy()], index=merged.index)
+    if df_mls[mls_id_col_name].dtype == df_cama[cama_id_col_name].dtype:
+        display = display.astype(df_cama[cama_id_col_name].dtype)
+    merged[PARCEL_KEY_COLUMN] = display
+    return merged.rename(columns={PARCEL_KEY_COLUMN: cama_id_col_name})
+
+# --- Data Analysis Functions ---
+
+def find_duplicate_ids(df, id_column, source_name):
+    """Finds and reports duplicate IDs (compared in canonical form) within a single DataFrame."""
+    if df is None or df.empty:
+        print(f"No data to check for duplicates in {source_name}.")
+        return pd.DataFrame()
+
+    codes, _ = encode_parcel_keys(df[id_column], df[id_column].iloc[:0])
+    duplicated = pd.Series(codes).duplicated(keep=False).to_numpy()
+    duplicate_ids = df[duplicated]
+
+    if not duplicate_ids.empty:
+        print(f"\n--- Duplicate '{id_column}'s found within {source_name} data ---")
+        print(duplicate_ids.iloc[np.argsort(codes[duplicated], kind='stable')].to_string())
+        return duplicate_ids
+    else:
+        print(f"\nNo duplicate '{id_column}'s found within {source_name} data.")
+        return pd.DataFrame()
+
+# --- Duplicate Resolution ---
+
+def _order_values(series):
+    """Sortable float per cell for "latest" (numbers, else dates); blanks sort first."""
+    values, parsed = _numeric_view(series)
+    if not parsed.all():
+        dates = pd.to_datetime(series, errors='coerce', format='mixed')
+        values = dates.to_numpy(dtype='datetime64[ns]').astype(np.int64).astype(float)
+        values[dates.isna().to_numpy()] = np.nan
+    return np.where(np.isnan(values), -np.inf, values)
+
+
+def _latest_positions(order_values, codes, n):
+    """Sorted positions of the n latest rows of each key (ties go to the later row)."""
+    ranked = pd.DataFrame({'key': codes, 'order': order_values}).sort_values(['key', 'order'], kind='stable')
+    return np.sort(ranked.groupby('key', sort=False).tail(n).index.to_numpy())
+
+
+def _replace_values(df, column, positions, values):
+    """Set df[column] at row positions, letting the column widen to hold the new values."""
+    column_values = df[column].to_numpy(dtype=object, copy=True)
+    column_values[positions] = [int(v) if float(v).is_integer() else v for v in values]
+    df[column] = pd.Series(column_values, index=df.index).infer_objects()
+
+
+def resolve_duplicate_ids(df, id_column, policy=DUPLICATE_POLICY, order_column=None,
+                          sum_columns=None, cap=DUPLICATE_FANOUT_CAP):
+    """
+    Apply a duplicate policy to one source, grouping rows on the canonical parcel key.
+    Parcels listed once are left untouched.
+
+    Policies:
+        keep_all - keep every row (a parcel listed k times in MLS and m times in CAMA
+                   yields k x m compared records)
+        latest   - keep the row with the latest `order_column` value
+        salekey  - keep the rows with the latest `order_column` value (the latest
+                   sale), drop exact repeats and add up `sum_columns` into one row
+        cap      - keep the `cap` latest rows
+
+    Returns:
+        (DataFrame, rows removed)
+    """
+    if policy not in DUPLICATE_POLICIES:
+        raise ValueError(f"Unknown duplicate policy '{policy}' (choose from {', '.join(DUPLICATE_POLICIES)})")
+    if policy == 'keep_all' or df is None or df.empty or id_column not in df.columns:
+        return df, 0
+
+    codes, _ = encode_parcel_keys(df[id_column], df[id_column].iloc[:0])
+    dup_positions = np.flatnonzero(pd.Series(codes).duplicated(keep=False).to_numpy())
+    if len(dup_positions) == 0:
+        return df, 0
+
+    dups = df.iloc[dup_positions]
+    dup_codes = codes[dup_positions]
+    order = (_order_values(dups[order_column]) if order_column in df.columns
+             else np.zeros(len(dups)))
+
+    keep = np.ones(len(df), dtype=bool)
+    keep[dup_positions] = False
+    if policy != 'salekey':
+        keep[dup_positions[_latest_positions(order, dup_codes, 1 if policy == 'latest' else cap)]] = True
+        resolved = df[keep]
+        return resolved, len(df) - len(resolved)
+
+    # Rows of each parcel's latest sale, exact repeats dropped, first one kept as the base row
+    in_sale = order == pd.Series(order).groupby(dup_codes).transform('max').to_numpy()
+    in_sale[in_sale] = ~dups[in_sale].duplicated().to_numpy()
+    sale, sale_codes = dups[in_sale], dup_codes[in_sale]
+    first = ~pd.Series(sale_codes).duplicated().to_numpy()
+    keep[dup_positions[in_sale][first]] = True
+
+    resolved = df[keep].copy()
+    base_rows = np.searchsorted(np.flatnonzero(keep), dup_positions[in_sale][first])
+    for column in dict.fromkeys(sum_columns or []):
+        if column in resolved.columns:
+            sums = pd.Series(_numeric_view(sale[column])[0]).groupby(sale_codes, sort=False).sum(min_count=1)
+            _replace_values(resolved, column, base_rows, sums.reindex(sale_codes[first]).to_numpy())
+    return resolved, len(df) - len(resolved)
+
+
+def resolve_duplicates(df_mls, df_cama, unique_id_col=None, policy=DUPLICATE_POLICY,
+                       cols_to_compare_mapping=None, cols_to_compare_sum=None, cap=DUPLICATE_FANOUT_CAP,
+                       verbose=True):
+    """
+    Apply a duplicate policy (see resolve_duplicate_ids) to both sources before
+    the join and report how many rows it collapsed. "Latest" follows
+    DUPLICATE_ORDER_COLUMNS: the MLS Closed Date and the CAMA SALEKEY. With
+    'salekey' the MLS side keeps its latest row and the CAMA side adds up the
+    compared columns of the latest sale's rows (e.g. several buildings).
+
+    Returns:
+        (df_mls, df_cama)
+    """
+    unique_id_col = unique_id_col or UNIQUE_ID_COLUMN
+    if cols_to_compare_mapping is None:
+        cols_to_compare_mapping = COLUMNS_TO_COMPARE
+    cama_sum_columns = [m['cama_col'] for m in cols_to_compare_mapping]
+    cama_sum_columns += [col for m in cols_to_compare_sum or [] for col in m['cama_cols']]
+
+    df_mls, mls_removed = resolve_duplicate_ids(
+        df_mls, unique_id_col['mls_col'], 'latest' if policy == 'salekey' else policy,
+        DUPLICATE_ORDER_COLUMNS['mls'], cap=cap)
+    df_cama, cama_removed = resolve_duplicate_ids(
+        df_cama, unique_id_col['cama_col'], policy, DUPLICATE_ORDER_COLUMNS['cama'],
+        sum_columns=cama_sum_columns, cap=cap)
+    if verbose and policy != 'keep_all':
+        print(f"🧹 Duplicate IDs ({policy}): collapsed {mls_removed:,} MLS and {cama_removed:,} CAMA rows")
+    return df_mls, df_cama
+
+# --- Column-wise helpers ---
+
+def _map_unique(series, func, na_value):
+    """
+    Apply a scalar function once per distinct value of a column and broadcast
+    the results back. Null cells receive na_value.
+    """
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    mapped = np.array([func(value) for value in uniques] + [na_value], dtype=object)
+    # Code -1 (null) picks up the trailing na_value
+    return mapped[codes]
+
+
+def _is_object_like(series):
+    """True for columns whose cells may hold arbitrary Python objects or text."""
+    return series.dtype == object or pd.api.types.is_string_dtype(series.dtype) \
+        or isinstance(series.dtype, pd.CategoricalDtype)
+
+
+def _parse_number(value):
+    """Scalar pd.to_numeric(errors='raise') returning (float value, parsed ok)."""
+    try:
+        return float(pd.to_numeric(value, errors='raise')), True
+    except (ValueError, TypeError):
+        return np.nan, False
+
+
+def _blank_mask(series):
+    """Blank = null/NaN or a whitespace-only string (same rule as the row loop)."""
+    if not _is_object_like(series):
+        return series.isna().to_numpy()
+    return _map_unique(
+        series, lambda v: isinstance(v, str) and v.strip() == '', True
+    ).astype(bool)
+
+
+def _numeric_view(series):
+    """
+    Column equivalent of calling pd.to_numeric(value, errors='raise') on every cell.
+
+    Returns:
+        (values, parsed): float64 array (NaN for nulls and failures) and a boolean
+        array that is False where the cell could not be parsed as a number
+    """
+    if pd.api.types.is_numeric_dtype(series.dtype) and not _is_object_like(series):
+        return (series.to_numpy(dtype=float, na_value=np.nan),
+                np.ones(len(series), dtype=bool))
+
+    parsed = _map_unique(series, _parse_number, (np.nan, True))
+    values = np.fromiter((p[0] for p in parsed), dtype=float, count=len(parsed))
+    ok = np.fromiter((p[1] for p in parsed), dtype=bool, count=len(parsed))
+    return values, ok
+
+
+def _text_key(value):
+    """Normalized text used when a value cannot be compared numerically."""
+    return str(value).strip().lower() if pd.notna(value) else ''
+
+
+def _values_equal_columns(mls_values, mls_num, mls_ok, cama_values, cama_num, cama_ok, tolerance):
+    """Vectorized values_equal(): numeric closeness, falling back to text equality."""
+    both_numeric = mls_ok & cama_ok
+    with np.errstate(invalid='ignore'):
+        close = np.isclose(mls_num, cama_num, equal_nan=False, rtol=1e-9, atol=tolerance)
+    equal = both_numeric & (close | (np.isnan(mls_num) & np.isnan(cama_num)))
+
+    text_idx = np.flatnonzero(~both_numeric)
+    if text_idx.size:
+        equal[text_idx] = [_text_key(a) == _text_key(b)
+                           for a, b in zip(mls_values[text_idx], cama_values[text_idx])]
+    return equal
+
+
+def _difference_column(mls_num, mls_ok, cama_num, cama_ok):
+    """Vectorized calculate_difference()."""
+    result = np.full(len(mls_num), 'Text difference', dtype=object)
+    numeric = mls_ok & cama_ok
+    has_nan = np.isnan(mls_num) | np.isnan(cama_num)
+    result[numeric & has_nan] = 'N/A'
+
+    idx = np.flatnonzero(numeric & ~has_nan)
+    if idx.size:
+        result[idx] = [f"{diff:,.2f}" for diff in (mls_num[idx] - cama_num[idx])]
+    return result
+
+
+def _contains_text(series, check_text, case_sensitive):
+    """Vectorized `check_text in str(value).strip()` with optional case folding."""
+    if not case_sensitive:
+        check_text = check_text.lower()
+
+    if len(series) and pd.api.types.infer_dtype(series, skipna=True) == 'string':
+        text = series.astype(object).str.strip()
+        if not case_sensitive:
+            text = text.str.lower()
+        return text.str.contains(check_text, regex=False).to_numpy(dtype=bool, na_value=False)
+
+    found = np.empty(len(series), dtype=bool)
+    for i, value in enumerate(series.to_numpy(dtype=object)):
+        text = str(value).strip() if pd.notna(value) else ''
+        found[i] = check_text in (text if case_sensitive else text.lower())
+    return found
+
+
+def _scalar_to_number(value):
+    """Scalar pd.to_numeric(errors='coerce') as a float."""
+    try:
+        return float(pd.to_numeric(value, errors='coerce'))
+    except (ValueError, TypeError):
+        return np.nan
+
+
+def _column_or_constant(df, column, default, n):
+    """Return the column's values, or a constant array when the column is absent."""
+    if column in df.columns:
+        return df[column].to_numpy(dtype=object)
+    return np.full(n, default, dtype=object)
+
+
+def _build_frame(columns, order):
+    """
+    Build a DataFrame from per-column object arrays.
+    Going through lists keeps dtype inference identical to building from row dicts.
+    """
+    if not order or not len(columns[order[0]]):
+        return pd.DataFrame()
+    return pd.DataFrame({name: columns[name].tolist() for name in order}, columns=order)
+
+# --- Vectorized Comparison Engine ---
+
+def compare_data_vectorized(df_mls, df_cama, unique_id_col, cols_to_compare_mapping,
+                            cols_to_compare_sum=None, cols_to_compare_categorical=None,
+                            tolerance=0.01, skip_zeros=True, address_columns=None,
+                            include_nopar=True, include_zillow_url=True, debug_mode=False):
+    """
+    Column-wise implementation of compare_data_enhanced.
+
+    Every comparison rule is evaluated over whole columns (blank masks, zero-skip
+    masks, tolerance masks) and the result frames are assembled from the boolean
+    masks, in the same row and column order as the original iterrows() loop.
+
+    Args:
+        df_mls: MLS DataFrame
+        df_cama: CAMA DataFrame
+        unique_id_col: Dict with 'mls_col' and 'cama_col' keys
+        cols_to_compare_mapping: List of dicts for 1-to-1 column comparisons
+        cols_to_compare_sum: List of dicts with 'mls_col' and 'cama_cols' for sum comparisons
+        cols_to_compare_categorical: List of dicts for categorical comparisons
+        tolerance: Absolute tolerance for numeric comparisons
+        skip_zeros: Skip numeric comparisons where either side is 0
+        address_columns: Dict mapping 'address'/'city'/'state'/'zip' to MLS column names
+        include_nopar: Include the CAMA NOPAR column in mismatch/perfect-match records
+        include_zillow_url: Add a Zillow_URL column to mismatch/perfect-match records
+        debug_mode: Print per-rule diagnostics and the first 20 comparisons
+
+    Returns:
+        (df_missing_cama, df_missing_mls, df_value_mismatches, df_perfect_matches)
+    """
+    address_columns = address_columns or ADDRESS_COLUMNS
+    cama_id_col_name = unique_id_col['cama_col']
+
+    with profile_stage('outer merge') as stage:
+        merged_df = merge_on_parcel_keys(df_mls, df_cama, unique_id_col, how='outer', indicator=True)
+        stage['rows'] = n_rows = len(merged_df)
+
+    merge_status = merged_df['_merge'].to_numpy(dtype=object)
+    record_ids = merged_df[cama_id_col_name].to_numpy(dtype=object)
+
+    # Missing in CAMA / missing in MLS come straight from the merge indicator
+    left_idx = np.flatnonzero(merge_status == 'left_only')
+    df_missing_cama = _build_frame({
+        'Parcel_ID': record_ids[left_idx],
+        'Listing_Number': _column_or_constant(merged_df, 'Listing #', '', n_rows)[left_idx],
+        'Closed_Date': _column_or_constant(merged_df, 'Closed Date', '', n_rows)[left_idx],
+    }, ['Parcel_ID', 'Listing_Number', 'Closed_Date'])
+
+    right_idx = np.flatnonzero(merge_status == 'right_only')
+    df_missing_mls = _build_frame({'Parcel_ID': record_ids[right_idx]}, ['Parcel_ID'])
+
+    # Everything below only looks at records present in both systems
+    both_idx = np.flatnonzero(merge_status == 'both')
+    both_df = merged_df.iloc[both_idx].reset_index(drop=True)
+    n_both = len(both_df)
+    columns = set(both_df.columns)
+
+    # Each rule contributes: compared mask, mismatch mask and its mismatch record columns
+    rule_fields = []
+    compared_masks = []
+    mismatch_masks = []
+    mismatch_pieces = []
+    debug_pieces = []
+
+    def _record_piece(rule_no, kind, mismatch, values):
+        idx = np.flatnonzero(mismatch)
+        mismatch_pieces.append((rule_no, kind, idx, {k: v[idx] for k, v in values.items()}))
+
+    def _debug_piece(field, evaluated, mls_values, cama_values, mismatch):
+        if debug_mode:
+            idx = np.flatnonzero(evaluated)
+            debug_pieces.append((len(compared_masks), idx, field, mls_values[idx],
+                                 cama_values[idx], mismatch[idx]))
+
+    def _skip_rule(message):
+        if debug_mode:
+            print(message)
+
+    # Standard 1-to-1 comparisons
+    for mapping in cols_to_compare_mapping:
+        mls_col = mapping['mls_col']
+        cama_col = mapping['cama_col']
+
+        if mls_col not in columns or cama_col not in columns:
+            _skip_rule(f"⚠ Column not found in merged data: {mls_col} or {cama_col}")
+            continue
+
+        rule_timer = stage_timer()
+        mls_series = both_df[mls_col]
+        cama_series = both_df[cama_col]
+        mls_values = mls_series.to_numpy(dtype=object)
+        cama_values = cama_series.to_numpy(dtype=object)
+
+        compared = ~(_blank_mask(mls_series) | _blank_mask(cama_series))
+        mls_num, mls_ok = _numeric_view(mls_series)
+        cama_num, cama_ok = _numeric_view(cama_series)
+
+        evaluated = compared.copy()
+        if skip_zeros:
+            zero = (mls_ok & (mls_num == 0)) | (cama_ok & (cama_num == 0))
+            evaluated &= ~zero
+
+        mismatch = evaluated & ~_values_equal_columns(
+            mls_values, mls_num, mls_ok, cama_values, cama_num, cama_ok, tolerance)
+
+        _record_piece(len(compared_masks), 'numeric', mismatch, {
+            'Field_MLS': np.full(n_both, mls_col, dtype=object),
+            'Field_CAMA': np.full(n_both, cama_col, dtype=object),
+            'MLS_Value': mls_values,
+            'CAMA_Value': cama_values,
+            'Difference': _difference_column(mls_num, mls_ok, cama_num, cama_ok),
+        })
+        _debug_piece(mls_col, evaluated, mls_values, cama_values, mismatch)
+        rule_fields.append(mls_col)
+        compared_masks.append(compared)
+        mismatch_masks.append(mismatch)
+        record_stage(f"rule {mls_col}", rule_timer, rows=int(evaluated.sum()), mismatches=int(mismatch.sum()))
+
+    # Sum comparisons (multiple CAMA columns summed, blanks count as 0)
+    for mapping in cols_to_compare_sum or []:
+        mls_col = mapping['mls_col']
+        cama_cols = mapping['cama_cols']
+
+        if mls_col not in columns:
+            _skip_rule(f"⚠ MLS column not found: {mls_col}")
+            continue
+        missing_cols = [col for col in cama_cols if col not in columns]
+        if missing_cols:
+            _skip_rule(f"⚠ CAMA columns not found: {missing_cols}")
+            continue
+
+        rule_timer = stage_timer()
+        mls_series = both_df[mls_col]
+        mls_values = mls_series.to_numpy(dtype=object)
+        mls_num, mls_ok = _numeric_view(mls_series)
+
+        # Integer-only sources keep integer sums, like the original scalar accumulation
+        if all(pd.api.types.is_integer_dtype(both_df[col].dtype)
+               and not _is_object_like(both_df[col]) for col in cama_cols):
+            cama_sum = np.zeros(n_both, dtype=np.int64)
+            for col in cama_cols:
+                cama_sum = cama_sum + both_df[col].to_numpy(dtype=np.int64)
+            any_cama_value = np.full(n_both, len(cama_cols) > 0)
+        else:
+            cama_sum = np.zeros(n_both, dtype=float)
+            any_cama_value = np.zeros(n_both, dtype=bool)
+            for col in cama_cols:
+                col_na = both_df[col].isna().to_numpy()
+                col_num, col_ok = _numeric_view(both_df[col])
+                # Non-null values that do not parse poison the sum with NaN
+                contribution = np.where(col_ok, col_num, np.nan)
+                cama_sum = cama_sum + np.where(col_na, 0.0, contribution)
+                any_cama_value |= ~col_na
+
+        sum_float = cama_sum.astype(float)
+        compared = ~_blank_mask(mls_series) & any_cama_value
+
+        evaluated = compared.copy()
+        if skip_zeros:
+            evaluated &= ~((mls_ok & (mls_num == 0)) | (sum_float == 0))
+
+        sum_values = cama_sum.astype(object)
+        mismatch = evaluated & ~_values_equal_columns(
+            mls_values, mls_num, mls_ok, sum_values, sum_float,
+            np.ones(n_both, dtype=bool), tolerance)
+
+        field_cama = f"SUM({', '.join(cama_cols)})"
+        _record_piece(len(compared_masks), 'numeric', mismatch, {
+            'Field_MLS': np.full(n_both, mls_col, dtype=object),
+            'Field_CAMA': np.full(n_both, field_cama, dtype=object),
+            'MLS_Value': mls_values,
+            'CAMA_Value': sum_values,
+            'Difference': _difference_column(mls_num, mls_ok, sum_float, np.ones(n_both, dtype=bool)),
+        })
+        _debug_piece(mls_col, evaluated, mls_values,
+                     np.array([f"SUM({','.join(cama_cols)})={v}" for v in sum_values], dtype=object)
+                     if debug_mode else sum_values, mismatch)
+        rule_fields.append(mls_col)
+        compared_masks.append(compared)
+        mismatch_masks.append(mismatch)
+        record_stage(f"rule {mls_col} (sum)", rule_timer, rows=int(evaluated.sum()),
+                     mismatches=int(mismatch.sum()))
+
+    # Categorical comparisons (text found in MLS -> expected CAMA code)
+    for mapping in cols_to_compare_categorical or []:
+        mls_col = mapping['mls_col']
+        cama_col = mapping['cama_col']
+
+        if mls_col not in columns:
+            _skip_rule(f"⚠ MLS column not found: {mls_col}")
+            continue
+        if cama_col not in columns:
+            _skip_rule(f"⚠ CAMA column not found: {cama_col}")
+            continue
+
+        rule_timer = stage_timer()
+        check_text = mapping.get('mls_check_contains', '')
+        expected_if_true = mapping.get('cama_expected_if_true')
+        expected_if_false = mapping.get('cama_expected_if_false')
+        case_sensitive = mapping.get('case_sensitive', False)
+
+        mls_series = both_df[mls_col]
+        cama_series = both_df[cama_col]
+        mls_values = mls_series.to_numpy(dtype=object)
+        cama_values = cama_series.to_numpy(dtype=object)
+
+        compared = ~(_blank_mask(mls_series) | _blank_mask(cama_series))
+
+        text_found = np.zeros(n_both, dtype=bool)
+        compared_idx = np.flatnonzero(compared)
+        text_found[compared_idx] = _contains_text(
+            mls_series.iloc[compared_idx], check_text, case_sensitive)
+
+        expected_values = np.array([expected_if_false, expected_if_true], dtype=object)[text_found.astype(int)]
+        expected_num = np.where(text_found, _scalar_to_number(expected_if_true),
+                                _scalar_to_number(expected_if_false))
+        cama_num, cama_ok = _numeric_view(cama_series)
+        cama_num = np.where(cama_ok, cama_num, np.nan)
+
+        with np.errstate(invalid='ignore'):
+            close = np.isclose(cama_num, expected_num, equal_nan=False, rtol=1e-9, atol=tolerance)
+        both_nan = np.isnan(cama_num) & np.isnan(expected_num)
+        one_nan = np.isnan(cama_num) ^ np.isnan(expected_num)
+        is_match = both_nan | (~one_nan & close)
+        mismatch = compared & ~is_match
+
+        match_rule = (f"If '{check_text}' in {mls_col}, then {cama_col} should be "
+                      f"{expected_if_true}, else {expected_if_false}")
+        _record_piece(len(compared_masks), 'categorical', mismatch, {
+            'Field_MLS': np.full(n_both, mls_col, dtype=object),
+            'Field_CAMA': np.full(n_both, cama_col, dtype=object),
+            'MLS_Value': mls_values,
+            'CAMA_Value': cama_values,
+            'Expected_CAMA_Value': expected_values,
+            'Match_Rule': np.full(n_both, match_rule, dtype=object),
+        })
+        _debug_piece(mls_col, compared, mls_values, cama_values, mismatch)
+        rule_fields.append(mls_col)
+        compared_masks.append(compared)
+        mismatch_masks.append(mismatch)
+        record_stage(f"rule {mls_col} (categorical)", rule_timer, rows=int(compared.sum()),
+                     mismatches=int(mismatch.sum()))
+
+    assemble_timer = stage_timer()
+
+    # Per-record columns shared by mismatch and perfect-match records
+    base_columns = {
+        'Parcel_ID': both_df[cama_id_col_name].to_numpy(dtype=object),
+        'NOPAR': _column_or_constant(both_df, 'NOPAR', '', n_both),
+        'Listing_Number': _column_or_constant(both_df, 'Listing #', '', n_both),
+        'SALEKEY': _column_or_constant(both_df, 'SALEKEY', '', n_both),
+        'Address': _column_or_constant(both_df, address_columns.get('address', 'Address'), '', n_both),
+        'City': _column_or_constant(both_df, address_columns.get('city', 'City'), '', n_both),
+        'State': _column_or_constant(both_df, address_columns.get('state', 'State or Province'), '', n_both),
+        'Zip': _column_or_constant(both_df, address_columns.get('zip', 'Postal Code'), '', n_both),
+    }
+    base_order = [c for c in BASE_RECORD_COLUMNS if include_nopar or c != 'NOPAR']
+
+    zillow_cache = {}
+
+    def _zillow_urls(rows):
+        urls = np.empty(len(rows), dtype=object)
+        for i, row in enumerate(rows):
+            if row not in zillow_cache:
+                zillow_cache[row] = format_zillow_url(
+                    base_columns['Address'][row], base_columns['City'][row],
+                    base_columns['State'][row], base_columns['Zip'][row])
+            urls[i] = zillow_cache[row]
+        return urls
+
+    # Value mismatches: one record per failed rule, ordered by merged row then rule
+    if mismatch_pieces and any(len(piece[2]) for piece in mismatch_pieces):
+        rows = np.concatenate([piece[2] for piece in mismatch_pieces])
+        rule_nos = np.concatenate([np.full(len(piece[2]), piece[0]) for piece in mismatch_pieces])
+        order = np.lexsort((rule_nos, rows))
+        rows = rows[order]
+
+        # Column order follows first appearance, as when building from row dicts
+        kinds_in_order = []
+        kind_by_rule = {piece[0]: piece[1] for piece in mismatch_pieces}
+        for rule_no in pd.unique(rule_nos[order]):
+            if kind_by_rule[rule_no] not in kinds_in_order:
+                kinds_in_order.append(kind_by_rule[rule_no])
+        record_order = list(base_order)
+        for kind in kinds_in_order:
+            kind_columns = NUMERIC_RECORD_COLUMNS if kind == 'numeric' else CATEGORICAL_RECORD_COLUMNS
+            if include_zillow_url:
+                kind_columns = kind_columns + ['Zillow_URL']
+            record_order.extend(c for c in kind_columns if c not in record_order)
+
+        mismatch_columns = {name: base_columns[name][rows] for name in base_order}
+        for name in record_order:
+            if name in mismatch_columns or name == 'Zillow_URL':
+                continue
+            mismatch_columns[name] = np.concatenate([
+                piece[3][name] if name in piece[3] else np.full(len(piece[2]), np.nan, dtype=object)
+                for piece in mismatch_pieces
+            ])[order]
+        if include_zillow_url:
+            mismatch_columns['Zillow_URL'] = _zillow_urls(rows)
+        df_value_mismatches = _build_frame(mismatch_columns, record_order)
+    else:
+        df_value_mismatches = pd.DataFrame()
+
+    # Perfect matches: at least one field compared and no rule failed
+    if compared_masks:
+        compared_matrix = np.column_stack(compared_masks)
+        any_mismatch = np.column_stack(mismatch_masks).any(axis=1)
+        perfect_rows = np.flatnonzero(compared_matrix.any(axis=1) & ~any_mismatch)
+    else:
+        perfect_rows = np.array([], dtype=int)
+
+    if perfect_rows.size:
+        perfect_matrix = compared_matrix[perfect_rows]
+        # Identical compared-field patterns share one joined Fields_List string
+        patterns, pattern_codes = np.unique(perfect_matrix, axis=0, return_inverse=True)
+        pattern_lists = np.array([', '.join(f for f, used in zip(rule_fields, p) if used)
+                                  for p in patterns], dtype=object)
+
+        perfect_columns = {name: base_columns[name][perfect_rows] for name in base_order}
+        perfect_columns['Fields_Compared'] = perfect_matrix.sum(axis=1).astype(object)
+        perfect_columns['Fields_List'] = pattern_lists[pattern_codes.reshape(-1)]
+        perfect_order = base_order + ['Fields_Compared', 'Fields_List']
+        if include_zillow_url:
+            perfect_columns['Zillow_URL'] = _zillow_urls(perfect_rows)
+            perfect_order.append('Zillow_URL')
+        df_perfect_matches = _build_frame(perfect_columns, perfect_order)
+    else:
+        df_perfect_matches = pd.DataFrame()
+
+    record_stage('build result frames', assemble_timer,
+                 rows=len(df_value_mismatches) + len(df_perfect_matches))
+
+    if debug_mode and debug_pieces:
+        total = sum(len(piece[1]) for piece in debug_pieces)
+        different = sum(int(piece[5].sum()) for piece in debug_pieces)
+        print(f"\n🔍 DEBUG: Total comparisons made: {total}")
+        print(f"🔍 DEBUG: Mismatches detected: {different}")
+
+        rows = np.concatenate([piece[1] for piece in debug_pieces])
+        rule_nos = np.concatenate([np.full(len(piece[1]), piece[0]) for piece in debug_pieces])
+        first = np.lexsort((rule_nos, rows))[:20]
+        df_debug = pd.DataFrame({
+            'Parcel_ID': base_columns['Parcel_ID'][rows[first]],
+            'Field': np.concatenate([np.full(len(p[1]), p[2], dtype=object) for p in debug_pieces])[first],
+            'MLS_Value': np.concatenate([p[3] for p in debug_pieces])[first],
+            'CAMA_Value': np.concatenate([p[4] for p in debug_pieces])[first],
+            'Is_Different': np.concatenate([p[5] for p in debug_pieces])[first],
+        })
+        print("\n🔍 DEBUG: First 20 comparisons:")
+        _display(df_debug)
+
+    return df_missing_cama, df_missing_mls, df_value_mismatches, df_perfect_matches
+
+# --- Row-by-row Comparison Engine (reference implementation) ---
+
+def compare_data_rowwise(df_mls, df_cama, unique_id_col, cols_to_compare_mapping,
+                         cols_to_compare_sum=None, cols_to_compare_categorical=None,
+                         tolerance=0.01, skip_zeros=True, address_columns=None,
+                         include_nopar=True, include_zillow_url=True, debug_mode=False):
+    """
+    Original iterrows() implementation of compare_data_enhanced.
+    Kept as the reference/fallback for compare_data_vectorized; same arguments and return value.
+    """
+    address_columns = address_columns or ADDRESS_COLUMNS
+    cama_id_col_name = unique_id_col['cama_col']
+
+    with profile_stage('outer merge') as stage:
+        merged_df = merge_on_parcel_keys(df_mls, df_cama, unique_id_col, how='outer', indicator=True)
+        stage['rows'] = len(merged_df)
+
+    # Lists to store different types of discrepancies
+    missing_in_cama = []
+    missing_in_mls = []
+    value_mismatches = []
+    perfect_matches = []
+
+    comparison_debug = []
+
+    # Drop rules whose columns are missing once, up front
+    def _columns_present(mapping_cols, message):
+        if all(col in merged_df.columns for col in mapping_cols):
+            return True
+        if debug_mode:
+            print(message)
+        return False
+
+    standard_rules = [
+        m for m in cols_to_compare_mapping
+        if _columns_present([m['mls_col'], m['cama_col']],
+                            f"⚠ Column not found in merged data: {m['mls_col']} or {m['cama_col']}")
+    ]
+    sum_rules = [
+        m for m in cols_to_compare_sum or []
+        if _columns_present([m['mls_col']], f"⚠ MLS column not found: {m['mls_col']}")
+        and _columns_present(m['cama_cols'], f"⚠ CAMA columns not found: "
+                             f"{[c for c in m['cama_cols'] if c not in merged_df.columns]}")
+    ]
+    categorical_rules = [
+        m for m in cols_to_compare_categorical or []
+        if _columns_present([m['mls_col']], f"⚠ MLS column not found: {m['mls_col']}")
+        and _columns_present([m['cama_col']], f"⚠ CAMA column not found: {m['cama_col']}")
+    ]
+
+    def _base_record(record):
+        if not include_nopar:
+            record.pop('NOPAR')
+        return record
+
+    def _with_zillow(record, address, city, state, zip_code):
+        if include_zillow_url:
+            record['Zillow_URL'] = format_zillow_url(address, city, state, zip_code)
+        return record
+
+    # Iterate through the merged DataFrame
+    loop_timer = stage_timer()
+    for index, row in merged_df.iterrows():
+        record_id = row.get(cama_id_col_name)
+        merge_status = row.get('_merge')
+
+        if merge_status == 'left_only':
+            # Extract Listing # and Closed Date from MLS data
+            missing_in_cama.append({
+                'Parcel_ID': record_id,
+                'Listing_Number': row.get('Listing #', ''),
+                'Closed_Date': row.get('Closed Date', '')
+            })
+
+        elif merge_status == 'right_only':
+            missing_in_mls.append({'Parcel_ID': record_id})
+
+        elif merge_status == 'both':
+            # Extract Listing #, SALEKEY, NOPAR and address components once for this record
+            base = {
+                'Parcel_ID': record_id,
+                'NOPAR': row.get('NOPAR', ''),
+                'Listing_Number': row.get('Listing #', ''),
+                'SALEKEY': row.get('SALEKEY', ''),
+                'Address': row.get(address_columns.get('address', 'Address'), ''),
+                'City': row.get(address_columns.get('city', 'City'), ''),
+                'State': row.get(address_columns.get('state', 'State or Province'), ''),
+                'Zip': row.get(address_columns.get('zip', 'Postal Code'), ''),
+            }
+            location = (base['Address'], base['City'], base['State'], base['Zip'])
+
+            record_mismatches = []
+            fields_compared = []
+
+            # Standard 1-to-1 comparisons
+            for mapping in standard_rules:
+                mls_col = mapping['mls_col']
+                cama_col = mapping['cama_col']
+
+                mls_val = row.get(mls_col)
+                cama_val = row.get(cama_col)
+
+                # SKIP comparison if EITHER value is blank/null/NaN
+                if _is_blank(mls_val) or _is_blank(cama_val):
+                    continue
+
+                # Track that we compared this field
+                fields_compared.append(mls_col)
+
+                # SKIP comparison if EITHER value is 0 and skip_zeros is enabled
+                if skip_zeros:
+                    try:
+                        mls_numeric = pd.to_numeric(mls_val, errors='coerce')
+                        cama_numeric = pd.to_numeric(cama_val, errors='coerce')
+                        if (pd.notna(mls_numeric) and mls_numeric == 0) or (pd.notna(cama_numeric) and cama_numeric == 0):
+                            continue
+                    except:
+                        pass
+
+                is_different = not values_equal(mls_val, cama_val, tolerance)
+
+                if debug_mode:
+                    comparison_debug.append({
+                        'Parcel_ID': record_id,
+                        'Field': mls_col,
+                        'MLS_Value': mls_val,
+                        'CAMA_Value': cama_val,
+                        'Is_Different': is_different
+                    })
+
+                if is_different:
+                    record_mismatches.append(_with_zillow(_base_record({
+                        **base,
+                        'Field_MLS': mls_col,
+                        'Field_CAMA': cama_col,
+                        'MLS_Value': mls_val,
+                        'CAMA_Value': cama_val,
+                        'Difference': calculate_difference(mls_val, cama_val)
+                    }), *location))
+
+            # Handle sum comparisons (multiple CAMA columns summed)
+            for mapping in sum_rules:
+                mls_col = mapping['mls_col']
+                cama_cols = mapping['cama_cols']
+
+                mls_val = row.get(mls_col)
+                if _is_blank(mls_val):
+                    continue
+
+                # Calculate sum of CAMA columns (treating NaN as 0)
+                cama_sum = 0
+                all_cama_blank = True
+                for col in cama_cols:
+                    val = row.get(col)
+                    if pd.notna(val):
+                        all_cama_blank = False
+                        try:
+                            cama_sum += pd.to_numeric(val, errors='coerce')
+                        except:
+                            pass
+
+                # Skip if all CAMA columns are blank
+                if all_cama_blank:
+                    continue
+
+                fields_compared.append(mls_col)
+
+                if skip_zeros:
+                    try:
+                        mls_numeric = pd.to_numeric(mls_val, errors='coerce')
+                        if (pd.notna(mls_numeric) and mls_numeric == 0) or cama_sum == 0:
+                            continue
+                    except:
+                        pass
+
+                is_different = not values_equal(mls_val, cama_sum, tolerance)
+
+                if debug_mode:
+                    comparison_debug.append({
+                        'Parcel_ID': record_id,
+                        'Field': mls_col,
+                        'MLS_Value': mls_val,
+                        'CAMA_Value': f"SUM({','.join(cama_cols)})={cama_sum}",
+                        'Is_Different': is_different
+                    })
+
+                if is_different:
+                    record_mismatches.append(_with_zillow(_base_record({
+                        **base,
+                        'Field_MLS': mls_col,
+                        'Field_CAMA': f"SUM({', '.join(cama_cols)})",
+                        'MLS_Value': mls_val,
+                        'CAMA_Value': cama_sum,
+                        'Difference': calculate_difference(mls_val, cama_sum)
+                    }), *location))
+
+            # Handle categorical comparisons
+            for mapping in categorical_rules:
+                mls_col = mapping['mls_col']
+                cama_col = mapping['cama_col']
+
+                mls_val = row.get(mls_col)
+                cama_val = row.get(cama_col)
+
+                if _is_blank(mls_val) or _is_blank(cama_val):
+                    continue
+
+                fields_compared.append(mls_col)
+
+                is_match = categorical_match(mls_val, cama_val, mapping, tolerance)
+
+                if debug_mode:
+                    comparison_debug.append({
+                        'Parcel_ID': record_id,
+                        'Field': mls_col,
+                        'MLS_Value': mls_val,
+                        'CAMA_Value': cama_val,
+                        'Is_Different': not is_match
+                    })
+
+                if not is_match:
+                    check_text = mapping.get('mls_check_contains', '')
+                    record_mismatches.append(_with_zillow(_base_record({
+                        **base,
+                        'Field_MLS': mls_col,
+                        'Field_CAMA': cama_col,
+                        'MLS_Value': mls_val,
+                        'CAMA_Value': cama_val,
+                        'Expected_CAMA_Value': expected_categorical_value(mls_val, mapping),
+                        'Match_Rule': f"If '{check_text}' in {mls_col}, then {cama_col} should be {mapping.get('cama_expected_if_true')}, else {mapping.get('cama_expected_if_false')}"
+                    }), *location))
+
+            # If no mismatches found for this record, it's a perfect match!
+            if not record_mismatches and fields_compared:
+                perfect_matches.append(_with_zillow(_base_record({
+                    **base,
+                    'Fields_Compared': len(fields_compared),
+                    'Fields_List': ', '.join(fields_compared)
+                }), *location))
+
+            value_mismatches.extend(record_mismatches)
+
+    record_stage('row loop (all rules)', loop_timer, rows=len(merged_df),
+                 mismatches=len(value_mismatches))
+
+    if debug_mode and comparison_debug:
+        print(f"\n🔍 DEBUG: Total comparisons made: {len(comparison_debug)}")
+        print(f"🔍 DEBUG: Mismatches detected: {sum(1 for c in comparison_debug if c['Is_Different'])}")
+        print("\n🔍 DEBUG: First 20 comparisons:")
+        _display(pd.DataFrame(comparison_debug).head(20))
+
+    return (pd.DataFrame(missing_in_cama), pd.DataFrame(missing_in_mls),
+            pd.DataFrame(value_mismatches), pd.DataFrame(perfect_matches))
+
+# --- Enhanced Data Comparison Function ---
+
+def _comparison_input_error(df_mls, df_cama, unique_id_col, cols_to_compare_mapping):
+    """Return the message explaining why the inputs cannot be compared, or None."""
+    if df_mls is None or df_cama is None:
+        return "Cannot compare data: one or both dataframes are missing."
+    if not cols_to_compare_mapping:
+        return "Cannot compare data: Column mapping is empty or invalid."
+
+    mls_id_col_name = unique_id_col.get('mls_col')
+    cama_id_col_name = unique_id_col.get('cama_col')
+
+    if mls_id_col_name is None or cama_id_col_name is None:
+        return "Error: Unique ID column mapping is incomplete or invalid."
+    if mls_id_col_name not in df_mls.columns:
+        return f"Error: Unique ID column '{mls_id_col_name}' not found in MLS data."
+    if cama_id_col_name not in df_cama.columns:
+        return f"Error: Unique ID column '{cama_id_col_name}' not found in CAMA data."
+    return None
+
+
+def compare_data_enhanced(df_mls, df_cama, unique_id_col=None, cols_to_compare_mapping=None,
+                          cols_to_compare_sum=None, cols_to_compare_categorical=None,
+                          tolerance=NUMERIC_TOLERANCE, skip_zeros=SKIP_ZERO_VALUES,
+                          address_columns=None, include_nopar=True, include_zillow_url=True,
+                          debug_mode=False, vectorized=True, duplicate_policy=DUPLICATE_POLICY):
+    """
+    Compares MLS and CAMA dataframes with enhanced mismatch reporting.
+    Returns separate DataFrames for different discrepancy types AND perfect matches.
+
+    Args:
+        df_mls: MLS DataFrame
+        df_cama: CAMA DataFrame
+        unique_id_col: Dict with 'mls_col' and 'cama_col' keys (default UNIQUE_ID_COLUMN)
+        cols_to_compare_mapping: List of dicts for 1-to-1 column comparisons (default COLUMNS_TO_COMPARE)
+        cols_to_compare_sum: List of dicts with 'mls_col' and 'cama_cols' (list) for sum comparisons
+        cols_to_compare_categorical: List of dicts for categorical comparisons
+        tolerance: Absolute tolerance for numeric comparisons
+        skip_zeros: Skip comparisons where either side is 0
+        address_columns: Dict mapping address components to MLS column names (default ADDRESS_COLUMNS)
+        include_nopar: Include CAMA NOPAR in mismatch/perfect-match records
+        include_zillow_url: Include a Zillow_URL column in mismatch/perfect-match records
+        debug_mode: Boolean for debug output
+        vectorized: Use the column-wise engine (False falls back to the row-by-row loop)
+        duplicate_policy: How parcels listed more than once are resolved before the join
+            (one of DUPLICATE_POLICIES, see resolve_duplicates)
+
+    Returns:
+        (df_missing_cama, df_missing_mls, df_value_mismatches, matched_df, df_perfect_matches)
+    """
+    unique_id_col = unique_id_col or UNIQUE_ID_COLUMN
+    if cols_to_compare_mapping is None:
+        cols_to_compare_mapping = COLUMNS_TO_COMPARE
+
+    error = _comparison_input_error(df_mls, df_cama, unique_id_col, cols_to_compare_mapping)
+    if error:
+        print(error)
+        return pd.DataFrame(), pd.DataFrame(), pd.DataFrame(), pd.DataFrame(), pd.DataFrame()
+
+    if duplicate_policy != 'keep_all':
+        with profile_stage('resolve duplicates') as stage:
+            df_mls, df_cama = resolve_duplicates(df_mls, df_cama, unique_id_col, duplicate_policy,
+                                                 cols_to_compare_mapping, cols_to_compare_sum)
+            stage['rows'] = len(df_mls) + len(df_cama)
+
+    # NOTE: No overlapping column names means NO SUFFIXES are added!
+    with profile_stage('inner merge (matched records)') as stage:
+        matched_df = merge_on_parcel_keys(df_mls, df_cama, unique_id_col, how='inner')
+        stage['rows'] = len(matched_df)
+
+    engine = compare_data_vectorized if vectorized else compare_data_rowwise
+    with profile_stage('vectorized engine' if vectorized else 'row-by-row engine') as stage:
+        df_missing_cama, df_missing_mls, df_value_mismatches, df_perfect_matches = engine(
+            df_mls, df_cama, unique_id_col, cols_to_compare_mapping,
+            cols_to_compare_sum=cols_to_compare_sum,
+            cols_to_compare_categorical=cols_to_compare_categorical,
+            tolerance=tolerance, skip_zeros=skip_zeros, address_columns=address_columns,
+            include_nopar=include_nopar, include_zillow_url=include_zillow_url,
+            debug_mode=debug_mode
+        )
+        stage['mismatches'] = len(df_value_mismatches)
+
+    return df_missing_cama, df_missing_mls, df_value_mismatches, matched_df, df_perfect_matches
+
+
+def _concat_frames(frames):
+    """Concatenate per-chunk results, skipping empty ones (pd.DataFrame() if all are empty)."""
+    frames = [df for df in frames if not df.empty]
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+
+def _pad_like_outer_merge(df, columns):
+    """
+    Cast the given integer columns to float64, as a full outer merge does when it
+    pads their side with NaN for rows the other side has no match for.
+    """
+    upcast = {column: 'float64' for column in columns
+              if column in df.columns and isinstance(df[column].dtype, np.dtype) and df[column].dtype.kind in 'iu'}
+    return df.astype(upcast) if upcast else df
+
+
+def compare_data_streaming(df_mls, cama_chunks, unique_id_col=None, cols_to_compare_mapping=None,
+                           cols_to_compare_sum=None, cols_to_compare_categorical=None,
+                           tolerance=NUMERIC_TOLERANCE, skip_zeros=SKIP_ZERO_VALUES,
+                           address_columns=None, include_nopar=True, include_zillow_url=True,
+                           debug_mode=False, vectorized=True, duplicate_policy=DUPLICATE_POLICY,
+                           on_chunk=None):
+    """
+    compare_data_enhanced for CAMA data read in chunks (see read_cama_chunks).
+
+    The MLS frame is indexed by parcel ID once. Each CAMA chunk is probed against
+    that hash index and compared only with the MLS rows it matches, so memory is
+    bounded by the chunk size instead of the county size. CAMA rows without an MLS
+    match are missing in MLS right away; MLS rows that no chunk matched are missing
+    in CAMA once every chunk has been read.
+
+    Args:
+        df_mls: MLS DataFrame
+        cama_chunks: Iterable of CAMA DataFrames
+        duplicate_policy: Applied to the MLS frame and to each CAMA chunk; CAMA duplicates
+            that fall in different chunks are kept
+        on_chunk: Optional callback(chunk_no, df_missing_mls, df_value_mismatches, df_perfect_matches)
+            called as each chunk is finished, for incremental output
+        Other arguments are the same as compare_data_enhanced.
+
+    Returns:
+        (df_missing_cama, df_missing_mls, df_value_mismatches, matched_df, df_perfect_matches)
+        matched_df only holds the matched parcel IDs. Records come out chunk by chunk
+        (CAMA file order), not sorted by parcel ID as with a full outer merge, but
+        with the same dtypes.
+    """
+    unique_id_col = unique_id_col or UNIQUE_ID_COLUMN
+    if cols_to_compare_mapping is None:
+        cols_to_compare_mapping = COLUMNS_TO_COMPARE
+    empty_result = (pd.DataFrame(), pd.DataFrame(), pd.DataFrame(), pd.DataFrame(), pd.DataFrame())
+
+    mls_id_col_name = unique_id_col.get('mls_col')
+    cama_id_col_name = unique_id_col.get('cama_col')
+    engine = compare_data_vectorized if vectorized else compare_data_rowwise
+    resolve_options = dict(unique_id_col=unique_id_col, policy=duplicate_policy,
+                           cols_to_compare_mapping=cols_to_compare_mapping,
+                           cols_to_compare_sum=cols_to_compare_sum, verbose=False)
+
+    mls_rows = 0 if df_mls is None else len(df_mls)
+    df_mls, _ = resolve_duplicates(df_mls, None, **resolve_options)
+    mls_index = None
+    matched = np.zeros(0 if df_mls is None else len(df_mls), dtype=bool)
+    missing_mls_frames, mismatch_frames, perfect_frames, matched_ids = [], [], [], []
+    total_rows = cama_removed = 0
+
+    for chunk_no, df_chunk in enumerate(cama_chunks):
+        if mls_index is None:
+            error = _comparison_input_error(df_mls, df_chunk, unique_id_col, cols_to_compare_mapping)
+            if error:
+                print(error)
+                return empty_result
+            # Hash index on the (small) MLS side: canonical parcel ID -> MLS row positions.
+            # Blank IDs are left out so they never match.
+            mls_canonical = canonical_parcel_ids(df_mls[mls_id_col_name])
+            mls_positions = np.flatnonzero(mls_canonical.notna().to_numpy())
+            mls_index = pd.Index(mls_canonical.iloc[mls_positions])
+            mls_keys = df_mls[mls_id_col_name].to_numpy(dtype=object)
+
+        total_rows += len(df_chunk)
+        _, resolved_chunk = resolve_duplicates(None, df_chunk, **resolve_options)
+        cama_removed += len(df_chunk) - len(resolved_chunk)
+        df_chunk = resolved_chunk
+
+        # One indexer entry per matched (CAMA row, MLS row) pair, -1 for no match
+        indexer, _ = mls_index.get_indexer_non_unique(canonical_parcel_ids(df_chunk[cama_id_col_name]))
+        indexer = np.where(indexer >= 0, mls_positions[indexer], -1)
+        hits = indexer >= 0
+        matched[indexer[hits]] = True
+        matched_ids.append(mls_keys[indexer[hits]])
+
+        _, df_missing_mls, df_value_mismatches, df_perfect_matches = engine(
+            df_mls.iloc[np.unique(indexer[hits])], df_chunk, unique_id_col, cols_to_compare_mapping,
+            cols_to_compare_sum=cols_to_compare_sum,
+            cols_to_compare_categorical=cols_to_compare_categorical,
+            tolerance=tolerance, skip_zeros=skip_zeros, address_columns=address_columns,
+            include_nopar=include_nopar, include_zillow_url=include_zillow_url,
+            debug_mode=debug_mode
+        )
+        missing_mls_frames.append(df_missing_mls)
+        mismatch_frames.append(df_value_mismatches)
+        perfect_frames.append(df_perfect_matches)
+        if on_chunk is not None:
+            on_chunk(chunk_no, df_missing_mls, df_value_mismatches, df_perfect_matches)
+
+    if mls_index is None:
+        print("Cannot compare data: one or both dataframes are missing.")
+        return empty_result
+    print(f"✓ Streamed {total_rows:,} CAMA records in {chunk_no + 1} chunk(s)")
+    if duplicate_policy != 'keep_all':
+        print(f"🧹 Duplicate IDs ({duplicate_policy}): collapsed {mls_rows - len(df_mls):,} MLS "
+              f"and {cama_removed:,} CAMA rows")
+
+    # MLS rows never matched by any chunk
+    unmatched = np.flatnonzero(~matched)
+    n_mls = len(df_mls)
+    df_missing_cama = _build_frame({
+        'Parcel_ID': mls_keys[unmatched],
+        'Listing_Number': _column_or_constant(df_mls, 'Listing #', '', n_mls)[unmatched],
+        'Closed_Date': _column_or_constant(df_mls, 'Closed Date', '', n_mls)[unmatched],
+    }, ['Parcel_ID', 'Listing_Number', 'Closed_Date'])
+
+    matched_df = pd.DataFrame({cama_id_col_name: np.concatenate(matched_ids).tolist()})
+    df_missing_mls = _concat_frames(missing_mls_frames)
+
+    # Each chunk only saw its own unmatched rows; give the records the dtypes of
+    # compare_data_enhanced's single outer merge over all of them
+    results = [df_missing_cama, _concat_frames(mismatch_frames), _concat_frames(perfect_frames)]
+    if len(df_missing_mls):
+        results = [_pad_like_outer_merge(df, MLS_RECORD_COLUMNS) for df in results]
+    if len(unmatched):
+        results = [_pad_like_outer_merge(df, CAMA_RECORD_COLUMNS) for df in results]
+    df_missing_cama, df_value_mismatches, df_perfect_matches = results
+    return df_missing_cama, df_missing_mls, df_value_mismatches, matched_df, df_perfect_matches
+
+# --- Parallel Comparison ---
+
+SHARD_RESULTS = ['missing_cama', 'missing_mls', 'value_mismatches', 'matched', 'perfect_matches']
+
+
+def _shard_numbers(ids, n_shards):
+    """
+    Shard (0..n_shards-1) of every parcel ID, from a hash of its canonical form
+    (canonical_parcel_ids), so IDs the join matches always land in the same shard.
+    """
+    keys = canonical_parcel_ids(ids).fillna('').astype(str)
+    hashes = pd.util.hash_pandas_object(keys, index=False).to_numpy()
+    return (hashes % np.uint64(n_shards)).astype(np.int64)
+
+
+def _split_shards(df, shards, n_shards):
+    """One frame per shard, rows kept in their original order."""
+    order = np.argsort(shards, kind='stable')
+    bounds = np.searchsorted(shards[order], np.arange(n_shards + 1))
+    return [df.iloc[order[bounds[i]:bounds[i + 1]]] for i in range(n_shards)]
+
+
+def _compare_shard(shard_dir, shard_no, unique_id_col, cols_to_compare_mapping, options, profile=False):
+    """
+    Worker process: compare one shard read from Arrow IPC and write its results the same way.
+
+    Returns:
+        (dtypes, records): each result's {column: dtype} before the Arrow round trip,
+        and the worker's stage records when `profile` is set (None otherwise)
+    """
+    if profile:
+        start_profile()
+    base = os.path.join(shard_dir, f'shard{shard_no}')
+    results = compare_data_enhanced(read_frame_ipc(base + '_mls'), read_frame_ipc(base + '_cama'),
+                                    unique_id_col, cols_to_compare_mapping, **options)
+    for name, df in zip(SHARD_RESULTS, results):
+        write_frame_ipc(df, f'{base}_{name}')
+    return [df.dtypes.to_dict() for df in results], (stop_profile() if profile else None)
+
+
+def compare_data_parallel(df_mls, df_cama, unique_id_col=None, cols_to_compare_mapping=None,
+                          cols_to_compare_sum=None, cols_to_compare_categorical=None,
+                          tolerance=NUMERIC_TOLERANCE, skip_zeros=SKIP_ZERO_VALUES,
+                          address_columns=None, include_nopar=True, include_zillow_url=True,
+                          debug_mode=False, vectorized=True, duplicate_policy=DUPLICATE_POLICY,
+                          n_workers=None, n_shards=None):
+    """
+    compare_data_enhanced spread over worker processes.
+
+    Both frames are hash-partitioned on the normalized parcel key, so all MLS and
+    CAMA rows of a parcel land in the same shard. Each shard is written once as an
+    Arrow IPC file (write_frame_ipc); a worker process memory-maps it, runs the
+    join and every rule, and writes its results back the same way. Mixed-type
+    columns travel as text plus a type tag; only cells of types write_frame_ipc
+    cannot tag (arbitrary Python objects) are pickled. Shard results are
+    concatenated in shard order and sorted by parcel ID, which reproduces the
+    records and order of compare_data_enhanced. When profiling, each worker's
+    stage records are summed across shards under the 'compare shards' stage.
+
+    Duplicate IDs are resolved once, before the frames are partitioned.
+    Falls back to compare_data_enhanced without pyarrow or with fewer than 2 workers.
+    Process start-up costs about a second, so this pays off on county-wide extracts.
+
+    Args:
+        n_workers: Worker processes (default: one per CPU)
+        n_shards: Key partitions (default n_workers; more shards than workers evens out
+            uneven shards)
+        Other arguments are the same as compare_data_enhanced.
+
+    Returns:
+        (df_missing_cama, df_missing_mls, df_value_mismatches, matched_df, df_perfect_matches)
+        matched_df is sorted by parcel ID.
+    """
+    unique_id_col = unique_id_col or UNIQUE_ID_COLUMN
+    if cols_to_compare_mapping is None:
+        cols_to_compare_mapping = COLUMNS_TO_COMPARE
+    options = dict(cols_to_compare_sum=cols_to_compare_sum,
+                   cols_to_compare_categorical=cols_to_compare_categorical,
+                   tolerance=tolerance, skip_zeros=skip_zeros, address_columns=address_columns,
+                   include_nopar=include_nopar, include_zillow_url=include_zillow_url,
+                   debug_mode=debug_mode, vectorized=vectorized, duplicate_policy=duplicate_policy)
+
+    n_workers = n_workers or os.cpu_count() or 1
+    if pa is None or n_workers < 2:
+        if pa is None:
+            print("ℹ️  pyarrow is not installed: comparing in a single process")
+        return compare_data_enhanced(df_mls, df_cama, unique_id_col, cols_to_compare_mapping, **options)
+
+    error = _comparison_input_error(df_mls, df_cama, unique_id_col, cols_to_compare_mapping)
+    if error:
+        print(error)
+        return pd.DataFrame(), pd.DataFrame(), pd.DataFrame(), pd.DataFrame(), pd.DataFrame()
+
+    mls_id_col_name = unique_id_col['mls_col']
+    cama_id_col_name = unique_id_col['cama_col']
+    n_shards = n_shards or n_workers
+    n_workers = min(n_workers, n_shards)
+
+    if duplicate_policy != 'keep_all':
+        with profile_stage('resolve duplicates') as stage:
+            df_mls, df_cama = resolve_duplicates(df_mls, df_cama, unique_id_col, duplicate_policy,
+                                                 cols_to_compare_mapping, cols_to_compare_sum)
+            stage['rows'] = len(df_mls) + len(df_cama)
+        options['duplicate_policy'] = 'keep_all'
+
+    # ignore_cleanup_errors: on Windows a result still memory-mapped cannot be deleted yet
+    with tempfile.TemporaryDirectory(prefix='mls_cama_shards_', ignore_cleanup_errors=True) as shard_dir:
+        with profile_stage('partition shards') as stage:
+            mls_shards = _split_shards(df_mls, _shard_numbers(df_mls[mls_id_col_name], n_shards), n_shards)
+            cama_shards = _split_shards(df_cama, _shard_numbers(df_cama[cama_id_col_name], n_shards), n_shards)
+            for shard_no in range(n_shards):
+                base = os.path.join(shard_dir, f'shard{shard_no}')
+                write_frame_ipc(mls_shards[shard_no], base + '_mls')
+                write_frame_ipc(cama_shards[shard_no], base + '_cama')
+            stage['rows'] = len(df_mls) + len(df_cama)
+
+        with profile_stage(f'compare shards ({n_workers} workers)') as stage:
+            with ProcessPoolExecutor(max_workers=n_workers) as pool:
+                futures = [pool.submit(_compare_shard, shard_dir, shard_no, unique_id_col,
+                                       cols_to_compare_mapping, options, profile_active())
+                           for shard_no in range(n_shards)]
+                shard_dtypes, shard_records = zip(*(future.result() for future in futures))
+                merge_worker_records(shard_records)
+
+        with profile_stage('combine shard results') as stage:
+            results = []
+            for result_no, name in enumerate(SHARD_RESULTS):
+                # Arrow types homogeneous object columns (e.g. numeric IDs in an object ID column):
+                # restore each shard's dtypes so concat resolves them as the single-process run does
+                combined = _concat_frames([
+                    read_frame_ipc(os.path.join(shard_dir, f'shard{shard_no}_{name}')).astype(
+                        shard_dtypes[shard_no][result_no])
+                    for shard_no in range(n_shards)])
+                results.append(_sort_by_parcel(combined, cama_id_col_name if name == 'matched' else 'Parcel_ID'))
+            stage['rows'] = len(results[3])
+
+    print(f"✓ Compared {n_shards} shard(s) in {n_workers} worker processes")
+    df_missing_cama, df_missing_mls, df_value_mismatches, matched_df, df_perfect_matches = results
+    return df_missing_cama, df_missing_mls, df_value_mismatches, matched_df, df_perfect_matches
+
+# --- Incremental Comparison ---
+
+SNAPSHOT_VERSION = 3
+
+
+def _key_hashes(df, id_col, columns):
+    """
+    One uint64 fingerprint per canonical parcel ID over the given columns.
+    Rows sharing an ID are combined with an order-insensitive sum.
+    """
+    hash_columns = [id_col] + [c for c in dict.fromkeys(columns) if c in df.columns and c != id_col]
+    row_hashes = pd.util.hash_pandas_object(df[hash_columns], index=False)
+    return row_hashes.groupby(canonical_parcel_ids(df[id_col]).to_numpy(), dropna=False, sort=False).sum()
+
+
+def _changed_keys(new_hashes, old_hashes):
+    """IDs whose fingerprint differs, plus IDs added or removed since the snapshot."""
+    aligned = pd.concat([new_hashes.rename('new'), old_hashes.rename('old')], axis=1)
+    return aligned.index[aligned['new'].ne(aligned['old'])]
+
+
+def _sort_by_parcel(df, column='Parcel_ID'):
+    """Stable sort on canonical Parcel_ID (or `column`), the order the outer key join produces."""
+    if df.empty or column not in df.columns:
+        return df
+    codes, _ = encode_parcel_keys(df[column], df[column].iloc[:0])
+    return df.iloc[np.argsort(codes, kind='stable')].reset_index(drop=True)
+
+
+def load_snapshot(snapshot_path):
+    """Read a comparison snapshot written by compare_data_incremental (None if unusable)."""
+    try:
+        with open(snapshot_path, 'rb') as f:
+            snapshot = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+        return None
+    if not isinstance(snapshot, dict) or snapshot.get('version') != SNAPSHOT_VERSION:
+        return None
+    return snapshot
+
+
+def save_snapshot(snapshot_path, snapshot):
+    """Write a snapshot atomically (a crash never leaves a half-written file)."""
+    directory = os.path.dirname(os.path.abspath(snapshot_path))
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = snapshot_path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, snapshot_path)
+
+
+def compare_data_incremental(df_mls, df_cama, snapshot_path, unique_id_col=None,
+                             cols_to_compare_mapping=None, cols_to_compare_sum=None,
+                             cols_to_compare_categorical=None, tolerance=NUMERIC_TOLERANCE,
+                             skip_zeros=SKIP_ZERO_VALUES, address_columns=None, include_nopar=True,
+                             include_zillow_url=True, debug_mode=False, vectorized=True,
+                             duplicate_policy=DUPLICATE_POLICY):
+    """
+    compare_data_enhanced that only re-compares parcels changed since the last run.
+
+    The snapshot at `snapshot_path` holds a fingerprint of every parcel's MLS and
+    CAMA rows (all columns) plus the previous results, including the matched
+    records. Parcels whose fingerprint changed, or that were added or removed on
+    either side, are joined, de-duplicated and compared again; the previous results
+    and matched records of every other parcel are carried forward, so the work
+    beyond fingerprinting scales with the number of changed parcels. A missing
+    snapshot, or one taken with different settings or columns, triggers a full
+    comparison. The snapshot is rewritten after every run.
+
+    Args:
+        snapshot_path: Snapshot file (created on the first run)
+        Other arguments are the same as compare_data_enhanced.
+
+    Returns:
+        (df_missing_cama, df_missing_mls, df_value_mismatches, matched_df, df_perfect_matches)
+        After an incremental run, matched_df is sorted by parcel ID.
+    """
+    unique_id_col = unique_id_col or UNIQUE_ID_COLUMN
+    if cols_to_compare_mapping is None:
+        cols_to_compare_mapping = COLUMNS_TO_COMPARE
+    address_columns = address_columns or ADDRESS_COLUMNS
+    options = dict(cols_to_compare_sum=cols_to_compare_sum,
+                   cols_to_compare_categorical=cols_to_compare_categorical,
+                   tolerance=tolerance, skip_zeros=skip_zeros, address_columns=address_columns,
+                   include_nopar=include_nopar, include_zillow_url=include_zillow_url,
+                   debug_mode=debug_mode, vectorized=vectorized, duplicate_policy=duplicate_policy)
+
+    error = _comparison_input_error(df_mls, df_cama, unique_id_col, cols_to_compare_mapping)
+    if error:
+        print(error)
+        return pd.DataFrame(), pd.DataFrame(), pd.DataFrame(), pd.DataFrame(), pd.DataFrame()
+
+    mls_id_col_name = unique_id_col['mls_col']
+    cama_id_col_name = unique_id_col['cama_col']
+
+    # Anything that changes how a parcel is compared invalidates the whole snapshot
+    settings = repr((unique_id_col, cols_to_compare_mapping, cols_to_compare_sum,
+                     cols_to_compare_categorical, tolerance, skip_zeros, address_columns,
+                     include_nopar, include_zillow_url, duplicate_policy, DUPLICATE_FANOUT_CAP,
+                     DUPLICATE_ORDER_COLUMNS, list(df_mls.columns), list(df_cama.columns)))
+    fingerprint = hashlib.sha256(settings.encode('utf-8')).hexdigest()
+
+    # Every column: carried-forward matched records and duplicate ordering must still be current
+    mls_hashes = _key_hashes(df_mls, mls_id_col_name, df_mls.columns)
+    cama_hashes = _key_hashes(df_cama, cama_id_col_name, df_cama.columns)
+
+    snapshot = load_snapshot(snapshot_path)
+    if snapshot is None or snapshot.get('fingerprint') != fingerprint:
+        reason = "no previous snapshot" if snapshot is None else "comparison settings changed"
+        print(f"♻️  Incremental mode: full comparison ({reason})")
+        results = compare_data_enhanced(df_mls, df_cama, unique_id_col, cols_to_compare_mapping, **options)
+    else:
+        changed = _changed_keys(mls_hashes, snapshot['mls_hashes']).union(
+            _changed_keys(cama_hashes, snapshot['cama_hashes']))
+        total = len(mls_hashes.index.union(cama_hashes.index))
+        print(f"♻️  Incremental mode: re-comparing {len(changed)} of {total} parcels "
+              f"(others carried forward from the last run)")
+
+        # Duplicate resolution, the join and every rule only see the changed parcels
+        current = compare_data_enhanced(
+            df_mls[canonical_parcel_ids(df_mls[mls_id_col_name]).isin(changed).to_numpy()],
+            df_cama[canonical_parcel_ids(df_cama[cama_id_col_name]).isin(changed).to_numpy()],
+            unique_id_col, cols_to_compare_mapping, **options)
+
+        results = []
+        id_columns = ['Parcel_ID', 'Parcel_ID', 'Parcel_ID', cama_id_col_name, 'Parcel_ID']
+        for previous, recompared, id_column in zip(snapshot['results'], current, id_columns):
+            if not previous.empty:
+                previous = previous[~canonical_parcel_ids(previous[id_column]).isin(changed).to_numpy()]
+            results.append(_sort_by_parcel(_concat_frames([previous, recompared]), id_column))
+        results = tuple(results)
+
+    save_snapshot(snapshot_path, {
+        'version': SNAPSHOT_VERSION,
+        'fingerprint': fingerprint,
+        'mls_hashes': mls_hashes,
+        'cama_hashes': cama_hashes,
+        'results': list(results),
+    })
+    return results
+
+# --- Enhanced Reporting Functions ---
+
+REPORT_SHEETS = [
+    ('missing_in_CAMA', 'Missing in CAMA'),
+    ('missing_in_MLS', 'Missing in MLS'),
+    ('value_mismatches', 'Value Mismatches'),
+    ('perfect_matches', 'Perfect Matches'),
+]
+
+
+def _excel_value(value):
+    """
+    Convert a DataFrame cell the way DataFrame.to_excel does.
+
+    Returns:
+        (value, number_format or None); blank cells (NaN/NaT/None) give (None, None)
+    """
+    if value is None or (pd.api.types.is_scalar(value) and pd.isna(value)):
+        return None, None
+    if isinstance(value, (bool, np.bool_)):
+        return bool(value), None
+    if isinstance(value, (int, np.integer)):
+        return int(value), None
+    if isinstance(value, (float, np.floating)):
+        if np.isinf(value):
+            return ('inf' if value > 0 else '-inf'), None
+        return float(value), None
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            raise ValueError("Excel does not support datetimes with timezones. Please ensure that "
+                             "datetimes are timezone unaware before writing to Excel.")
+        return value, 'YYYY-MM-DD HH:MM:SS'
+    if isinstance(value, date):
+        return value, 'YYYY-MM-DD'
+    if isinstance(value, timedelta):
+        return value.total_seconds() / 86400, '0'
+    return str(value), None
+
+
+def _cell_value(value):
+    """The value Excel/openpyxl reads back for a written cell (whole floats come back as int)."""
+    if isinstance(value, float) and value.is_integer() and abs(value) < 1e16:
+        return int(value)
+    return value
+
+
+def _hyperlink_builders(columns, parcel_url_template=None):
+    """
+    Per-column URL builders: Parcel_ID cells link to CAMA, Address cells to Zillow.
+
+    Returns:
+        {column position: function(row values) -> URL or None}
+    """
+    builders = {}
+
+    if 'Parcel_ID' in columns and parcel_url_template:
+        parcel_col_idx = columns.index('Parcel_ID')
+
+        def parcel_url(row):
+            parcel_value = _cell_value(row[parcel_col_idx])
+            if parcel_value and str(parcel_value).strip():
+                return parcel_url_template.format(parcel_id=parcel_value)
+            return None
+
+        builders[parcel_col_idx] = parcel_url
+
+    if 'Address' in columns and all(col in columns for col in ['City', 'Zip']):
+        address_col_idx = columns.index('Address')
+        city_col_idx = columns.index('City')
+        zip_col_idx = columns.index('Zip')
+
+        def zillow_url(row):
+            address_value = _cell_value(row[address_col_idx])
+            if address_value and str(address_value).strip():
+                return format_zillow_url(address_value, _cell_value(row[city_col_idx]), 'OH',
+                                         _cell_value(row[zip_col_idx])) or None
+            return None
+
+        builders[address_col_idx] = zillow_url
+
+    return builders
+
+
+def _write_report_sheet(wb, df, sheet_name, parcel_url_template=None):
+    """
+    Stream one DataFrame into a new sheet of a write-only workbook.
+    Rows, hyperlinks and the shared 'Hyperlink' style are written in a single pass.
+    """
+    from openpyxl.cell import WriteOnlyCell
+
+    ws = wb.create_sheet(title=sheet_name)
+    columns = list(df.columns)
+    ws.append([_excel_value(col)[0] for col in columns])
+
+    builders = _hyperlink_builders(columns, parcel_url_template)
+    for values in df.itertuples(index=False, name=None):
+        converted = [_excel_value(value) for value in values]
+        row_values = [value for value, _ in converted]
+        row = []
+        for col_idx, (value, number_format) in enumerate(converted):
+            url = builders[col_idx](row_values) if col_idx in builders else None
+            if number_format is None and url is None:
+                row.append(value)
+                continue
+            cell = WriteOnlyCell(ws, value)
+            if number_format:
+                cell.number_format = number_format
+            if url:
+                cell.hyperlink = url
+                cell.style = 'Hyperlink'
+            row.append(cell)
+        ws.append(row)
+    return ws
+
+
+def write_excel_with_hyperlinks(df, target, sheet_name='Data', parcel_url_template=None):
+    """
+    Write one DataFrame to an Excel workbook with Parcel_ID and Address hyperlinks.
+    Uses openpyxl's write-only mode: one pass, rows are streamed to disk as they are added.
+
+    Args:
+        df: DataFrame to write
+        target: File path or writable binary buffer (e.g. BytesIO)
+        sheet_name: Worksheet name
+        parcel_url_template: CAMA URL template with a {parcel_id} placeholder
+    """
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    _write_report_sheet(wb, df, sheet_name, parcel_url_template)
+    wb.save(target)
+
+
+def _write_summary_sheet(wb, frames):
+    """Summary sheet: record count per report, then value mismatches by Field_MLS."""
+    ws = wb.create_sheet(title='Summary')
+    ws.append(['Report', 'Count'])
+    for (_, sheet_name), df in zip(REPORT_SHEETS, frames):
+        ws.append([sheet_name, len(df)])
+
+    df_value_mismatches = frames[2]
+    if not df_value_mismatches.empty and 'Field_MLS' in df_value_mismatches.columns:
+        ws.append([])
+        ws.append(['Field_MLS', 'Mismatches'])
+        for field, count in df_value_mismatches['Field_MLS'].value_counts().items():
+            ws.append([_excel_value(field)[0], int(count)])
+    return ws
+
+
+def write_report_workbook(df_missing_cama, df_missing_mls, df_value_mismatches, df_perfect_matches,
+                          target, parcel_url_template=None):
+    """
+    Write every report into one workbook: a Summary sheet followed by one sheet per
+    non-empty result frame. All sheets are streamed in a single pass and share the
+    workbook's string and style tables.
+
+    Args:
+        target: File path or writable binary buffer (e.g. BytesIO)
+        parcel_url_template: CAMA URL template with a {parcel_id} placeholder
+    """
+    from openpyxl import Workbook
+
+    frames = [df_missing_cama, df_missing_mls, df_value_mismatches, df_perfect_matches]
+    wb = Workbook(write_only=True)
+    _write_summary_sheet(wb, frames)
+    for (_, sheet_name), df in zip(REPORT_SHEETS, frames):
+        if not df.empty:
+            _write_report_sheet(wb, df, sheet_name, parcel_url_template)
+    wb.save(target)
+
+
+def create_report_workbook(df_missing_cama, df_missing_mls, df_value_mismatches, df_perfect_matches,
+                           parcel_url_template=None):
+    """Create the combined report workbook in memory (for download buttons)."""
+    output = BytesIO()
+    write_report_workbook(df_missing_cama, df_missing_mls, df_value_mismatches, df_perfect_matches,
+                          output, parcel_url_template)
+    output.seek(0)
+    return output
+
+
+def create_excel_with_hyperlinks(df, parcel_url_template, sheet_name='Data'):
+    """Create an in-memory Excel file with hyperlinks (for download buttons)."""
+    output = BytesIO()
+    write_excel_with_hyperlinks(df, output, sheet_name, parcel_url_template)
+    output.seek(0)
+    return output
+
+
+def report_discrepancies_enhanced(df_missing_cama, df_missing_mls, df_value_mismatches,
+                                  df_perfect_matches, output_prefix='discrepancies',
+                                  parcel_url_template=None, single_workbook=False):
+    """
+    Generates separate reports for each type of discrepancy AND perfect matches with hyperlinks.
+    With single_workbook=True, writes one {output_prefix}.xlsx with a Summary sheet instead.
+
+    Returns:
+        List of the files written
+    """
+    reports_generated = []
+    frames = [df_missing_cama, df_missing_mls, df_value_mismatches, df_perfect_matches]
+    labels = ['records', 'records', 'mismatches', 'records']
+
+    if all(df.empty for df in frames):
+        print("\nNo discrepancies found - no reports generated.")
+        return reports_generated
+
+    if single_workbook:
+        filename = f"{output_prefix}.xlsx"
+        write_report_workbook(*frames, filename, parcel_url_template)
+        for (_, sheet_name), df, label in zip(REPORT_SHEETS, frames, labels):
+            if not df.empty:
+                print(f"✓ {sheet_name} sheet written ({len(df)} {label})")
+        print(f"✓ Combined report saved: {filename}")
+        return [filename]
+
+    for (suffix, sheet_name), df, label in zip(REPORT_SHEETS, frames, labels):
+        if df.empty:
+            continue
+
+        filename = f"{output_prefix}_{suffix}.xlsx"
+        write_excel_with_hyperlinks(df, filename, sheet_name, parcel_url_template)
+
+        print(f"✓ {sheet_name} report saved: {filename} ({len(df)} {label})")
+        reports_generated.append(filename)
+
+    return reports_generated
@@ -0,0 +1,105 @@
+"""
+MLS/CAMA HTTP Client
+Pooled requests sessions shared by the Zillow photo downloader and the CAMA
+windowId extractor: keep-alive connections, default browser headers, a default
+timeout and retry with backoff on 429/5xx responses.
+"""
+
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Browser-like headers sent with every request (Accept-Encoding is left to requests,
+# which only advertises the encodings it can decode)
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.9',
+}
+DEFAULT_TIMEOUT = 15          # Seconds, unless a request passes its own timeout
+RETRY_TOTAL = 3               # Retries per request on connection errors and RETRY_STATUSES
+RETRY_BACKOFF = 1.0           # Waits 1s, 2s, 4s... between retries (Retry-After is honoured)
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+# The shared session leaves throttling replies (429/503) to the caller's rate limiter
+SHARED_RETRY_STATUSES = (500, 502, 504)
+POOL_SIZE = 10                # Keep-alive connections kept per host
+
+_shared_session = None
+_shared_lock = threading.Lock()
+
+
+class TimeoutHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter that applies a default timeout to requests that don't set one."""
+
+    def __init__(self, *args, timeout=DEFAULT_TIMEOUT, **kwargs):
+        self.timeout = timeout
+        super().__init__(*args, **kwargs)
+
+    def send(self, request, **kwargs):
+        if kwargs.get('timeout') is None:
+            kwargs['timeout'] = self.timeout
+        return super().send(request, **kwargs)
+
+
+def create_session(headers=None, timeout=DEFAULT_TIMEOUT, retries=RETRY_TOTAL,
+                   backoff_factor=RETRY_BACKOFF, pool_size=POOL_SIZE, retry_statuses=RETRY_STATUSES):
+    """
+    Create a requests.Session with connection pooling, default headers,
+    a default timeout and retry/backoff.
+
+    Only idempotent methods (GET, HEAD...) are retried; a POST such as a login
+    form is sent once. After the last retry the final response is returned as
+    usual, so callers keep checking status_code themselves.
+
+    Args:
+        headers: Headers to send with every request (defaults to DEFAULT_HEADERS)
+        timeout: Default timeout in seconds
+        retries: Retries on connection errors and 429/5xx responses (0 disables)
+        backoff_factor: Base of the exponential backoff between retries
+        pool_size: Keep-alive connections kept per host (match the worker count)
+        retry_statuses: Response codes that are retried
+
+    Returns:
+        requests.Session
+    """
+    retry = Retry(
+        total=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=retry_statuses,
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = TimeoutHTTPAdapter(timeout=timeout, max_retries=retry,
+                                 pool_connections=pool_size, pool_maxsize=pool_size)
+
+    session = requests.Session()
+    session.headers.update(DEFAULT_HEADERS if headers is None else headers)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def get_shared_session():
+    """
+    Return the process-wide pooled session, creating it on first use.
+    It retries only SHARED_RETRY_STATUSES; 429/503 come back to the caller.
+    """
+    global _shared_session
+    with _shared_lock:
+        if _shared_session is None:
+            _shared_session = create_session(retry_statuses=SHARED_RETRY_STATUSES)
+        return _shared_session
+
+
+def set_shared_session(session):
+    """
+    Replace the process-wide session (e.g. one created with a larger pool_size
+    for many workers). Passing None closes it; a new one is created on next use.
+    """
+    global _shared_session
+    with _shared_lock:
+        if _shared_session is not None and _shared_session is not session:
+            _shared_session.close()
+        _shared_session = session
@@ -0,0 +1,271 @@
+"""
+MLS/CAMA Pipeline Profiler
+Records wall time, CPU time, memory and row counts for each pipeline stage
+and each comparison rule, prints them as a table and saves them as JSON or CSV.
+
+Memory per stage:
+- peak_rss_mb: highest resident memory while the stage ran. On Linux the
+  process's peak is reset at every stage boundary (/proc/self/clear_refs), so
+  this is the stage's own peak; elsewhere it is the process's peak so far.
+- rss_delta_mb: resident memory at the end of the stage minus at its start
+  (memory the stage kept); needs Linux or psutil.
+- child_peak_rss_mb: peak of the largest worker process that finished during
+  the stage (RUSAGE_CHILDREN), when it is larger than any earlier worker's.
+  Workers that profile themselves reset their own peak, so their stage records
+  (see merge_worker_records) hold their true peaks.
+
+Profiling is off until start_profile() is called; the instrumentation calls in
+the loaders and comparison engine do nothing otherwise.
+"""
+
+import csv
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+PROFILE_FIELDS = ['stage', 'level', 'wall_s', 'cpu_s', 'peak_rss_mb', 'rss_delta_mb', 'child_peak_rss_mb',
+                  'rows', 'mismatches']
+
+_records = None
+_depth = 0
+_open_peaks = []       # Running peak (MB) of every stage still open
+_can_reset_peak = None
+
+
+def _maxrss_mb(who):
+    """ru_maxrss of this process or of its finished children, in MB (None if unavailable)."""
+    peak = resource.getrusage(who).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def _peak_rss_mb():
+    """Peak resident memory of this process since start or the last reset, in MB (None if unavailable)."""
+    if resource is not None:
+        return _maxrss_mb(resource.RUSAGE_SELF)
+    try:
+        import psutil
+        return round(psutil.Process().memory_info().peak_wset / (1024 * 1024), 1)
+    except (ImportError, AttributeError):
+        return None
+
+
+def child_peak_rss_mb():
+    """Peak resident memory of the largest finished child process, in MB (None if unavailable)."""
+    return _maxrss_mb(resource.RUSAGE_CHILDREN) if resource is not None else None
+
+
+def _current_rss_mb():
+    """Resident memory of this process right now, in MB (None if unavailable)."""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return round(int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024), 1)
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import psutil
+        return round(psutil.Process().memory_info().rss / (1024 * 1024), 1)
+    except ImportError:
+        return None
+
+
+def _reset_peak():
+    """Reset this process's peak RSS to its current RSS (Linux only); False when not possible."""
+    global _can_reset_peak
+    if _can_reset_peak is False:
+        return False
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        _can_reset_peak = True
+    except OSError:
+        _can_reset_peak = False
+    return _can_reset_peak
+
+
+def _mark_peak():
+    """Fold the peak since the last mark into every open stage, then start a new interval."""
+    peak = _peak_rss_mb()
+    if peak is not None:
+        for running in _open_peaks:
+            running[0] = max(running[0], peak)
+    _reset_peak()
+
+
+def _open_memory():
+    """Start tracking a stage's memory; pass the result to _close_memory()."""
+    _mark_peak()
+    running = [_current_rss_mb() or 0.0]
+    _open_peaks.append(running)
+    return running, _current_rss_mb(), child_peak_rss_mb()
+
+
+def _close_memory(tracker):
+    """(peak_rss_mb, rss_delta_mb, child_peak_rss_mb) of a stage started with _open_memory()."""
+    running, rss_start, child_start = tracker
+    _mark_peak()
+    _open_peaks[:] = [r for r in _open_peaks if r is not running]
+    peak = running[0] if _can_reset_peak else _peak_rss_mb()
+    rss_end = _current_rss_mb()
+    delta = round(rss_end - rss_start, 1) if rss_end is not None and rss_start is not None else None
+    child_end = child_peak_rss_mb()
+    child_peak = child_end if child_end is not None and child_end != child_start else None
+    return peak, delta, child_peak
+
+
+def start_profile():
+    """Start collecting stage records (discarding any previous ones)."""
+    global _records, _depth
+    _records = []
+    _depth = 0
+    _open_peaks.clear()
+
+
+def stop_profile():
+    """Stop collecting and return the records gathered since start_profile()."""
+    global _records
+    records, _records = _records, None
+    return records or []
+
+
+def profile_active():
+    """True between start_profile() and stop_profile() (e.g. to tell worker processes to profile)."""
+    return _records is not None
+
+
+def merge_worker_records(record_lists):
+    """
+    Add the stage records returned by worker processes, nested under the current stage.
+    Records of the same stage (same name under the same parents) are combined across workers:
+    wall and CPU time, rows and mismatches are summed, memory figures are the largest.
+    """
+    if _records is None:
+        return
+    merged = {}
+    for records in record_lists:
+        path, seen = [], {}
+        for record in records or []:
+            # A stage is identified by its parent stages and how often it repeated there
+            path[record['level']:] = [record['stage']]
+            seen[tuple(path)] = seen.get(tuple(path), 0) + 1
+            key = (tuple(path), seen[tuple(path)])
+            total = merged.get(key)
+            if total is None:
+                merged[key] = dict(record, level=record['level'] + _depth)
+                continue
+            for field in ('wall_s', 'cpu_s', 'rows', 'mismatches'):
+                if record.get(field) is not None:
+                    total[field] = round((total.get(field) or 0) + record[field], 4)
+            for field in ('peak_rss_mb', 'rss_delta_mb', 'child_peak_rss_mb'):
+                if record.get(field) is not None:
+                    total[field] = max(total.get(field) or 0, record[field])
+    _records.extend(merged.values())
+
+
+def stage_timer():
+    """Start snapshot for record_stage(), or None when profiling is off."""
+    if _records is None:
+        return None
+    return time.perf_counter(), time.process_time(), _open_memory()
+
+
+def record_stage(name, timer, rows=None, mismatches=None):
+    """Record a finished stage started with stage_timer() (no-op when profiling is off)."""
+    if timer is None or _records is None:
+        return
+    wall_start, cpu_start, memory = timer
+    peak, delta, child_peak = _close_memory(memory)
+    _records.append({
+        'stage': name,
+        'level': _depth,
+        'wall_s': round(time.perf_counter() - wall_start, 4),
+        'cpu_s': round(time.process_time() - cpu_start, 4),
+        'peak_rss_mb': peak,
+        'rss_delta_mb': delta,
+        'child_peak_rss_mb': child_peak,
+        'rows': rows,
+        'mismatches': mismatches,
+    })
+
+
+@contextmanager
+def profile_stage(name, rows=None):
+    """
+    Time the enclosed block as one stage; stages recorded inside it are nested under it.
+    The yielded dict accepts 'rows'/'mismatches' once they are known.
+    """
+    global _depth
+    if _records is None:
+        yield {}
+        return
+
+    record = {'stage': name, 'level': _depth}
+    _records.append(record)
+    info = {'rows': rows, 'mismatches': None}
+    timer = stage_timer()
+    _depth += 1
+    try:
+        yield info
+    finally:
+        _depth -= 1
+        wall_start, cpu_start, memory = timer
+        peak, delta, child_peak = _close_memory(memory)
+        record.update({
+            'wall_s': round(time.perf_counter() - wall_start, 4),
+            'cpu_s': round(time.process_time() - cpu_start, 4),
+            'peak_rss_mb': peak,
+            'rss_delta_mb': delta,
+            'child_peak_rss_mb': child_peak,
+            'rows': info.get('rows'),
+            'mismatches': info.get('mismatches'),
+        })
+
+
+def print_profile(records):
+    """Print stage records as an indented table."""
+    if not records:
+        return
+
+    def fmt(value, spec):
+        return format(value, spec) if value is not None else '-'
+
+    print(f"\n{'Stage':<40} {'Wall (s)':>9} {'CPU (s)':>9} {'Peak RSS (MB)':>14} {'RSS +/- (MB)':>13} "
+          f"{'Workers (MB)':>13} {'Rows':>10}")
+    print("-" * 114)
+    for record in records:
+        name = '  ' * record['level'] + record['stage']
+        print(f"{name:<40} {fmt(record.get('wall_s'), '.3f'):>9} {fmt(record.get('cpu_s'), '.3f'):>9} "
+              f"{fmt(record.get('peak_rss_mb'), '.1f'):>14} {fmt(record.get('rss_delta_mb'), '+.1f'):>13} "
+              f"{fmt(record.get('child_peak_rss_mb'), '.1f'):>13} {fmt(record.get('rows'), ','):>10}")
+
+
+def write_profile(path, records):
+    """
+    Save stage records to `path` (.csv for CSV, anything else JSON).
+    A {timestamp} placeholder in the path is filled in, giving one file per run.
+
+    Returns:
+        The path written
+    """
+    path = path.format(timestamp=datetime.now().strftime('%Y%m%d_%H%M%S'))
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+
+    if path.lower().endswith('.csv'):
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=PROFILE_FIELDS)
+            writer.writeheader()
+            writer.writerows(records)
+    else:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'timestamp': datetime.now().isoformat(timespec='seconds'),
+                       'stages': records}, f, indent=2)
+    return path
@@ -0,0 +1,63 @@
+"""
+Comparison Engine Tests
+Checks that the parallel and streaming engines return the same records and dtypes
+as compare_data_enhanced.
+Run:  python -m pytest test_comparison_engines.py
+"""
+
+import pandas as pd
+
+from mls_cama_benchmark import generate_synthetic_data
+from mls_cama_core import (_sort_by_parcel, compare_data_enhanced, compare_data_parallel,
+                           compare_data_streaming)
+
+
+def _text_and_numeric_ids(n_rows=2000, seed=3):
+    """Synthetic extracts whose MLS IDs are text and CAMA IDs are int64 (a common export mix)."""
+    df_mls, df_cama = generate_synthetic_data(n_rows, seed=seed)
+    df_mls['Parcel Number'] = df_mls['Parcel Number'].astype(str).astype(object)
+    return df_mls, df_cama
+
+
+def test_parallel_matches_single_process_with_dtypes():
+    df_mls, df_cama = _text_and_numeric_ids()
+    expected = compare_data_enhanced(df_mls, df_cama)
+    results = compare_data_parallel(df_mls, df_cama, n_workers=2, n_shards=3)
+
+    for number, (single, parallel) in enumerate(zip(expected, results)):
+        if number == 3:
+            single = _sort_by_parcel(single, 'PARID')  # matched_df comes back sorted by parcel ID
+        pd.testing.assert_frame_equal(single.reset_index(drop=True), parallel.reset_index(drop=True))
+    assert results[3]['PARID'].dtype == object
+
+
+def _assert_streaming_matches(df_mls, df_cama, chunk_size=700):
+    expected = compare_data_enhanced(df_mls, df_cama)
+    chunks = (df_cama.iloc[start:start + chunk_size] for start in range(0, len(df_cama), chunk_size))
+    results = compare_data_streaming(df_mls, chunks)
+
+    for number, (full, streamed) in enumerate(zip(expected, results)):
+        if number == 3:
+            continue  # streamed matched_df only holds the parcel IDs
+        # Streamed records come out in CAMA file order
+        pd.testing.assert_frame_equal(_sort_by_parcel(full).reset_index(drop=True),
+                                      _sort_by_parcel(streamed).reset_index(drop=True))
+    return results
+
+
+def test_streaming_matches_full_comparison_with_dtypes():
+    df_mls, df_cama = generate_synthetic_data(3000, seed=0)
+    results = _assert_streaming_matches(df_mls, df_cama)
+    assert results[0]['Listing_Number'].dtype == 'float64'  # padded by CAMA-only rows
+    assert results[2]['NOPAR'].dtype == 'float64'  # padded by MLS-only rows
+
+    # Every MLS parcel in CAMA: nothing pads the CAMA columns, which stay int64
+    df_mls = df_mls[df_mls['Parcel Number'].isin(df_cama['PARID'])]
+    results = _assert_streaming_matches(df_mls, df_cama)
+    assert results[2]['NOPAR'].dtype == 'int64'
+
+
+if __name__ == "__main__":
+    test_parallel_matches_single_process_with_dtypes()
+    test_streaming_matches_full_comparison_with_dtypes()
+    print("Comparison engine tests passed")
@@ -0,0 +1,37 @@
+"""
+Parcel Key Tests
+Checks that parcel IDs match in canonical form however each system stores them.
+Run:  python -m pytest test_parcel_keys.py
+"""
+
+import pandas as pd
+
+from mls_cama_core import canonical_parcel_ids, encode_parcel_keys
+
+
+def test_whole_number_text_matches_float():
+    """'12345.0' (text from a float-typed export) is the same parcel as 12345.0 and 12345."""
+    text = canonical_parcel_ids(pd.Series(['12345.0', '12345.00', '00-12-345', ' 12345']))
+    floats = canonical_parcel_ids(pd.Series([12345.0, 678.0]))
+    mixed = canonical_parcel_ids(pd.Series(['12345.0', 12345], dtype=object))
+    assert list(text) == ['12345'] * 4
+    assert list(floats) == ['12345', '678']
+    assert list(mixed) == ['12345', '12345']
+
+    mls_codes, cama_codes = encode_parcel_keys(pd.Series(['12345.0']), pd.Series([12345.0]))
+    assert mls_codes[0] == cama_codes[0]
+
+
+def test_dots_inside_ids_are_kept():
+    """A dot inside an ID is part of it: '1.2345' and '12345' are different parcels."""
+    assert list(canonical_parcel_ids(pd.Series(['1.2345', '12345', '12.0.5']))) == ['1.2345', '12345', '12.0.5']
+    assert list(canonical_parcel_ids(pd.Series([1.2345, 12345]))) == ['1.2345', '12345']
+
+    mls_codes, cama_codes = encode_parcel_keys(pd.Series(['1.2345']), pd.Series(['12345']))
+    assert mls_codes[0] != cama_codes[0]
+
+
+if __name__ == "__main__":
+    test_whole_number_text_matches_float()
+    test_dots_inside_ids_are_kept()
+    print("Parcel key tests passed")
@@ -0,0 +1,90 @@
+"""
+Zillow Photo Extraction Benchmark
+Times the regex fast path (extract_photo_url_fast) against the BeautifulSoup
+path (extract_photo_url_soup) per property page, on synthetic pages shaped like
+Zillow's (large embedded JSON, many tags) and on any saved real pages.
+
+Run:  python zillow_extraction_benchmark.py
+"""
+
+import json
+import time
+
+from zillow_photo_downloader import extract_photo_url, extract_photo_url_fast, extract_photo_url_soup
+
+# --- Configuration ---
+PAGE_SIZE_KB = 1500      # Approximate size of each synthetic page
+REPEAT = 5               # Runs per page and method; the fastest one is reported
+SAMPLE_PAGES = []        # Paths of saved Zillow pages (view-source → save) to benchmark too
+
+PHOTO_URL = "https://photos.zillowstatic.com/fp/0a1b2c3d4e5f-cc_ft_1536.jpg"
+
+
+def generate_page(size_kb=PAGE_SIZE_KB, layout='picture'):
+    """
+    Build a synthetic property page of roughly `size_kb` KB.
+
+    layout: 'picture' - main photo in a <picture> element near the top
+            'json'    - main photo only in the embedded JSON blob
+            'none'    - no photo anywhere (worst case: fast path misses, soup runs)
+    """
+    listing = {
+        'props': {'pageProps': {
+            'zpid': 35191188,
+            'description': 'Lovely home ' * 50,
+            'priceHistory': [{'date': f'2020-01-{d % 28 + 1:02d}', 'price': 150000 + d} for d in range(200)],
+            'photos': [{'url': PHOTO_URL, 'width': 1536}] if layout == 'json' else [],
+        }}
+    }
+    blob = json.dumps(listing)
+    filler_row = ('<div class="fact"><span class="label">Heating</span>'
+                  '<img src="https://www.zillow.com/static/icon.svg" alt="icon"><span>Forced air</span></div>\n')
+
+    head = ['<html><head><title>1118 Raff Rd SW</title></head><body>']
+    if layout == 'picture':
+        head.append(f'<picture><source srcset="{PHOTO_URL} 1536w">'
+                    f'<img src="{PHOTO_URL}" alt="1118 Raff Rd SW home photo"></picture>')
+    prefix = ''.join(head)
+    script = f'<script id="__NEXT_DATA__" type="application/json">{blob}</script>'
+    rows = max(0, (size_kb * 1024 - len(prefix) - len(script)) // len(filler_row))
+    return (prefix + filler_row * rows + script + '</body></html>').encode('utf-8')
+
+
+def _best_time(func, page, repeat=REPEAT):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(page)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def benchmark_page(label, page, repeat=REPEAT):
+    """Time every extraction path on one page and print one table row."""
+    fast_s, fast_url = _best_time(extract_photo_url_fast, page, repeat)
+    soup_s, soup_url = _best_time(extract_photo_url_soup, page, repeat)
+    combined_s, _ = _best_time(extract_photo_url, page, repeat)
+    speedup = soup_s / combined_s if combined_s else float('inf')
+    print(f"{label:<24} {len(page) / 1024:>8,.0f} {fast_s * 1000:>10.2f} {soup_s * 1000:>10.1f} "
+          f"{combined_s * 1000:>12.2f} {speedup:>8.1f}x   {'same' if fast_url == soup_url else 'differs'}")
+    return {'page': label, 'kb': round(len(page) / 1024), 'fast_ms': round(fast_s * 1000, 3),
+            'soup_ms': round(soup_s * 1000, 3), 'extract_ms': round(combined_s * 1000, 3),
+            'same_url': fast_url == soup_url}
+
+
+def main(sample_pages=None):
+    """Benchmark the synthetic layouts plus any saved pages."""
+    print(f"\n{'Page':<24} {'KB':>8} {'Fast (ms)':>10} {'Soup (ms)':>10} {'Extract (ms)':>12} {'Speedup':>9}   URL")
+    print("-" * 88)
+    results = [benchmark_page(f"synthetic ({layout})", generate_page(layout=layout))
+               for layout in ('picture', 'json', 'none')]
+    for path in sample_pages if sample_pages is not None else SAMPLE_PAGES:
+        with open(path, 'rb') as f:
+            results.append(benchmark_page(path[-24:], f.read()))
+    print("\nExtract = fast path with BeautifulSoup fallback (what download_photo_from_url runs)")
+    return results
+
+
+if __name__ == "__main__":
+    main()
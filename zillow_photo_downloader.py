@@ -3,31 +3,245 @@ Zillow Photo Downloader - Improved Version
 Downloads property photos from Zillow for each address with robust zpid extraction
 """
 
-import requests
 from bs4 import BeautifulSoup
 import re
 import os
 from urllib.parse import quote, urljoin
 import time
 import json
+import random
+import shutil
+import tempfile
+from html import unescape
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import pandas as pd
+
+from mls_cama_http import POOL_SIZE, SHARED_RETRY_STATUSES, create_session, get_shared_session, set_shared_session
+from zillow_photo_journal import (append_journal, is_expired_miss, is_retryable, journal_path, load_journal,
+                                  reset_journal)
+from zillow_zpid_cache import lookup_zpid, store_zpid
+
+PHOTO_EXTENSIONS = ('.jpg', '.png', '.webp')
+PHOTO_STORE_FOLDER = '_store'       # Shared store under the photo root (see download_report_photos)
+PARTIAL_SUFFIX = '.part'            # Temp files of downloads in progress
+DOWNLOAD_CHUNK_SIZE = 64 * 1024     # Bytes read at a time when saving a photo
+STALE_PARTIAL_SECONDS = 3600        # Leftover temp files older than this are removed by scans
+
+# Fast-path patterns for extract_photo_url_fast (same hosts/keys as the BeautifulSoup path)
+_PICTURE_IMG_RE = re.compile(
+    rb'<picture\b(?:(?!</picture>).)*?<img\b[^>]*?\bsrc="'
+    rb'(https?://(?:photos\.zillowstatic\.com|ssl\.cdn-redfin\.com)/[^"]+)"',
+    re.DOTALL | re.IGNORECASE
+)
+_JSON_PHOTO_RE = re.compile(
+    rb'\\?"(?:url|src|photoUrl|imageUrl|imgSrc)\\?"\s*:\s*\\?"'
+    rb'(https://photos\.zillowstatic\.com/[^"\\]+)'
+)
+
+# Typical HTTP requests per property (property page - zpid and photo URL - then the image);
+# used to turn the per-property delay into the starting request rate of the limiter
+REQUESTS_PER_PHOTO = 2
+
+# Adaptive rate limiter: the request rate climbs back towards the ceiling while responses
+# are healthy and is halved, with a jittered exponential pause, whenever Zillow throttles
+THROTTLE_CODES = (403, 429, 503)  # Responses treated as "slow down"
+MIN_REQUESTS_PER_SECOND = 0.05    # The rate never drops below this
+RATE_RECOVERY = 0.05              # Share of the ceiling added back per healthy response
+BACKOFF_BASE = 2.0                # First pause after throttling (seconds), doubling per repeat
+BACKOFF_MAX = 120.0               # Longest pause (a longer Retry-After is still honoured)
+SLOW_RESPONSE_FACTOR = 3.0        # Responses this much slower than average don't raise the rate
+
+# Limiter state shared by every worker thread (no limit until set_rate_limit is called)
+_rate_lock = threading.Lock()
+_rate = None
+_ceiling = None
+_burst = 1.0
+_tokens = 0.0
+_last_refill = 0.0
+_paused_until = 0.0
+_consecutive_throttles = 0
+_metrics = {}
+
+# Last failed request per thread, so batch jobs can journal why a parcel failed
+_request_state = threading.local()
+
+def _reset_metrics():
+    global _metrics
+    _metrics = {'requests': 0, 'throttled': {}, 'errors': 0, 'backoffs': 0, 'backoff_seconds': 0.0,
+                'avg_latency_s': None, 'min_rate': _rate}
+
+def set_rate_limit(requests_per_second, burst=1, max_requests_per_second=None):
+    """
+    Limit all Zillow requests (across threads) to `requests_per_second`,
+    allowing short bursts of up to `burst` requests. None removes the limit.
+
+    The rate adapts to Zillow's responses: it is halved (with a pause) on
+    THROTTLE_CODES or connection errors and recovers while responses are
+    healthy, up to `max_requests_per_second` (default: the starting rate).
+    Resets the metrics returned by get_rate_metrics().
+    """
+    global _rate, _ceiling, _burst, _tokens, _last_refill, _paused_until, _consecutive_throttles
+    with _rate_lock:
+        _rate = requests_per_second
+        _ceiling = max(max_requests_per_second or 0, requests_per_second or 0) or None
+        _burst = float(max(burst, 1))
+        _tokens = _burst
+        _last_refill = time.monotonic()
+        _paused_until = 0.0
+        _consecutive_throttles = 0
+        _reset_metrics()
+
+def wait_for_request_slot():
+    """Block until the limiter allows another request (returns at once if unlimited)."""
+    global _tokens, _last_refill
+    while True:
+        with _rate_lock:
+            if not _rate:
+                return
+            now = time.monotonic()
+            if now < _paused_until:
+                wait = _paused_until - now
+            else:
+                _tokens = min(_burst, _tokens + (now - max(_last_refill, _paused_until)) * _rate)
+                _last_refill = now
+                if _tokens >= 1:
+                    _tokens -= 1
+                    return
+                wait = (1 - _tokens) / _rate
+        time.sleep(wait)
+
+def _record_response(status_code, latency, retry_after=None):
+    """Feed one request's outcome (status None = connection error) into the limiter."""
+    global _rate, _tokens, _paused_until, _consecutive_throttles
+    with _rate_lock:
+        if not _metrics:
+            _reset_metrics()
+        _metrics['requests'] += 1
+        slow = False
+        throttled = status_code is None or status_code in THROTTLE_CODES
+        if status_code is None:
+            _metrics['errors'] += 1
+        elif throttled:
+            _metrics['throttled'][status_code] = _metrics['throttled'].get(status_code, 0) + 1
+        elif latency is not None:
+            average = _metrics['avg_latency_s']
+            slow = average is not None and latency > SLOW_RESPONSE_FACTOR * average
+            _metrics['avg_latency_s'] = latency if average is None else 0.8 * average + 0.2 * latency
+
+        if not _rate:
+            return
+        if throttled:
+            _consecutive_throttles += 1
+            _rate = max(MIN_REQUESTS_PER_SECOND, _rate / 2)
+            backoff = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (_consecutive_throttles - 1))
+            backoff = random.uniform(backoff / 2, backoff)
+            if retry_after:
+                backoff = max(backoff, retry_after)
+            _paused_until = max(_paused_until, time.monotonic() + backoff)
+            _tokens = 0.0
+            _metrics['backoffs'] += 1
+            _metrics['backoff_seconds'] += backoff
+            _metrics['min_rate'] = min(_metrics['min_rate'] or _rate, _rate)
+        else:
+            _consecutive_throttles = 0
+            if not slow:
+                _rate = min(_ceiling, _rate + _ceiling * RATE_RECOVERY)
+
+def get_rate_metrics():
+    """
+    Current limiter state: rate and ceiling (requests/second), requests sent,
+    throttled responses by status code, connection errors, number and total
+    seconds of backoff pauses, lowest rate reached and average response latency.
+    """
+    with _rate_lock:
+        metrics = dict(_metrics or {'requests': 0, 'throttled': {}, 'errors': 0, 'backoffs': 0,
+                                    'backoff_seconds': 0.0, 'avg_latency_s': None, 'min_rate': _rate})
+        metrics['throttled'] = dict(metrics['throttled'])
+        metrics['rate'] = _rate
+        metrics['ceiling'] = _ceiling
+    return metrics
+
+def _retry_after_seconds(response):
+    value = response.headers.get('Retry-After', '')
+    return float(value) if value.strip().isdigit() else None
+
+def http_get(url, **kwargs):
+    """
+    GET through the shared pooled session (keep-alive, browser headers, 15s timeout,
+    retry/backoff on 5xx) after taking a slot from the global rate limiter,
+    and report the response code and latency back to the limiter.
+    """
+    wait_for_request_slot()
+    start = time.monotonic()
+    try:
+        response = get_shared_session().get(url, **kwargs)
+    except Exception as e:
+        _record_response(None, None)
+        _request_state.last_error = ('error', type(e).__name__)
+        raise
+    _record_response(response.status_code, time.monotonic() - start, _retry_after_seconds(response))
+    if response.status_code >= 400 and response.status_code != 404:
+        _request_state.last_error = ('http_error', response.status_code)
+    return response
+
+def _take_request_error():
+    """Return and clear the last failed request of this thread, as (status, detail) or None."""
+    error = getattr(_request_state, 'last_error', None)
+    _request_state.last_error = None
+    return error
 
 def create_photo_folder(output_folder="zillow_photos"):
     """Create folder for storing downloaded photos."""
-    if not os.path.exists(output_folder):
-        os.makedirs(output_folder)
+    os.makedirs(output_folder, exist_ok=True)
     return output_folder
 
-def extract_zpid_from_direct_url(address, city, state, zip_code):
+def _photo_entry(path, stat_result):
+    return {'path': path, 'size': stat_result.st_size, 'mtime': stat_result.st_mtime}
+
+def scan_photo_folder(output_folder="zillow_photos"):
     """
-    Build a direct Zillow URL from address and extract zpid from redirect.
-    This is the PRIMARY method - most reliable!
-    
-    URL Template: https://www.zillow.com/homedetails/Address-City-State-Zip/
-    Zillow will redirect to the correct property with zpid
+    List the photos already in `output_folder` with a single directory scan.
+
+    Empty files are ignored, and temp files left by interrupted downloads
+    are removed once they are older than STALE_PARTIAL_SECONDS.
+
+    Returns:
+        dict: parcel_id (str) -> {'path', 'size', 'mtime'}; when a parcel has
+        several files, the first of PHOTO_EXTENSIONS wins
+    """
+    create_photo_folder(output_folder)
+    index = {}
+    now = time.time()
+    with os.scandir(output_folder) as entries:
+        for entry in entries:
+            parcel_id, ext = os.path.splitext(entry.name)
+            ext = ext.lower()
+            if ext == PARTIAL_SUFFIX and entry.name.startswith('.'):
+                try:
+                    if now - entry.stat().st_mtime > STALE_PARTIAL_SECONDS:
+                        os.remove(entry.path)
+                except OSError:
+                    pass
+                continue
+            if ext not in PHOTO_EXTENSIONS or not entry.is_file() or entry.stat().st_size == 0:
+                continue
+            current = index.get(parcel_id)
+            if current is None or PHOTO_EXTENSIONS.index(ext) < PHOTO_EXTENSIONS.index(
+                    os.path.splitext(current['path'])[1].lower()):
+                index[parcel_id] = _photo_entry(os.path.join(output_folder, entry.name), entry.stat())
+    return index
+
+def _zpid_from_direct_url(address, city, state, zip_code):
+    """
+    Direct URL lookup behind extract_zpid_from_direct_url.
+
+    Returns:
+        tuple: (zpid or None, answered, photo_url) - answered is True when Zillow
+        gave a definite reply (200/404) rather than an error or timeout;
+        photo_url is the main photo found on the same page (or None)
     """
-    if not address or not city or not zip_code:
-        return None
-    
     try:
         # Clean and format address parts
         address_clean = str(address).strip()
@@ -45,17 +259,8 @@ def extract_zpid_from_direct_url(address, city, state, zip_code):
         # Build the direct URL
         direct_url = f"https://www.zillow.com/homedetails/{address_formatted}-{city_formatted}-{state_clean}-{zip_clean}/"
         
-        # Headers to mimic a browser
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-            'Accept-Language': 'en-US,en;q=0.9',
-            'Accept-Encoding': 'gzip, deflate, br',
-            'Connection': 'keep-alive',
-        }
-        
         # Make request - Zillow will redirect to actual property page with zpid
-        response = requests.get(direct_url, headers=headers, timeout=15, allow_redirects=True)
+        response = http_get(direct_url, allow_redirects=True)
         
         if response.status_code == 200:
             # Check the final URL after redirect
@@ -64,7 +269,7 @@ def extract_zpid_from_direct_url(address, city, state, zip_code):
             # Extract zpid from URL: .../12345678_zpid/...
             zpid_match = re.search(r'/(\d{8,})_zpid/', final_url)
             if zpid_match:
-                return zpid_match.group(1)
+                return zpid_match.group(1), True, extract_photo_url_fast(response.content)
             
             # Also try to find zpid in page content as backup
             zpid_patterns = [
@@ -76,27 +281,34 @@ def extract_zpid_from_direct_url(address, city, state, zip_code):
             for pattern in zpid_patterns:
                 match = re.search(pattern, response.text)
                 if match:
-                    return match.group(1)
+                    return match.group(1), True, extract_photo_url_fast(response.content)
+        
+        return None, response.status_code in (200, 404), None
         
     except Exception as e:
-        pass
-    
-    return None
+        return None, False, None
 
-def extract_zpid_robust(address, city, state, zip_code, max_retries=2):
+def extract_zpid_from_direct_url(address, city, state, zip_code):
     """
-    Extract zpid using direct URL method FIRST (most reliable).
-    Falls back to search if direct method fails.
+    Build a direct Zillow URL from address and extract zpid from redirect.
+    This is the PRIMARY method - most reliable!
+    
+    URL Template: https://www.zillow.com/homedetails/Address-City-State-Zip/
+    Zillow will redirect to the correct property with zpid
     """
     if not address or not city or not zip_code:
         return None
     
-    # METHOD 1: Direct URL construction (BEST METHOD)
-    zpid = extract_zpid_from_direct_url(address, city, state, zip_code)
-    if zpid:
-        return zpid
-    
-    # If direct method failed, try search as fallback
+    zpid, _, _ = _zpid_from_direct_url(address, city, state, zip_code)
+    return zpid
+
+def _zpid_from_search(address, city, state, zip_code, max_retries=2):
+    """
+    Zillow search fallback for extract_zpid_robust.
+
+    Returns:
+        tuple: (zpid or None, answered) - see _zpid_from_direct_url
+    """
     # Clean inputs
     address_clean = str(address).strip()
     city_clean = str(city).strip()
@@ -105,15 +317,7 @@ def extract_zpid_robust(address, city, state, zip_code, max_retries=2):
     
     # Create search query
     search_query = f"{address_clean} {city_clean} {state_clean} {zip_clean}"
-    
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-        'Accept-Language': 'en-US,en;q=0.5',
-        'Accept-Encoding': 'gzip, deflate, br',
-        'Connection': 'keep-alive',
-        'Upgrade-Insecure-Requests': '1',
-    }
+    answered = False
     
     for attempt in range(max_retries):
         try:
@@ -121,7 +325,8 @@ def extract_zpid_robust(address, city, state, zip_code, max_retries=2):
             encoded_query = quote(search_query)
             search_url = f"https://www.zillow.com/homes/{encoded_query}_rb/"
             
-            response = requests.get(search_url, headers=headers, timeout=15, allow_redirects=True)
+            response = http_get(search_url, allow_redirects=True)
+            answered = answered or response.status_code in (200, 404)
             
             if response.status_code == 200:
                 content = response.text
@@ -138,13 +343,57 @@ def extract_zpid_robust(address, city, state, zip_code, max_retries=2):
                 for pattern in zpid_patterns:
                     matches = re.findall(pattern, content)
                     if matches:
-                        return matches[0]
+                        return matches[0], True
         
         except Exception as e:
-            if attempt < max_retries - 1:
-                time.sleep(1)
+            # The rate limiter pauses after connection errors before the next attempt
+            continue
     
-    return None
+    return None, answered
+
+def resolve_zpid(address, city, state, zip_code, max_retries=2, use_cache=True):
+    """
+    Extract zpid using direct URL method FIRST (most reliable).
+    Falls back to search if direct method fails.
+
+    With use_cache, the on-disk zpid cache (zillow_zpid_cache) is checked before
+    any request, and every definite answer - including "not on Zillow" - is
+    stored. Lookups that failed on errors or timeouts are not cached.
+
+    Returns:
+        tuple: (zpid, photo_url) - photo_url is the main photo found on the
+        property page the direct lookup already fetched, so the photo page
+        doesn't have to be requested again (None for cache hits and searches)
+    """
+    if not address or not city or not zip_code:
+        return None, None
+    
+    if use_cache:
+        hit, zpid = lookup_zpid(address, city, zip_code)
+        if hit:
+            return zpid, None
+    _take_request_error()
+    
+    # METHOD 1: Direct URL construction (BEST METHOD)
+    zpid, _, photo_url = _zpid_from_direct_url(address, city, state, zip_code)
+    
+    # If direct method failed, try search as fallback
+    search_answered = False
+    if not zpid:
+        zpid, search_answered = _zpid_from_search(address, city, state, zip_code, max_retries)
+    
+    # A miss is only cached once the search (the last resort) gave a definite answer
+    # and no request along the way failed
+    failed = getattr(_request_state, 'last_error', None) is not None
+    if use_cache and (zpid or (search_answered and not failed)):
+        store_zpid(address, city, zip_code, zpid)
+    
+    return zpid, photo_url
+
+def extract_zpid_robust(address, city, state, zip_code, max_retries=2, use_cache=True):
+    """zpid for an address (see resolve_zpid), without the photo URL."""
+    zpid, _ = resolve_zpid(address, city, state, zip_code, max_retries, use_cache)
+    return zpid
 
 def construct_photo_url(zpid, address, city, state, zip_code):
     """
@@ -173,96 +422,168 @@ def construct_photo_url(zpid, address, city, state, zip_code):
     
     return photo_url
 
+def extract_photo_url_soup(html):
+    """
+    Find the main photo URL by parsing the page with BeautifulSoup
+    (picture elements, then img tags, then embedded JSON). Slow on large pages;
+    used when extract_photo_url_fast finds nothing.
+    """
+    soup = BeautifulSoup(html, 'html.parser')
+    
+    # Look for the main photo - try multiple methods
+    photo_url = None
+    
+    # Method 1: Look for high-resolution images in picture elements
+    for picture in soup.find_all('picture'):
+        for img in picture.find_all('img'):
+            src = img.get('src', '')
+            if 'photos.zillowstatic.com' in src or 'ssl.cdn-redfin.com' in src:
+                photo_url = src
+                break
+        if photo_url:
+            break
+    
+    # Method 2: Look for main image with specific classes
+    if not photo_url:
+        for img in soup.find_all('img'):
+            src = img.get('src', '')
+            alt = img.get('alt', '').lower()
+            if ('photos.zillowstatic.com' in src or 'ssl.cdn-redfin.com' in src) and ('photo' in alt or 'home' in alt):
+                photo_url = src
+                break
+    
+    # Method 3: Look for any large Zillow photo
+    if not photo_url:
+        for img in soup.find_all('img'):
+            src = img.get('src', '')
+            if 'photos.zillowstatic.com' in src:
+                # Prefer larger images
+                if any(size in src for size in ['1280x960', '1024x768', '800x600']):
+                    photo_url = src
+                    break
+    
+    # Method 4: Extract from JSON data
+    if not photo_url:
+        scripts = soup.find_all('script', type='application/json')
+        for script in scripts:
+            try:
+                data = json.loads(script.string)
+                # Try to find image URLs in the JSON
+                photo_url = extract_photo_from_json(data)
+                if photo_url:
+                    break
+            except:
+                pass
+    
+    return photo_url
+
+def extract_photo_url_fast(html):
+    """
+    Find the main photo URL with regex scans of the raw page bytes: the first
+    <picture> image served from a photo host, else the first photo URL under a
+    url/src/photoUrl/imageUrl/imgSrc key in the embedded JSON (plain or
+    escaped inside a JSON string). Returns None when neither is present.
+    """
+    if isinstance(html, str):
+        html = html.encode('utf-8')
+    
+    match = _PICTURE_IMG_RE.search(html)
+    if not match:
+        match = _JSON_PHOTO_RE.search(html)
+    if not match:
+        return None
+    return unescape(match.group(1).decode('utf-8', 'replace'))
+
+def extract_photo_url(html):
+    """Main photo URL from a Zillow property page: regex fast path, BeautifulSoup fallback."""
+    return extract_photo_url_fast(html) or extract_photo_url_soup(html)
+
 def download_photo_from_url(photo_page_url, parcel_id, output_folder):
     """
     Download the main photo from a Zillow property page.
     The page with mmlb=g,0 shows the main photo.
     """
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-    }
-    
     try:
         # Get the property page with photo view
-        response = requests.get(photo_page_url, headers=headers, timeout=15)
+        response = http_get(photo_page_url)
         
         if response.status_code == 200:
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Look for the main photo - try multiple methods
-            photo_url = None
-            
-            # Method 1: Look for high-resolution images in picture elements
-            for picture in soup.find_all('picture'):
-                for img in picture.find_all('img'):
-                    src = img.get('src', '')
-                    if 'photos.zillowstatic.com' in src or 'ssl.cdn-redfin.com' in src:
-                        photo_url = src
-                        break
-                if photo_url:
-                    break
-            
-            # Method 2: Look for main image with specific classes
-            if not photo_url:
-                for img in soup.find_all('img'):
-                    src = img.get('src', '')
-                    alt = img.get('alt', '').lower()
-                    if ('photos.zillowstatic.com' in src or 'ssl.cdn-redfin.com' in src) and ('photo' in alt or 'home' in alt):
-                        photo_url = src
-                        break
-            
-            # Method 3: Look for any large Zillow photo
-            if not photo_url:
-                for img in soup.find_all('img'):
-                    src = img.get('src', '')
-                    if 'photos.zillowstatic.com' in src:
-                        # Prefer larger images
-                        if any(size in src for size in ['1280x960', '1024x768', '800x600']):
-                            photo_url = src
-                            break
-            
-            # Method 4: Extract from JSON data
-            if not photo_url:
-                scripts = soup.find_all('script', type='application/json')
-                for script in scripts:
-                    try:
-                        data = json.loads(script.string)
-                        # Try to find image URLs in the JSON
-                        photo_url = extract_photo_from_json(data)
-                        if photo_url:
-                            break
-                    except:
-                        pass
+            photo_url = extract_photo_url(response.content)
             
             # Download the photo
             if photo_url:
-                # Clean the URL
-                photo_url = photo_url.split('?')[0] if '?' in photo_url else photo_url
-                
-                photo_response = requests.get(photo_url, headers=headers, timeout=15)
-                
-                if photo_response.status_code == 200:
-                    # Determine file extension
-                    file_extension = '.jpg'
-                    content_type = photo_response.headers.get('content-type', '')
-                    if 'png' in content_type or '.png' in photo_url.lower():
-                        file_extension = '.png'
-                    elif 'webp' in content_type or '.webp' in photo_url.lower():
-                        file_extension = '.webp'
-                    
-                    filename = f"{parcel_id}{file_extension}"
-                    filepath = os.path.join(output_folder, filename)
-                    
-                    with open(filepath, 'wb') as f:
-                        f.write(photo_response.content)
-                    
-                    return filepath
+                return download_photo_image(photo_url, parcel_id, output_folder)
             
         return None
         
     except Exception as e:
         return None
 
+def download_photo_image(photo_url, parcel_id, output_folder):
+    """Download an image URL to `{parcel_id}.<ext>` (see save_photo_stream). Returns the path or None."""
+    try:
+        # Clean the URL
+        photo_url = photo_url.split('?')[0] if '?' in photo_url else photo_url
+        
+        with http_get(photo_url, stream=True) as photo_response:
+            if photo_response.status_code == 200:
+                return save_photo_stream(photo_response, parcel_id, output_folder)
+        return None
+        
+    except Exception as e:
+        return None
+
+def _sniff_image_extension(head):
+    """File extension for JPEG/PNG/WebP data from its first bytes, else None."""
+    if head.startswith(b'\xff\xd8\xff'):
+        return '.jpg'
+    if head.startswith(b'\x89PNG\r\n\x1a\n'):
+        return '.png'
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return '.webp'
+    return None
+
+def save_photo_stream(response, parcel_id, output_folder):
+    """
+    Stream an image response to `{parcel_id}.jpg/.png/.webp` in `output_folder`.
+
+    The body is written in chunks to a hidden temp file, checked (image magic
+    bytes, Content-Length when the body isn't compressed) and only then renamed
+    into place, so an interrupted or bad download never leaves a photo file
+    behind. The extension comes from the magic bytes.
+
+    Returns:
+        str: The saved path, or None if the download was rejected
+    """
+    fd, temp_path = tempfile.mkstemp(prefix=f".{parcel_id}.", suffix=PARTIAL_SUFFIX, dir=output_folder)
+    try:
+        head = b''
+        written = 0
+        with os.fdopen(fd, 'wb') as f:
+            for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                if len(head) < 12:
+                    head += chunk[:12 - len(head)]
+                f.write(chunk)
+                written += len(chunk)
+            f.flush()
+            os.fsync(f.fileno())
+
+        extension = _sniff_image_extension(head)
+        expected = response.headers.get('Content-Length')
+        encoded = response.headers.get('Content-Encoding', 'identity') != 'identity'
+        if extension is None or written == 0 or (expected and not encoded and int(expected) != written):
+            os.remove(temp_path)
+            return None
+
+        filepath = os.path.join(output_folder, f"{parcel_id}{extension}")
+        os.replace(temp_path, filepath)
+        return filepath
+
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
 def extract_photo_from_json(data, depth=0, max_depth=5):
     """Recursively search JSON for photo URLs."""
     if depth > max_depth or not isinstance(data, (dict, list)):
@@ -290,89 +611,323 @@ def extract_photo_from_json(data, depth=0, max_depth=5):
     
     return None
 
-def download_property_photo(parcel_id, address, city, state, zip_code, output_folder="zillow_photos"):
+def download_property_photo(parcel_id, address, city, state, zip_code, output_folder="zillow_photos",
+                            verbose=True, photo_index=None):
     """
     Main function to download a property photo from Zillow.
     Fully automatic - extracts zpid and downloads photo.
+    Set verbose=False to suppress the per-step messages (used by concurrent batches).
+
+    photo_index (from scan_photo_folder) replaces the per-call folder checks;
+    it is updated when a photo is saved.
     """
-    # Create output folder if needed
-    create_photo_folder(output_folder)
-    
+    filepath, _, _ = fetch_property_photo(parcel_id, address, city, state, zip_code, output_folder,
+                                          verbose, photo_index)
+    return filepath
+
+def fetch_property_photo(parcel_id, address, city, state, zip_code, output_folder="zillow_photos",
+                         verbose=True, photo_index=None):
+    """
+    download_property_photo, also reporting the outcome for the job journal.
+
+    Returns:
+        tuple: (filepath or None, status, detail) - status is done, no_zpid,
+        no_photo, http_error (detail = status code) or error (detail = exception name)
+    """
+    log = print if verbose else (lambda *args, **kwargs: None)
+
     # Check if photo already exists
-    for ext in ['.jpg', '.png', '.webp']:
-        existing_file = os.path.join(output_folder, f"{parcel_id}{ext}")
-        if os.path.exists(existing_file):
-            return existing_file
+    if photo_index is not None:
+        entry = photo_index.get(str(parcel_id))
+        if entry:
+            return entry['path'], 'done', None
+    else:
+        create_photo_folder(output_folder)
+        for ext in PHOTO_EXTENSIONS:
+            existing_file = os.path.join(output_folder, f"{parcel_id}{ext}")
+            if os.path.exists(existing_file):
+                return existing_file, 'done', None
     
-    print(f"  📸 Downloading photo for parcel {parcel_id}...")
+    log(f"  📸 Downloading photo for parcel {parcel_id}...")
     
-    # Step 1: Extract zpid from Zillow
-    zpid = extract_zpid_robust(address, city, state, zip_code)
+    # Step 1: Extract zpid from Zillow (the property page it loads usually has the photo URL too)
+    zpid, photo_url = resolve_zpid(address, city, state, zip_code)
+    error = _take_request_error()
     if not zpid:
-        print(f"  ⚠️  Could not find property on Zillow")
-        return None
+        log(f"  ⚠️  Could not find property on Zillow")
+        return (None, *error) if error else (None, 'no_zpid', None)
     
-    print(f"  ✅ Found zpid: {zpid}")
+    log(f"  ✅ Found zpid: {zpid}")
     
-    # Step 2: Construct photo URL with mmlb=g,0
-    photo_page_url = construct_photo_url(zpid, address, city, state, zip_code)
-    if not photo_page_url:
-        print(f"  ⚠️  Could not construct photo URL")
-        return None
+    # Step 2: Download the photo found on that page, if any
+    filepath = download_photo_image(photo_url, parcel_id, output_folder) if photo_url else None
     
-    # Step 3: Download the photo
-    filepath = download_photo_from_url(photo_page_url, parcel_id, output_folder)
+    if not filepath:
+        # Step 3: Otherwise load the photo view (mmlb=g,0) and download its main photo
+        photo_page_url = construct_photo_url(zpid, address, city, state, zip_code)
+        if not photo_page_url:
+            log(f"  ⚠️  Could not construct photo URL")
+            return None, 'no_photo', None
+        filepath = download_photo_from_url(photo_page_url, parcel_id, output_folder)
     
     if filepath:
-        print(f"  ✅ Photo saved: {filepath}")
-        return filepath
+        if photo_index is not None:
+            photo_index[str(parcel_id)] = _photo_entry(filepath, os.stat(filepath))
+        log(f"  ✅ Photo saved: {filepath}")
+        return filepath, 'done', None
     else:
-        print(f"  ⚠️  Could not download photo")
-        return None
+        log(f"  ⚠️  Could not download photo")
+        error = _take_request_error()
+        return (None, *error) if error else (None, 'no_photo', None)
 
-def batch_download_photos(df, output_folder="zillow_photos", delay=3):
+def batch_download_photos(df, output_folder="zillow_photos", delay=3, max_workers=1, requests_per_second=None,
+                          resume=True, max_requests_per_second=None):
     """
-    Download photos for all properties in a DataFrame.
+    Download photos for all properties in a DataFrame (each Parcel_ID once).
     Uses direct URL construction for reliable zpid extraction.
+
+    The folder is scanned once up front; parcels that already have a photo are
+    skipped without any request or delay, and the returned photo_map
+    (parcel_id -> path) comes from that index.
+
+    Every parcel's outcome is appended to a job journal in the output folder
+    (see zillow_photo_journal). With resume=True an interrupted or earlier run
+    is continued: parcels recorded as not on Zillow / no photo are skipped until
+    the record is older than the zpid cache's NEGATIVE_TTL_DAYS, and retryable
+    failures (403/429/5xx, connection errors) are tried again.
+    resume=False starts a new journal and tries every parcel without a photo.
+
+    Instead of sleeping `delay` seconds per property, every request takes a
+    slot from a shared adaptive rate limiter starting at `requests_per_second`
+    (default: REQUESTS_PER_PHOTO / delay, the same request budget). Properties
+    served from the caches cost no wait at all. The limiter backs off when Zillow
+    throttles (403/429/503) and recovers up to `max_requests_per_second`
+    (default: the starting rate); its metrics are printed at the end.
+    With max_workers > 1, properties are fetched by a thread pool so network
+    waits overlap rather than add up.
     """
     photo_map = {}
-    total = len(df)
+
+    # One entry per parcel (report frames such as value mismatches repeat a parcel per field)
+    properties = {}
+    for _, row in df.iterrows():
+        parcel_id = row.get('Parcel_ID')
+        properties.setdefault(str(parcel_id), (parcel_id, row.get('Address'), row.get('City'),
+                                               row.get('State', 'OH'), row.get('Zip')))
+    properties = list(properties.values())
+    total = len(properties)
+    if total == 0:
+        print("\n📸 No properties to download photos for\n")
+        return photo_map
+
+    photo_index = scan_photo_folder(output_folder)
+    journal_file = journal_path(output_folder)
+    if not resume:
+        reset_journal(journal_file)
+    journal = load_journal(journal_file)
+    concurrent = max_workers > 1
+    if requests_per_second is None:
+        requests_per_second = REQUESTS_PER_PHOTO / delay if delay > 0 else None
     
     print(f"\n📸 Downloading {total} property photos from Zillow...")
     print(f"   Output folder: {output_folder}")
-    print(f"   Delay between requests: {delay} seconds")
+    if requests_per_second:
+        ceiling = max(max_requests_per_second or 0, requests_per_second)
+        rate = f"{requests_per_second:.2f} requests/second (adaptive, up to {ceiling:.2f})"
+    else:
+        rate = "unlimited"
+    print(f"   Workers: {max_workers}, rate limit: {rate}")
     print(f"   Method: Direct URL from address (most reliable)")
     print()
-    
-    for idx, row in df.iterrows():
-        parcel_id = row.get('Parcel_ID')
-        address = row.get('Address')
-        city = row.get('City')
-        state = row.get('State', 'OH')
-        zip_code = row.get('Zip')
-        
-        print(f"[{idx + 1}/{total}] {address}, {city}")
-        
-        filepath = download_property_photo(
-            parcel_id, address, city, state, zip_code, output_folder
-        )
-        
-        if filepath:
-            photo_map[parcel_id] = filepath
-        
-        # Be respectful - wait between requests
-        if idx < total - 1:
-            time.sleep(delay)
-        
+
+    pending = []
+    skipped_misses = 0
+    retrying = 0
+    rechecking = 0
+    for prop in properties:
+        parcel_key = str(prop[0])
+        if parcel_key in photo_index:
+            continue
+        record = journal.get(parcel_key)
+        if record and is_expired_miss(record):
+            rechecking += 1
+        elif record and record['status'] != 'done' and not is_retryable(record):
+            skipped_misses += 1
+            continue
+        retrying += bool(record and is_retryable(record))
+        pending.append(prop)
+
+    already = total - len(pending) - skipped_misses
+    if already:
+        print(f"   Already downloaded: {already} (skipped)")
+    if skipped_misses:
+        print(f"   No photo in an earlier run: {skipped_misses} (skipped; resume=False to try again)")
+    if retrying:
+        print(f"   Retrying earlier failures: {retrying}")
+    if rechecking:
+        print(f"   No photo in an earlier run, checking again: {rechecking}")
+    if already or skipped_misses or retrying or rechecking:
+        print()
+
+    outcomes = {}
+
+    def record_outcome(parcel_id, filepath, status, detail):
+        record = append_journal(journal_file, parcel_id, status, detail, filepath)
+        key = 'retryable' if is_retryable(record) else status
+        outcomes[key] = outcomes.get(key, 0) + 1
+
+    if concurrent and max_workers > POOL_SIZE:
+        # Keep one pooled connection per worker
+        set_shared_session(create_session(pool_size=max_workers, retry_statuses=SHARED_RETRY_STATUSES))
+    set_rate_limit(requests_per_second, burst=max_workers, max_requests_per_second=max_requests_per_second)
+    try:
+        if concurrent:
+            with ThreadPoolExecutor(max_workers=max_workers) as pool:
+                futures = {
+                    pool.submit(fetch_property_photo, parcel_id, address, city, state, zip_code,
+                                output_folder, verbose=False, photo_index=photo_index): (parcel_id, address, city)
+                    for parcel_id, address, city, state, zip_code in pending
+                }
+                for done, future in enumerate(as_completed(futures), 1):
+                    parcel_id, address, city = futures[future]
+                    try:
+                        filepath, status, detail = future.result()
+                    except Exception as e:
+                        filepath, status, detail = None, 'error', type(e).__name__
+                    record_outcome(parcel_id, filepath, status, detail)
+                    if filepath:
+                        print(f"[{done}/{len(pending)}] {address}, {city} ✅ {filepath}")
+                    else:
+                        reason = status.replace('_', ' ') + (f" ({detail})" if detail else "")
+                        print(f"[{done}/{len(pending)}] {address}, {city} ⚠️  {reason}")
+        else:
+            for idx, (parcel_id, address, city, state, zip_code) in enumerate(pending):
+                print(f"[{idx + 1}/{len(pending)}] {address}, {city}")
+                
+                try:
+                    filepath, status, detail = fetch_property_photo(
+                        parcel_id, address, city, state, zip_code, output_folder, photo_index=photo_index
+                    )
+                except Exception as e:
+                    filepath, status, detail = None, 'error', type(e).__name__
+                record_outcome(parcel_id, filepath, status, detail)
+                print()
+
+        metrics = get_rate_metrics()
+    finally:
+        set_rate_limit(None)
+
+    for parcel_id, *_ in properties:
+        entry = photo_index.get(str(parcel_id))
+        if entry:
+            photo_map[parcel_id] = entry['path']
+
+    if concurrent and pending:
         print()
-    
     print(f"✅ Downloaded {len(photo_map)} out of {total} photos")
     print(f"   Success rate: {len(photo_map)/total*100:.1f}%")
+    if pending:
+        print(f"   This run: {outcomes.get('done', 0)} saved, {outcomes.get('no_zpid', 0)} not on Zillow, "
+              f"{outcomes.get('no_photo', 0) + outcomes.get('http_error', 0)} without a photo, "
+              f"{outcomes.get('retryable', 0)} failed")
+    if outcomes.get('retryable'):
+        print(f"   Run again to retry the failed ones (journal: {journal_file})")
+    if metrics['requests']:
+        throttled = ', '.join(f"{count}× {code}" for code, count in sorted(metrics['throttled'].items()))
+        print(f"   Requests: {metrics['requests']}, throttled: {throttled or 'none'}, "
+              f"connection errors: {metrics['errors']}")
+        if metrics['rate']:
+            print(f"   Rate limiter: ended at {metrics['rate']:.2f} requests/second "
+                  f"(lowest {metrics['min_rate']:.2f}), {metrics['backoffs']} backoff(s) "
+                  f"totalling {metrics['backoff_seconds']:.0f}s")
     print(f"   Photos saved in: {output_folder}/")
     print()
     
     return photo_map
 
+def _link_photo(source, target, link_mode):
+    """Create `target` as a hardlink/symlink to `source` (falling back to symlink, then copy)."""
+    temp_target = f"{target}{PARTIAL_SUFFIX}"
+    if os.path.lexists(temp_target):
+        os.remove(temp_target)
+    modes = ('hardlink', 'symlink', 'copy')
+    for mode in modes[modes.index(link_mode):]:
+        try:
+            if mode == 'hardlink':
+                os.link(source, temp_target)
+            elif mode == 'symlink':
+                os.symlink(os.path.relpath(source, os.path.dirname(target)), temp_target)
+            else:
+                shutil.copy2(source, temp_target)
+            break
+        except (OSError, NotImplementedError):
+            if mode == 'copy':
+                raise
+    os.replace(temp_target, target)
+
+def link_report_photos(photo_map, parcel_ids, folder, link_mode='hardlink'):
+    """
+    Materialise a report's photo folder from the shared store: every parcel in
+    `parcel_ids` that has a photo in `photo_map` gets `{parcel_id}.<ext>` in
+    `folder`, linked to the stored file. Links that are already current are left alone.
+
+    Returns:
+        dict: parcel_id -> path in `folder`
+    """
+    existing = scan_photo_folder(folder)
+    linked = {}
+    for parcel_id in parcel_ids:
+        source = photo_map.get(parcel_id)
+        if not source:
+            continue
+        target = os.path.join(folder, os.path.basename(source))
+        current = existing.get(str(parcel_id))
+        if current and current['path'] != target:
+            os.remove(current['path'])  # photo stored under a different extension now
+            current = None
+        source_stat = os.stat(source)
+        if not current or (current['size'], current['mtime']) != (source_stat.st_size, source_stat.st_mtime):
+            _link_photo(source, target, link_mode)
+        linked[parcel_id] = target
+    return linked
+
+def download_report_photos(reports, photo_root="zillow_photos", link_mode='hardlink', **batch_options):
+    """
+    Download the photos for several reports in one pass.
+
+    The parcels of all reports are merged into one de-duplicated queue and
+    downloaded once into a shared store (`photo_root/PHOTO_STORE_FOLDER`).
+    Each report then gets its own folder, `photo_root/<report name>`, whose
+    files are hardlinks to the store (link_mode 'symlink' or 'copy' also work;
+    hardlinks fall back to symlinks, then copies, where unsupported).
+
+    Args:
+        reports: Dict of report name -> DataFrame with Parcel_ID, Address, City, State, Zip
+        photo_root: Folder holding the store and the per-report folders
+        link_mode: 'hardlink', 'symlink' or 'copy'
+        **batch_options: Passed to batch_download_photos (delay, max_workers, resume...)
+
+    Returns:
+        dict: report name -> {parcel_id: photo path in that report's folder}
+    """
+    columns = ['Parcel_ID', 'Address', 'City', 'State', 'Zip']
+    frames = [df[[col for col in columns if col in df.columns]] for df in reports.values()
+              if df is not None and not df.empty and 'Parcel_ID' in df.columns]
+    if not frames:
+        print("\n📸 No properties to download photos for\n")
+        return {name: {} for name in reports}
+
+    queue = pd.concat(frames, ignore_index=True).drop_duplicates(subset='Parcel_ID')
+    photo_map = batch_download_photos(queue, output_folder=os.path.join(photo_root, PHOTO_STORE_FOLDER),
+                                      **batch_options)
+
+    report_maps = {}
+    for name, df in reports.items():
+        parcel_ids = df['Parcel_ID'].drop_duplicates() if df is not None and 'Parcel_ID' in df.columns else []
+        report_maps[name] = link_report_photos(photo_map, parcel_ids, os.path.join(photo_root, name), link_mode)
+        print(f"   {name}: {len(report_maps[name])} photo(s) in {os.path.join(photo_root, name)}/")
+    return report_maps
+
 if __name__ == "__main__":
     # Test the photo downloader
     print("🧪 Testing Zillow Photo Downloader\n")
@@ -0,0 +1,97 @@
+"""
+Zillow Photo Job Journal
+Append-only JSON-lines log of every parcel a photo batch has processed, kept in
+the output folder. An interrupted batch_download_photos() run resumes from it:
+finished parcels and definite misses are skipped, only retryable failures
+(HTTP 403/429/5xx, connection errors) are attempted again, and photo_map can be
+rebuilt from it without any network access. Misses (not on Zillow, no photo)
+expire after the zpid cache's NEGATIVE_TTL_DAYS, so a later run checks them again.
+
+Statuses: done, no_zpid, no_photo, http_error (detail = status code),
+error (detail = exception name).
+"""
+
+import json
+import os
+import threading
+import time
+
+import zillow_zpid_cache
+
+JOURNAL_FILENAME = '.photo_journal.jsonl'
+RETRYABLE_HTTP_CODES = (403, 429, 500, 502, 503, 504)
+
+_lock = threading.Lock()
+
+
+def journal_path(output_folder):
+    """Path of the journal kept in a photo output folder."""
+    return os.path.join(output_folder, JOURNAL_FILENAME)
+
+
+def load_journal(path):
+    """
+    Read a journal into {parcel_id: latest record}.
+    A torn last line (from a crash mid-write) is ignored.
+    """
+    records = {}
+    if not os.path.exists(path):
+        return records
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            records[record['parcel_id']] = record
+    return records
+
+
+def append_journal(path, parcel_id, status, detail=None, filepath=None):
+    """Append one parcel's outcome to the journal (safe to call from worker threads)."""
+    record = {'parcel_id': str(parcel_id), 'status': status, 'detail': detail,
+              'path': filepath, 'time': round(time.time(), 1)}
+    line = json.dumps(record) + '\n'
+    with _lock:
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(line)
+    return record
+
+
+def reset_journal(path):
+    """Start a new job: remove the journal so every parcel is attempted again."""
+    with _lock:
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def is_retryable(record):
+    """True when a journal record is a failure worth retrying on the next run."""
+    if record['status'] == 'error':
+        return True
+    return record['status'] == 'http_error' and record.get('detail') in RETRYABLE_HTTP_CODES
+
+
+def is_expired_miss(record, now=None):
+    """
+    True when a miss (any non-retryable failure) is older than the zpid cache's
+    NEGATIVE_TTL_DAYS, so the parcel should be checked again for a new listing.
+    """
+    ttl_days = zillow_zpid_cache.NEGATIVE_TTL_DAYS
+    if record['status'] == 'done' or is_retryable(record) or ttl_days is None:
+        return False
+    return (now or time.time()) - record.get('time', 0) > ttl_days * 86400
+
+
+def rebuild_photo_map(output_folder):
+    """
+    photo_map ({parcel_id: path}) of a finished or interrupted batch, from its
+    journal alone (no network). Parcels whose photo file was since deleted are left out.
+    """
+    records = load_journal(journal_path(output_folder))
+    present = set(os.listdir(output_folder)) if os.path.isdir(output_folder) else set()
+    return {
+        parcel_id: record['path']
+        for parcel_id, record in records.items()
+        if record['status'] == 'done' and record.get('path') and os.path.basename(record['path']) in present
+    }
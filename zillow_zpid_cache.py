@@ -0,0 +1,121 @@
+"""
+Zillow zpid Cache
+Persists address -> zpid lookups in a small SQLite database so reruns skip the
+Zillow round trips for properties that were already resolved.
+
+Addresses are keyed on a normalized "ADDRESS|CITY|ZIP5" string. Properties Zillow
+did not find are cached too (zpid NULL), but only for NEGATIVE_TTL_DAYS so new
+listings are picked up again later.
+"""
+
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from mls_cama_cache import CACHE_DIR
+
+ZPID_CACHE_PATH = os.path.join(CACHE_DIR, 'zpid_cache.sqlite')
+NEGATIVE_TTL_DAYS = 7       # Re-check "not on Zillow" results after this many days
+POSITIVE_TTL_DAYS = None    # zpids don't change; set a number of days to expire them anyway
+
+_connections = {}
+_lock = threading.Lock()
+
+
+def normalize_address_key(address, city, zip_code):
+    """
+    Build the cache key for an address: upper-case, punctuation removed,
+    whitespace collapsed and ZIP+4 trimmed to 5 digits.
+    Returns None when any part is missing.
+    """
+    parts = []
+    for value in (address, city):
+        if value is None or str(value).strip() in ('', 'nan', 'None'):
+            return None
+        text = re.sub(r'[^\w\s]', ' ', str(value).upper())
+        parts.append(re.sub(r'\s+', ' ', text).strip())
+
+    zip_clean = str(zip_code).strip().split('-')[0] if zip_code is not None else ''
+    zip_clean = zip_clean[:-2] if zip_clean.endswith('.0') else zip_clean
+    if not zip_clean or zip_clean == 'nan':
+        return None
+    parts.append(zip_clean[:5])
+    return '|'.join(parts)
+
+
+def _connect(path):
+    """Open (once per path) the cache database, creating it if needed."""
+    conn = _connections.get(path)
+    if conn is None:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS zpid_cache ('
+            ' address_key TEXT PRIMARY KEY,'
+            ' zpid TEXT,'
+            ' checked_at REAL NOT NULL)'
+        )
+        conn.commit()
+        _connections[path] = conn
+    return conn
+
+
+def lookup_zpid(address, city, zip_code, path=None):
+    """
+    Look up an address in the cache.
+
+    Returns:
+        tuple: (hit, zpid) - hit is False when the address is not cached or the
+        entry has expired; zpid is None for a cached "not found" result
+    """
+    key = normalize_address_key(address, city, zip_code)
+    if key is None:
+        return False, None
+
+    with _lock:
+        row = _connect(path or ZPID_CACHE_PATH).execute(
+            'SELECT zpid, checked_at FROM zpid_cache WHERE address_key = ?', (key,)
+        ).fetchone()
+    if row is None:
+        return False, None
+
+    zpid, checked_at = row
+    ttl_days = POSITIVE_TTL_DAYS if zpid else NEGATIVE_TTL_DAYS
+    if ttl_days is not None and time.time() - checked_at > ttl_days * 86400:
+        return False, None
+    return True, zpid
+
+
+def store_zpid(address, city, zip_code, zpid, path=None):
+    """Record a lookup result (zpid=None records "not on Zillow")."""
+    key = normalize_address_key(address, city, zip_code)
+    if key is None:
+        return
+
+    with _lock:
+        conn = _connect(path or ZPID_CACHE_PATH)
+        conn.execute(
+            'INSERT OR REPLACE INTO zpid_cache (address_key, zpid, checked_at) VALUES (?, ?, ?)',
+            (key, str(zpid) if zpid else None, time.time())
+        )
+        conn.commit()
+
+
+def clear_zpid_cache(path=None, negative_only=False):
+    """
+    Delete cached lookups (only the "not found" ones with negative_only=True).
+    Returns the number of entries removed.
+    """
+    path = path or ZPID_CACHE_PATH
+    if not os.path.exists(path):
+        return 0
+
+    with _lock:
+        conn = _connect(path)
+        where = ' WHERE zpid IS NULL' if negative_only else ''
+        removed = conn.execute(f'DELETE FROM zpid_cache{where}').rowcount
+        conn.commit()
+    return removed